@@ -0,0 +1,141 @@
+"""
+Génération des PDF en lot, sans Streamlit.
+
+Rend en parallèle toutes les sauvegardes JSON d'un dossier (celles que save_data()
+écrit dans saved_data/) :
+
+    python batch_pdf.py saved_data -o rapports_pdf -j 4
+
+Un PDF plus récent que sa sauvegarde est considéré à jour et n'est pas régénéré,
+sauf avec --force.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import report_pdf
+
+# Statuts affichés dans le récapitulatif
+GENERE = "généré"
+A_JOUR = "à jour"
+ERREUR = "erreur"
+
+
+def is_up_to_date(json_path, pdf_path):
+    """Le PDF existe et n'est pas plus ancien que la sauvegarde."""
+    try:
+        return os.path.getmtime(pdf_path) >= os.path.getmtime(json_path)
+    except OSError:
+        return False
+
+
+def render_file(json_path, pdf_path):
+    """
+    Rend une sauvegarde JSON en PDF ; exécuté dans un processus du pool.
+    Retourne (nombre de pages, taille en octets).
+    """
+    with open(json_path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Le PDF est écrit directement dans son fichier (à côté puis renommé)
+    pages = []
+    size = report_pdf.render_pdf_file(data, pdf_path, on_page=pages.append)
+    return (pages[-1] if pages else 0), size
+
+
+def _timed_render(json_path, pdf_path):
+    start = time.perf_counter()
+    pages, size = render_file(json_path, pdf_path)
+    return pages, size, time.perf_counter() - start
+
+
+def list_saves(input_dir):
+    return sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.endswith(".json")
+    )
+
+
+def run_batch(input_dir, output_dir, workers=None, force=False, out=sys.stdout):
+    """
+    Rend toutes les sauvegardes de input_dir dans output_dir.
+    Retourne la liste des résultats (fichier, statut, durée, pages, taille, erreur).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    todo = {}
+    for json_path in list_saves(input_dir):
+        name = os.path.splitext(os.path.basename(json_path))[0]
+        pdf_path = os.path.join(output_dir, f"{name}.pdf")
+        if not force and is_up_to_date(json_path, pdf_path):
+            results.append((json_path, A_JOUR, 0.0, None, os.path.getsize(pdf_path), None))
+        else:
+            todo[json_path] = pdf_path
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_timed_render, json_path, pdf_path): json_path
+                for json_path, pdf_path in todo.items()
+            }
+            for future in as_completed(futures):
+                json_path = futures[future]
+                try:
+                    pages, size, elapsed = future.result()
+                    results.append((json_path, GENERE, elapsed, pages, size, None))
+                except Exception as e:
+                    results.append((json_path, ERREUR, 0.0, None, None, str(e)))
+
+    results.sort(key=lambda result: result[0])
+    print_summary(results, out)
+    return results
+
+
+def print_summary(results, out=sys.stdout):
+    """Affiche une ligne par fichier avec son statut et sa durée de rendu."""
+    width = max([len(os.path.basename(r[0])) for r in results] + [7])
+    out.write(f"{'Fichier':<{width}}  {'Statut':<8}  {'Durée':>8}  {'Pages':>5}  {'Taille':>10}\n")
+    for json_path, status, elapsed, pages, size, error in results:
+        name = os.path.basename(json_path)
+        if status == ERREUR:
+            out.write(f"{name:<{width}}  {status:<8}  {error}\n")
+            continue
+        duration = f"{elapsed:.2f}s" if status == GENERE else "-"
+        out.write(
+            f"{name:<{width}}  {status:<8}  {duration:>8}  "
+            f"{pages if pages is not None else '-':>5}  {size if size is not None else '-':>10}\n"
+        )
+
+    generated = [r for r in results if r[1] == GENERE]
+    total = sum(r[2] for r in generated)
+    out.write(
+        f"\n{len(generated)} généré(s), "
+        f"{sum(1 for r in results if r[1] == A_JOUR)} à jour, "
+        f"{sum(1 for r in results if r[1] == ERREUR)} erreur(s) ; "
+        f"temps de rendu cumulé {total:.2f}s\n"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les PDF de toutes les sauvegardes JSON d'un dossier.")
+    parser.add_argument("input_dir", nargs="?", default="saved_data", help="dossier des sauvegardes JSON (défaut : saved_data)")
+    parser.add_argument("-o", "--output-dir", default="rapports_pdf", help="dossier des PDF générés (défaut : rapports_pdf)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("-f", "--force", action="store_true", help="régénérer même les PDF à jour")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"dossier introuvable : {args.input_dir}")
+
+    start = time.perf_counter()
+    results = run_batch(args.input_dir, args.output_dir, args.workers, args.force)
+    print(f"Durée totale : {time.perf_counter() - start:.2f}s")
+    return 1 if any(r[1] == ERREUR for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
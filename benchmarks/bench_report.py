@@ -0,0 +1,135 @@
+"""
+Benchmarks des traitements du rapport sur des données synthétiques.
+
+Pour chaque échelle de synthetic.SCALES, mesure :
+
+- pdf : génération complète (report_pdf.render_pdf, sans cache) ;
+- pdf_sections_cached : régénération avec le cache des sections déjà rempli ;
+- normalize : conversion des tableaux (report_pdf.normalize_report) ;
+- json_export : sérialisation telle que le bouton d'export la produit ;
+- json_import : lecture et validation d'une sauvegarde (report_import.load_report) ;
+- save_file / save_sqlite : sauvegarde d'une révision (report_storage), un champ modifié
+  entre deux sauvegardes.
+
+Les résultats (médiane, minimum, maximum en secondes) sont écrits en JSON avec le commit
+et l'environnement, pour comparer deux versions hors ligne :
+
+    python benchmarks/bench_report.py --scales small medium large --json resultats.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import report_pdf  # noqa: E402
+import report_import  # noqa: E402
+import report_storage  # noqa: E402
+from synthetic import SCALES, generate_report  # noqa: E402
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "runs": repeat,
+    }
+
+
+def bench_scale(scale, seed, repeat):
+    report = generate_report(scale, seed)
+    exported = json.dumps(report, ensure_ascii=False, indent=4)
+    exported_bytes = exported.encode("utf-8")
+
+    pages = []
+    pdf = report_pdf.render_pdf(report, on_page=pages.append)
+    section_cache = {}
+    report_pdf.generate_pdf(report, section_cache)
+
+    timings = {
+        "pdf": measure(lambda: report_pdf.render_pdf(report), repeat),
+        "pdf_sections_cached": measure(lambda: report_pdf.generate_pdf(report, section_cache), repeat),
+        "normalize": measure(lambda: report_pdf.normalize_report(report), repeat),
+        "json_export": measure(lambda: json.dumps(report, ensure_ascii=False, indent=4), repeat),
+        "json_import": measure(lambda: report_import.load_report(io.BytesIO(exported_bytes)), repeat),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in ("file", "sqlite"):
+            storage = report_storage.open_storage(
+                kind,
+                os.path.join(tmp, "reports.db" if kind == "sqlite" else "saved_data"),
+                report_storage.RetentionPolicy()
+            )
+            edits = iter(range(repeat + 1))
+
+            # Une modification entre deux sauvegardes, comme un utilisateur qui enregistre souvent
+            def save():
+                report["pres_prob"] = f"Révision {next(edits)}"
+                storage.save(report)
+            timings[f"save_{kind}"] = measure(save, repeat)
+            if kind == "sqlite":
+                storage.close()
+
+    return {
+        "json_bytes": len(exported_bytes),
+        "pdf_bytes": len(pdf),
+        "pages": pages[-1] if pages else 0,
+        "timings": timings,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du PDF, de l'import/export JSON et de la sauvegarde.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium", "large"],
+                        help="échelles à mesurer (défaut : small medium large)")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions par mesure (défaut : 5)")
+    parser.add_argument("--seed", type=int, default=0, help="graine du générateur (défaut : 0)")
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for scale in args.scales:
+        result = results["scales"][scale] = bench_scale(scale, args.seed, args.repeat)
+        print(f"{scale} : {result['json_bytes']} octets JSON, {result['pages']} pages, PDF {result['pdf_bytes']} octets")
+        for name, timing in result["timings"].items():
+            print(f"  {name:<20} médiane {timing['median'] * 1000:9.2f} ms  (min {timing['min'] * 1000:9.2f} ms)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Mesure du temps de démarrage de l'application Streamlit.
+
+Chaque mesure tourne dans un interpréteur neuf pour refléter un démarrage à froid :
+
+- coût d'import à froid de chaque dépendance lourde (pandas, ReportLab, PIL) ;
+- premier affichage : première exécution du script p6.py, imports compris ;
+- par page : première visite puis médiane des reruns suivants, avec la liste des
+  dépendances lourdes chargées à ce moment-là.
+
+    python benchmarks/bench_startup.py [--reruns 10] [--json resultats.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "p6.py")
+
+PAGES = ("Présentation du Projet", "Analyse de Marché", "Stratégie Commerciale", "Détails Techniques")
+
+# Dépendances dont on veut savoir si elles sont chargées
+HEAVY_MODULES = ("pandas", "reportlab", "PIL")
+
+IMPORTS = {
+    "pandas": "import pandas",
+    "reportlab": "import report_pdf",
+    "PIL": "import PIL.Image",
+}
+
+IMPORT_SNIPPET = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+print(json.dumps(time.perf_counter() - start))
+"""
+
+APP_SNIPPET = """
+import sys, time, json, statistics
+from streamlit.testing.v1 import AppTest
+
+heavy = {heavy!r}
+def loaded():
+    return [name for name in heavy if name in sys.modules]
+
+at = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+result = {{"first_paint": time.perf_counter() - start, "loaded_after_first_paint": loaded(), "pages": {{}}}}
+
+for page in {pages!r}:
+    start = time.perf_counter()
+    at.sidebar.selectbox[0].set_value(page).run()
+    first_visit = time.perf_counter() - start
+    reruns = []
+    for _ in range({reruns}):
+        start = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - start)
+    result["pages"][page] = {{
+        "first_visit": first_visit,
+        "rerun_median": statistics.median(reruns) if reruns else None,
+        "loaded": loaded(),
+    }}
+print(json.dumps(result))
+"""
+
+
+def run_snippet(code):
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    # Streamlit peut écrire des avertissements avant le résultat : garder la dernière ligne
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_imports(repeat):
+    results = {}
+    for name, statement in IMPORTS.items():
+        timings = [run_snippet(IMPORT_SNIPPET.format(root=ROOT, statement=statement)) for _ in range(repeat)]
+        results[name] = statistics.median(timings)
+    return results
+
+
+def measure_app(reruns):
+    return run_snippet(APP_SNIPPET.format(heavy=HEAVY_MODULES, app=APP, pages=PAGES, reruns=reruns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps de démarrage et de rerun de l'application.")
+    parser.add_argument("--reruns", type=int, default=10, help="reruns mesurés par page (défaut : 10)")
+    parser.add_argument("--repeat", type=int, default=3, help="répétitions des imports à froid (défaut : 3)")
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    results = {
+        "imports": measure_imports(args.repeat),
+        "app": measure_app(args.reruns),
+    }
+
+    print("Import à froid :")
+    for name, seconds in results["imports"].items():
+        print(f"  {name:<10} {seconds * 1000:8.1f} ms")
+
+    app = results["app"]
+    print(f"\nPremier affichage : {app['first_paint'] * 1000:.1f} ms "
+          f"(chargés : {', '.join(app['loaded_after_first_paint']) or 'aucun'})")
+    print("\nPages :")
+    for page, timing in app["pages"].items():
+        print(f"  {page:<24} première visite {timing['first_visit'] * 1000:8.1f} ms, "
+              f"rerun médian {timing['rerun_median'] * 1000:8.1f} ms "
+              f"(chargés : {', '.join(timing['loaded']) or 'aucun'})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Conversion des tableaux enregistrements -> colonnes sur de grands tableaux.
+
+Compare report_tables.records_to_columns à l'ancien algorithme (une passe sur les
+enregistrements par colonne) et, pour référence, à une conversion via pandas
+(DataFrame.from_records puis tolist), sur des tableaux homogènes (toutes les lignes ont
+les mêmes colonnes, cas de st.data_editor) et hétérogènes (colonnes manquantes).
+
+    python benchmarks/bench_tables.py [--rows 1000 10000 50000] [--json resultats.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from report_tables import records_to_columns  # noqa: E402
+
+COLUMNS = ("Type", "Nom", "Localisation", "Description")
+
+
+# Ancienne conversion, conservée comme point de comparaison
+def legacy_records_to_columns(records):
+    columns_dict = {}
+    for record in records:
+        for key in record.keys():
+            if key not in columns_dict:
+                columns_dict[key] = []
+    for column in columns_dict.keys():
+        for record in records:
+            if column in record:
+                columns_dict[column].append(record[column])
+            else:
+                columns_dict[column].append("")
+    return columns_dict
+
+
+def pandas_records_to_columns(records):
+    import pandas as pd
+    df = pd.DataFrame.from_records(records).fillna("")
+    return {column: df[column].tolist() for column in df.columns}
+
+
+def make_records(rows, heterogeneous, seed=0):
+    rnd = random.Random(seed)
+    records = []
+    for i in range(rows):
+        record = {column: f"{column} {i} {rnd.random():.6f}" for column in COLUMNS}
+        if heterogeneous and rnd.random() < 0.2:
+            del record[rnd.choice(COLUMNS)]
+        records.append(record)
+    return records
+
+
+def measure(func, records, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(records)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la conversion des tableaux.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000], help="nombres de lignes")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions par mesure (défaut : 5)")
+    parser.add_argument("--json", help="écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    converters = {
+        "records_to_columns": records_to_columns,
+        "legacy": legacy_records_to_columns,
+        "pandas": pandas_records_to_columns,
+    }
+    results = []
+    for rows in args.rows:
+        for heterogeneous in (False, True):
+            records = make_records(rows, heterogeneous)
+            expected = legacy_records_to_columns(records)
+            if records_to_columns(records) != expected:
+                raise SystemExit(f"Résultat différent de l'ancienne conversion ({rows} lignes)")
+            timings = {name: measure(func, records, args.repeat) for name, func in converters.items()}
+            results.append({"rows": rows, "heterogeneous": heterogeneous, "seconds": timings})
+            label = "hétérogène" if heterogeneous else "homogène"
+            print(f"{rows:>7} lignes, {label:<10} " + "  ".join(
+                f"{name} {seconds * 1000:8.2f} ms" for name, seconds in timings.items()
+            ))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
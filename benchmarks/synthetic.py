@@ -0,0 +1,124 @@
+"""
+Générateur de rapports synthétiques pour les benchmarks.
+
+generate_report(échelle, graine) produit un dictionnaire au format des sauvegardes de
+l'application (celui que save_data() écrit), reproductible pour une graine donnée.
+Les échelles font varier la longueur des zones de texte, le nombre de lignes des
+tableaux, le nombre de concurrents et de critères et la taille des tableaux du modèle
+d'affaires. L'échelle wide est une matrice comparative large et creuse (centaines de
+concurrents et de critères, une cellule sur cinq remplie).
+"""
+import random
+
+# Paramètres de chaque échelle
+SCALES = {
+    "small": {"words": 30, "paragraphs": 2, "rows": 4, "competitors": 3, "criteria": 5, "modele_rows": 2},
+    "medium": {"words": 80, "paragraphs": 5, "rows": 15, "competitors": 5, "criteria": 10, "modele_rows": 8},
+    "large": {"words": 200, "paragraphs": 12, "rows": 60, "competitors": 7, "criteria": 25, "modele_rows": 30},
+    "xlarge": {"words": 400, "paragraphs": 30, "rows": 250, "competitors": 7, "criteria": 60, "modele_rows": 120},
+    "wide": {"words": 80, "paragraphs": 5, "rows": 15, "competitors": 300, "criteria": 200, "modele_rows": 8, "fill": 0.2},
+}
+
+WORDS = (
+    "marché", "client", "innovation", "produit", "service", "qualité", "prix", "réseau",
+    "stratégie", "croissance", "partenaire", "développement", "durable", "local", "numérique",
+    "capteur", "application", "prototype", "distribution", "énergie", "<b>clé</b>", "coût",
+)
+
+# Colonnes des tableaux du modèle d'affaires, comme dans l'application
+MODELE_COLUMNS = {
+    "modele_partenaires": ("Type", "Rôle"),
+    "modele_activites": ("Activité", "Description"),
+    "modele_proposition": ("Élément", "Description"),
+    "modele_relations": ("Type", "Description"),
+    "modele_segments": ("Segment", "Description"),
+    "modele_ressources": ("Type", "Description"),
+    "modele_couts": ("Poste", "Description"),
+    "modele_canaux": ("Canal", "Description"),
+    "modele_revenus": ("Source", "Description"),
+}
+
+TEXT_AREAS = (
+    "pres_prob", "pres_solution", "pres_objectifs", "pres_odd", "pres_mission", "pres_vision",
+    "pres_realisations", "marche_tendances", "marche_analyse", "part", "assoc", "ecoles", "entrep",
+    "tech_electronique", "tech_materiaux", "tech_application", "tech_algorithmes", "tech_interface",
+    "tech_tests", "comp", "app", "prod",
+)
+
+IDENTITY_FIELDS = (
+    "ident_slogan", "ident_objet_social", "ident_domaines", "ident_siege", "ident_forme",
+    "ident_associes", "ident_valeurs",
+)
+
+BMC_FIELDS = (
+    "bmc_partenaires", "bmc_activites", "bmc_proposition", "bmc_relations", "bmc_segments",
+    "bmc_ressources", "bmc_canaux", "bmc_couts", "bmc_revenus",
+)
+
+
+def generate_report(scale="medium", seed=0):
+    """Rapport synthétique d'une échelle de SCALES ; même graine, même rapport."""
+    params = SCALES[scale]
+    rnd = random.Random(f"{scale}:{seed}")
+
+    def words(count):
+        return " ".join(rnd.choice(WORDS) for _ in range(count))
+
+    def text_area():
+        return "\n".join(words(params["words"] // params["paragraphs"] + 1) for _ in range(params["paragraphs"]))
+
+    rows = params["rows"]
+    report = {
+        "projet_titre": f"Projet {words(2)}",
+        "ident_rs": f"Entreprise {seed}",
+    }
+    for key in TEXT_AREAS:
+        report[key] = text_area()
+    for key in IDENTITY_FIELDS:
+        report[key] = words(4)
+    for key in BMC_FIELDS:
+        report[key] = "\n".join(words(5) for _ in range(max(params["paragraphs"] // 2, 1)))
+
+    report["marche_cibles_table"] = [{"Segment": words(2), "Bénéfices": words(8)} for _ in range(rows)]
+    report["marche_swot_table"] = [
+        {"Catégorie": category, "Points": words(params["words"] // 4)}
+        for category in ("Forces", "Faiblesses", "Opportunités", "Menaces") * max(rows // 4, 1)
+    ]
+    report["marche_marketing_table"] = [
+        {"Élément": element, "Stratégie": words(params["words"] // 4)}
+        for element in ("Produit", "Prix", "Distribution", "Promotion") * max(rows // 4, 1)
+    ]
+    report["marche_concurrents_table"] = [
+        {"Type": rnd.choice(("Direct", "Indirect")), "Nom": words(1), "Localisation": words(1), "Description": words(12)}
+        for _ in range(rows)
+    ]
+
+    # Matrice comparative détaillée : concurrents, critères et cellules remplies
+    report["criteres_column_name"] = "Critères/Concurrents"
+    competitor_ids = list(range(1, params["competitors"] + 1))
+    criterion_ids = list(range(1, params["criteria"] + 1))
+    report["competitor_list"] = {"id": competitor_ids, "Concurrent": [f"Concurrent {i}" for i in competitor_ids]}
+    report["competitor_criteria"] = {"id": criterion_ids, "Critère": [words(2) for _ in criterion_ids]}
+    cells = {"Critère": [], "Concurrent": [], "Valeur": []}
+    for criterion_id in criterion_ids:
+        for competitor_id in competitor_ids:
+            if rnd.random() < params.get("fill", 1.0):
+                cells["Critère"].append(criterion_id)
+                cells["Concurrent"].append(competitor_id)
+                cells["Valeur"].append(rnd.choice("+-T"))
+    report["competitor_cells"] = cells
+
+    report["marche_comparison_table"] = [
+        {"Critères": words(2), "A": rnd.choice("+-"), "B": rnd.choice("+-")} for _ in range(max(rows // 3, 1))
+    ]
+    report["marche_matrice_table"] = [
+        {"Critère": words(2), "X": str(rnd.randint(1, 5)), "Y": str(rnd.randint(1, 5))} for _ in range(max(rows // 3, 1))
+    ]
+    for key, columns in MODELE_COLUMNS.items():
+        report[key] = [{column: words(4) for column in columns} for _ in range(params["modele_rows"])]
+
+    report["projections_table"] = [
+        {"Année": year, "Visiteurs": str(year * rnd.randint(100, 1000)), "Ventes": str(year * rnd.randint(10, 100))}
+        for year in range(1, 4)
+    ]
+    return report
@@ -5,71 +5,152 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
-import pandas as pd
-from PIL import Image
 import json
 import os
-from pathlib import Path
-import io
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.pdfgen import canvas
+import hashlib
+import uuid
+import functools
+import tempfile
+from pdf_jobs import PdfJobManager, TERMINE, ERREUR
+from pdf_cache import PdfCache
+from report_import import load_report
+from report_images import IMAGE_TYPES, PREVIEW_DPI, ImageError, open_image_store
+from report_storage import open_storage
+from report_export import export_reports, latest_revisions
+from report_autosave import Autosaver
+from report_profiler import RerunProfiler
+from report_sections import PDF_SECTION_CHOICES, section_label
+from report_model import (
+    COMPETITOR_CELLS_KEY, COMPETITOR_CRITERIA_KEY, COMPETITOR_LIST_KEY,
+    ReportStore, Table, cells_from_json, cells_to_json, id_list, id_list_to_json, normalize_report
+)
+# Streamlit réexécute ce script à chaque interaction : les dépendances lourdes sont
+# importées au moment où elles servent (pandas dans les tableaux éditables, ReportLab
+# via report_pdf lors de la génération du PDF)
+
 
+# Profilage des reruns, activé par REPORT_PROFILE=1 (panneau des mesures dans la barre latérale)
+@st.cache_resource
+def get_profiler():
+    return RerunProfiler(enabled=os.environ.get("REPORT_PROFILE") == "1")
 
-# Initialiser la session_state si ce n'est pas déjà fait
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
+profiler = get_profiler()
+rerun_timer = profiler.start("rerun", "script")
 
-# Charger les données existantes - MODIFIÉ pour ne pas charger automatiquement les fichiers sauvegardés
-def load_data():
+# Données du rapport de la session, conservées entre les reruns - les fichiers
+# sauvegardés ne sont pas chargés automatiquement
+def get_report_store():
     """
-    Charge uniquement les données de la session, pas des fichiers sauvegardés
+    Retourne le ReportStore de la session. Les rendus, les sauvegardes et les exports
+    reçoivent un instantané (report_store.snapshot()) que la session ne modifie plus.
     """
-    # Vérifier si nous avons déjà des données dans la session
-    if 'user_data' in st.session_state and st.session_state.user_data:
-        return st.session_state.user_data
-    
-    # Ne plus charger automatiquement les fichiers
-    return {}
+    if 'report_store' not in st.session_state:
+        st.session_state.report_store = ReportStore()
+    return st.session_state.report_store
 
 # Sauvegarder les données
+@profiler.timed()
 def save_data(data):
     """
-    Sauvegarde les données dans un fichier JSON avec un nom de fichier unique basé sur le nom de l'entreprise et un horodatage
+    Enregistre une nouvelle révision des données dans le stockage configuré (REPORT_STORAGE)
+    et retourne son emplacement
     """
-    # Sauvegarder dans la session state (persistante pendant la session utilisateur)
-    st.session_state.user_data = data
-    
-    # Créer le dossier de sauvegarde s'il n'existe pas
-    save_dir = "saved_data"
-    os.makedirs(save_dir, exist_ok=True)
-    
-    # Générer un nom de fichier unique
-    company_name = data.get('ident_rs', 'entreprise').replace(" ", "_")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{save_dir}/{company_name}_{timestamp}.json"
-    
-    # Sauvegarder dans un fichier local
     try:
-        with open(filename, "w", encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        return filename
+        return get_report_storage().save(data).location
     except Exception as e:
         st.warning(f"Erreur lors de la sauvegarde: {str(e)}")
         return None
 
-# Charger les anciennes entrées
-saved_data = load_data()
+# Stockage des sauvegardes partagé entre les sessions : fichiers JSON (défaut) ou SQLite
+@st.cache_resource
+def get_report_storage():
+    return open_storage()
+
+# Brouillons enregistrés automatiquement, partagés entre les sessions ; AUTOSAVE_DELAY=0 désactive,
+# AUTOSAVE_MAX_AGE_DAYS fixe l'âge au-delà duquel un brouillon est supprimé
+@st.cache_resource
+def get_autosaver():
+    delay = float(os.environ.get("AUTOSAVE_DELAY", "2"))
+    if delay <= 0:
+        return None
+    return Autosaver(
+        directory=os.environ.get("AUTOSAVE_DIR", "saved_data/autosave"),
+        delay=delay,
+        max_delay=float(os.environ.get("AUTOSAVE_MAX_DELAY", "30")),
+        max_age=float(os.environ.get("AUTOSAVE_MAX_AGE_DAYS", "7")) * 24 * 3600
+    )
+
+# Paramètre de l'adresse de la page qui rappelle l'identifiant du brouillon : seul le
+# navigateur qui l'a créé le retrouve après un rechargement
+DRAFT_PARAM = "brouillon"
+
+# Identifiant du brouillon de la session (chaque session écrit le sien)
+def autosave_id():
+    return st.session_state.setdefault('autosave_id', uuid.uuid4().hex)
+
+# Brouillon de la page avant le rechargement, relevé au premier rerun de la session
+def previous_draft_id():
+    return st.session_state.setdefault('previous_draft_id', st.query_params.get(DRAFT_PARAM))
+
+# Le brouillon de la session reçoit ses premières modifications : le rappeler dans l'adresse
+def remember_draft():
+    previous_draft_id()
+    if st.query_params.get(DRAFT_PARAM) != autosave_id():
+        st.query_params[DRAFT_PARAM] = autosave_id()
+
+# Signale une valeur modifiée : elle sera écrite avec les suivantes, après une pause de saisie
+def autosave(key, value):
+    autosaver = get_autosaver()
+    if autosaver is not None:
+        autosaver.mark(autosave_id(), key, value)
+        remember_draft()
+
+# Remplace tout le brouillon de la session (import, réinitialisation)
+def autosave_all(data):
+    autosaver = get_autosaver()
+    if autosaver is not None:
+        autosaver.replace(autosave_id(), data)
+        remember_draft()
+
+# Données de la session
+report_store = get_report_store()
+
+# Identifie un fichier déposé dans un widget, sans lire son contenu
+def uploaded_file_key(uploaded_file):
+    return (getattr(uploaded_file, 'file_id', None), uploaded_file.name, uploaded_file.size)
+
+# Empreinte d'un fichier importé : (nom, taille, SHA-256 du contenu)
+def upload_fingerprint(uploaded_file):
+    # Le contenu n'est haché qu'une fois par fichier déposé dans le widget
+    fingerprints = st.session_state.setdefault('upload_fingerprints', {})
+    upload_key = uploaded_file_key(uploaded_file)
+    if upload_key not in fingerprints:
+        fingerprints.clear()
+        content_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        fingerprints[upload_key] = (uploaded_file.name, uploaded_file.size, content_hash)
+    return fingerprints[upload_key]
+
+# Remplace les données de la session par celles d'une sauvegarde importée
+@profiler.timed()
+def apply_imported_data(data):
+    # Tables au format colonnes, quel que soit le format de la sauvegarde
+    data = normalize_report(data)
+    
+    # Mettre à jour les données de la session
+    report_store.update(data)
+    autosave_all(report_store.snapshot())
+    
+    # Oublier l'état des widgets concernés pour qu'ils repartent des valeurs importées
+    for key in data:
+        if key in st.session_state:
+            del st.session_state[key]
 
 # Fonction pour créer des inputs avec persistance - MODIFIÉ pour supprimer la sauvegarde automatique
+@profiler.timed()
 def create_input(label, default_value="", key=None, text_area=False, height=None):
     # Récupérer la valeur sauvegardée si elle existe
-    saved_value = saved_data.get(key, default_value)
+    saved_value = report_store.get(key, default_value)
     
     if text_area:
         if height:
@@ -79,96 +160,362 @@ def create_input(label, default_value="", key=None, text_area=False, height=None
     else:
         user_input = st.text_input(label, value=saved_value, key=key)
     
-    # Stocker la valeur dans saved_data sans sauvegarder automatiquement
-    if user_input != saved_data.get(key):
-        saved_data[key] = user_input
+    # Stocker la valeur dans les données de la session ; l'écriture sur disque est différée
+    if user_input != report_store.get(key):
+        # Un champ vide jamais rempli n'a pas besoin d'être enregistré
+        if key in report_store or user_input:
+            autosave(key, user_input)
+        report_store.set(key, user_input)
     
     return user_input
 
-# Fonction pour les tables éditables avec persistance - MODIFIÉ pour supprimer la sauvegarde automatique
+# Copie comparable de l'état d'édition d'un st.data_editor (modifications depuis le tableau de départ)
+def editor_state_snapshot(state):
+    if not state or not (state.get("edited_rows") or state.get("added_rows") or state.get("deleted_rows")):
+        return None
+    return {
+        "edited_rows": {int(row): dict(changes) for row, changes in state.get("edited_rows", {}).items()},
+        "added_rows": [dict(row) for row in state.get("added_rows", [])],
+        "deleted_rows": list(state.get("deleted_rows", [])),
+    }
+
+# Table éditée : seules les lignes modifiées ou ajoutées sont relues dans edited_df
+def apply_editor_state(base, base_df, edited_df, state):
+    deleted = set(state["deleted_rows"])
+    kept = [row for row in range(len(base)) if row not in deleted]
+    if len(edited_df) != len(kept) + len(state["added_rows"]) or not edited_df.dtypes.equals(base_df.dtypes):
+        # Ajout ignoré par l'éditeur ou colonne convertie (entiers devenus flottants) :
+        # repartir du tableau complet
+        return Table.from_frame(edited_df)
+    
+    table = base.take(kept) if deleted else base.copy()
+    positions = {row: position for position, row in enumerate(kept)}
+    for row in state["edited_rows"]:
+        if row in positions:
+            table.set_row(positions[row], edited_df.iloc[[positions[row]]].to_dict('records')[0])
+    for position in range(len(kept), len(edited_df)):
+        table.append_row(edited_df.iloc[[position]].to_dict('records')[0])
+    return table
+
+# Fonction pour les tables éditables avec persistance
+@profiler.timed()
 def create_editable_table(data, key):
-    # Récupérer les données sauvegardées
-    saved_table = saved_data.get(key, data)
-    df = pd.DataFrame(saved_table)
+    import pandas as pd
+    
+    # Le tableau de départ de l'éditeur est conservé dans la session : st.data_editor garde
+    # les modifications de l'utilisateur sous forme de delta par rapport à ce tableau
+    editors = st.session_state.setdefault('table_editors', {})
+    entry = editors.get(key)
+    saved_table = report_store.get(key)
+    if saved_table is None:
+        valid = entry is not None and entry["source"] is None and entry["default"] == data
+    else:
+        valid = entry is not None and (saved_table is entry["source"] or saved_table is entry["value"])
+    
+    if not valid:
+        # Nouveau tableau (premier affichage, import, réinitialisation) : repartir de zéro
+        df = pd.DataFrame(data if saved_table is None else saved_table)
+        if entry is not None:
+            st.session_state.pop(key, None)
+        entry = editors[key] = {
+            "source": saved_table,
+            "default": data if saved_table is None else None,
+            "frame": df,
+            "base": Table.from_frame(df),
+            "state": None,
+            "value": None,
+        }
+    elif entry["state"] is not None and key not in st.session_state:
+        # Éditeur masqué au dernier rerun (changement de page) : Streamlit a oublié son delta,
+        # repartir du tableau enregistré et non de l'ancien tableau de départ
+        entry["frame"] = pd.DataFrame(entry["value"])
+        entry["base"] = Table.from_frame(entry["frame"])
+        entry["state"] = None
     
     # Créer l'éditeur de données
-    edited_df = st.data_editor(df, key=key, num_rows="dynamic")
+    edited_df = st.data_editor(entry["frame"], key=key, num_rows="dynamic")
     
-    # Mettre à jour saved_data sans sauvegarder automatiquement
-    if not edited_df.equals(df):
-        saved_data[key] = edited_df.to_dict('records')
+    # Ne relire le tableau que si l'état d'édition a changé depuis le dernier rerun
+    state = editor_state_snapshot(st.session_state.get(key))
+    if state != entry["state"]:
+        entry["state"] = state
+        table = apply_editor_state(entry["base"], entry["frame"], edited_df, state) if state else entry["base"]
+        entry["value"] = table.to_json()
+        autosave(key, entry["value"])
+    
+    # Mettre à jour les données de la session (table au format colonnes) ; l'écriture sur disque est différée
+    if entry["value"] is not None:
+        report_store.set(key, entry["value"])
     
     return edited_df
 
+@profiler.timed()
 def create_expandable_table(title, data, key):
     with st.expander(title):
         return create_editable_table(data, key)
 
-# Fonction pour créer le tableau de comparaison des concurrents avec inputs
-def create_competitor_comparison_table(key):
-    # Définir les critères et concurrents par défaut - tous vides
-    default_criteres = ["", "", "", "", "", "", "", ""]
-    default_concurrents = ["", "", "", "", "", "", ""]
-    
-    # Récupérer les concurrents sauvegardés ou utiliser les valeurs par défaut
-    concurrents = []
-    for i in range(1, len(default_concurrents)+1):
-        comp_name = create_input(f"Nom du concurrent {i}", "", f"competitor_name_{i}")
-        concurrents.append(comp_name)
-    
-    # Valeurs par défaut du tableau
-    default_values = {
-        "Critères/Concurrents": default_criteres
-    }
-    
-    # Ajouter les valeurs par défaut pour chaque concurrent
-    for i, comp in enumerate(concurrents):
-        default_values[comp if comp else f"Concurrent {i+1}"] = ["", "", "", "", "", "", "", ""]
+# Stockage des images du rapport partagé entre les sessions (REPORT_IMAGES_PATH)
+@st.cache_resource
+def get_image_store():
+    return open_image_store()
+
+# Enregistre une image déposée une seule fois par fichier ; retourne son empreinte (None si refusée)
+def store_uploaded_image(uploaded_file, applied_key):
+    applied = st.session_state.setdefault(applied_key, set())
+    upload_key = uploaded_file_key(uploaded_file)
+    if upload_key in applied:
+        return None
+    applied.add(upload_key)
+    try:
+        return get_image_store().put(uploaded_file.getvalue())
+    except ImageError as e:
+        st.error(f"{uploaded_file.name} : {e}")
+        return None
+
+# Miniature d'une image : variante réduite pour l'écran, jamais l'original
+def show_image_thumbnail(container, digest, width=160, height=120):
+    try:
+        container.image(get_image_store().variant(digest, width, height, dpi=PREVIEW_DPI).path)
+    except (OSError, ValueError):
+        container.caption("Image introuvable")
+
+# Champ image (logo) : le rapport enregistre l'empreinte de l'image dans le stockage
+@profiler.timed()
+def create_image_input(label, key):
+    uploaded = st.file_uploader(label, type=IMAGE_TYPES, key=f"{key}_upload")
+    if uploaded is not None:
+        digest = store_uploaded_image(uploaded, f"{key}_applied")
+        if digest and digest != report_store.get(key):
+            autosave(key, digest)
+            report_store.set(key, digest)
+    
+    digest = report_store.get(key)
+    if digest:
+        col1, col2 = st.columns([1, 4])
+        show_image_thumbnail(col1, digest)
+        if col2.button("Retirer l'image", key=f"{key}_remove"):
+            autosave(key, "")
+            report_store.set(key, "")
+            st.rerun()
+    return digest
+
+# Galerie d'images avec légendes, enregistrée comme une table (Image, Légende)
+@profiler.timed()
+def create_image_gallery(label, key):
+    table = report_store.get(key) or {}
+    images = list(table.get("Image", []))
+    legendes = list(table.get("Légende", [""] * len(images)))
+    changed = False
+    
+    uploads = st.file_uploader(label, type=IMAGE_TYPES, accept_multiple_files=True, key=f"{key}_upload")
+    for uploaded in uploads or []:
+        digest = store_uploaded_image(uploaded, f"{key}_applied")
+        if digest and digest not in images:
+            images.append(digest)
+            legendes.append("")
+            changed = True
+    
+    removed = None
+    for i, digest in enumerate(images):
+        col1, col2, col3 = st.columns([1, 3, 1])
+        show_image_thumbnail(col1, digest)
+        legende = col2.text_input("Légende", value=legendes[i], key=f"{key}_legende_{digest}")
+        if legende != legendes[i]:
+            legendes[i] = legende
+            changed = True
+        if col3.button("Retirer", key=f"{key}_remove_{digest}"):
+            removed = i
+    if removed is not None:
+        del images[removed]
+        del legendes[removed]
+        changed = True
+    
+    # Nouvelle table à chaque modification : les valeurs enregistrées ne sont jamais modifiées sur place
+    if changed:
+        value = {"Image": images, "Légende": legendes}
+        autosave(key, value)
+        report_store.set(key, value)
+        if removed is not None:
+            st.rerun()
+    return images
+
+# Liste nommée (concurrents, critères) : chaque ligne garde un identifiant stable, les
+# cellules de la matrice comparative y font référence
+@profiler.timed()
+def create_id_list_editor(key, column, defaults):
+    import pandas as pd
+    
+    editors = st.session_state.setdefault('table_editors', {})
+    entry = editors.get(key)
+    saved = report_store.get(key)
+    if not (entry is not None and (saved is entry["source"] or (saved is not None and saved is entry["value"]))):
+        if entry is not None:
+            st.session_state.pop(key, None)
+        items = id_list(saved, column) if saved is not None else [(i + 1, name) for i, name in enumerate(defaults)]
+        entry = editors[key] = {
+            "source": saved,
+            "frame": pd.DataFrame({column: [name for _, name in items]}),
+            "base": items,
+            "items": items,
+            "state": None,
+            "value": None,
+        }
+    elif entry["state"] is not None and key not in st.session_state:
+        # Éditeur masqué au dernier rerun (changement de page) : repartir de la liste enregistrée
+        entry["frame"] = pd.DataFrame({column: [name for _, name in entry["items"]]})
+        entry["base"] = entry["items"]
+        entry["state"] = None
+    
+    st.data_editor(entry["frame"], key=key, num_rows="dynamic", hide_index=True)
+    
+    # Appliquer le delta de l'éditeur à la liste de départ : les lignes ajoutées reçoivent
+    # un nouvel identifiant, les autres gardent le leur
+    state = editor_state_snapshot(st.session_state.get(key))
+    if state != entry["state"]:
+        entry["state"] = state
+        items = list(entry["base"])
+        if state:
+            for row, changes in state["edited_rows"].items():
+                if row < len(items) and column in changes:
+                    items[row] = (items[row][0], changes[column] or "")
+            deleted = set(state["deleted_rows"])
+            items = [item for row, item in enumerate(items) if row not in deleted]
+            next_id = max((item_id for item_id, _ in entry["base"]), default=0) + 1
+            for row in state["added_rows"]:
+                items.append((next_id, row.get(column) or ""))
+                next_id += 1
+        entry["items"] = items
+        entry["value"] = id_list_to_json(items, column)
+        autosave(key, entry["value"])
+    
+    if entry["value"] is not None:
+        report_store.set(key, entry["value"])
+    return entry["items"]
+
+# Concurrents affichés à la fois dans l'éditeur de la matrice comparative
+MATRIX_EDITOR_COLUMNS = 10
+
+# Éditeur des cellules de la matrice comparative : seuls les concurrents affichés sont mis
+# en colonnes, et les cellules modifiées sont reportées dans le dictionnaire des cellules
+@profiler.timed()
+def create_matrix_editor(criteria, competitors, shown, criteres_column_name):
+    import pandas as pd
+    
+    editors = st.session_state.setdefault('table_editors', {})
+    entry = editors.get(COMPETITOR_CELLS_KEY)
+    saved = report_store.get(COMPETITOR_CELLS_KEY)
+    if entry is None or not (saved is entry["source"] or (saved is not None and saved is entry["value"])):
+        # Nouvelles cellules (premier affichage, import) : relire la table
+        entry = editors[COMPETITOR_CELLS_KEY] = {
+            "source": saved,
+            "value": None,
+            "cells": cells_from_json(saved),
+            "ids": None,
+            "layout": None,
+            "generation": entry["generation"] + 1 if entry is not None else 0,
+        }
+    
+    # Cellules d'un concurrent ou d'un critère supprimé : les retirer
+    ids = ({criterion_id for criterion_id, _ in criteria}, {competitor_id for competitor_id, _ in competitors})
+    if ids != entry["ids"]:
+        entry["ids"] = ids
+        cells = {cell: value for cell, value in entry["cells"].items() if cell[0] in ids[0] and cell[1] in ids[1]}
+        if len(cells) != len(entry["cells"]):
+            # Le tableau de départ aussi : une modification suivante repart de lui
+            entry["cells"] = entry["base"] = cells
+            entry["value"] = cells_to_json(cells)
+            autosave(COMPETITOR_CELLS_KEY, entry["value"])
+    
+    # Éditeur masqué au dernier rerun (changement de page) : son delta est perdu, le
+    # reconstruire à partir des cellules enregistrées
+    if entry.get("state") is not None and f"{COMPETITOR_CELLS_KEY}_{entry['generation']}" not in st.session_state:
+        entry["layout"] = None
+    
+    # Nouvelle disposition (critères, page, noms, titre) : nouveau tableau de départ et nouvel
+    # éditeur, le delta de l'ancien ne s'appliquant plus
+    layout = (tuple(criteria), tuple(shown), criteres_column_name)
+    if layout != entry["layout"]:
+        entry["layout"] = layout
+        entry["generation"] += 1
+        entry["base"] = entry["cells"]
+        entry["state"] = None
+        frame = {"critere": [name for _, name in criteria]}
+        for competitor_id, _ in shown:
+            frame[f"c{competitor_id}"] = [entry["cells"].get((criterion_id, competitor_id), "") for criterion_id, _ in criteria]
+        entry["frame"] = pd.DataFrame(frame)
+        entry["column_config"] = {"critere": st.column_config.TextColumn(criteres_column_name, disabled=True)}
+        positions = {competitor_id: position for position, (competitor_id, _) in enumerate(competitors)}
+        for competitor_id, name in shown:
+            entry["column_config"][f"c{competitor_id}"] = st.column_config.TextColumn(
+                name or f"Concurrent {positions[competitor_id] + 1}"
+            )
     
-    # Récupérer les données sauvegardées ou utiliser les valeurs par défaut
-    saved_table = saved_data.get(key, default_values)
+    editor_key = f"{COMPETITOR_CELLS_KEY}_{entry['generation']}"
+    st.data_editor(
+        entry["frame"],
+        key=editor_key,
+        column_config=entry["column_config"],
+        hide_index=True,
+        height=400
+    )
     
-    # Permettre la modification du titre de la colonne "Critères/Concurrents"
+    # Reporter les cellules modifiées depuis le tableau de départ ; une cellule vidée est retirée
+    state = editor_state_snapshot(st.session_state.get(editor_key))
+    if state != entry["state"]:
+        entry["state"] = state
+        cells = dict(entry["base"])
+        for row, changes in (state["edited_rows"] if state else {}).items():
+            criterion_id = criteria[row][0]
+            for column, value in changes.items():
+                cell = (criterion_id, int(column[1:]))
+                if value in ("", None):
+                    cells.pop(cell, None)
+                else:
+                    cells[cell] = value
+        entry["cells"] = cells
+        entry["value"] = cells_to_json(cells)
+        autosave(COMPETITOR_CELLS_KEY, entry["value"])
+    
+    if entry["value"] is not None:
+        report_store.set(COMPETITOR_CELLS_KEY, entry["value"])
+        # Premières cellules saisies : enregistrer aussi les listes par défaut, dont elles
+        # utilisent les identifiants
+        for key, items, column in ((COMPETITOR_CRITERIA_KEY, criteria, "Critère"), (COMPETITOR_LIST_KEY, competitors, "Concurrent")):
+            if key not in report_store:
+                value = id_list_to_json(items, column)
+                autosave(key, value)
+                report_store.set(key, value)
+
+# Matrice comparative détaillée des concurrents : listes des concurrents et des critères,
+# puis cellules, enregistrées séparément (seules les cellules remplies sont conservées)
+@profiler.timed()
+def create_competitor_comparison_table():
+    # Permettre la modification du titre de la colonne des critères
     criteres_column_name = create_input("Titre de la colonne des critères", "Critères/Concurrents", "criteres_column_name")
     
-    # Mettre à jour le nom de la colonne dans les données sauvegardées
-    if "Critères/Concurrents" in saved_table and criteres_column_name != "Critères/Concurrents":
-        saved_table[criteres_column_name] = saved_table.pop("Critères/Concurrents")
-    
-    # Créer le dataframe
-    df = pd.DataFrame(saved_table)
-    
-    # Utiliser le nouveau nom de colonne pour l'index
-    if criteres_column_name in df.columns:
-        df = df.set_index(criteres_column_name)
-    else:
-        # Si le nom personnalisé n'est pas trouvé, utiliser la première colonne comme index
-        df = df.set_index(df.columns[0])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Concurrents**")
+        competitors = create_id_list_editor(COMPETITOR_LIST_KEY, "Concurrent", [""] * 7)
+    with col2:
+        st.write("**Critères**")
+        criteria = create_id_list_editor(COMPETITOR_CRITERIA_KEY, "Critère", [""] * 8)
     
-    # Permettre l'édition des valeurs du tableau
     st.write("### Tableau Comparatif Détaillé des Concurrents")
     st.write("Modifiez les valeurs en cliquant dessus (+ : présent, - : absent, T : partiellement présent)")
     
-    edited_df = st.data_editor(
-        df, 
-        key=key,
-        height=400,
-        use_container_width=True
-    )
-    
-    # Mettre à jour saved_data sans sauvegarder automatiquement
-    if not edited_df.equals(df):
-        # Ajouter la colonne d'index comme une colonne normale pour la sauvegarde
-        edited_df_save = edited_df.reset_index()
-        
-        # Renommer la colonne d'index si nécessaire
-        if edited_df_save.columns[0] != criteres_column_name:
-            edited_df_save = edited_df_save.rename(columns={edited_df_save.columns[0]: criteres_column_name})
-        
-        saved_data[key] = edited_df_save.to_dict('list')
-    
-    # Mettre à jour le nom de la colonne des critères sans sauvegarde automatique
-    saved_data["criteres_column_name"] = criteres_column_name
+    # Au-delà de MATRIX_EDITOR_COLUMNS concurrents, l'éditeur en affiche une page à la fois
+    shown = competitors
+    if len(competitors) > MATRIX_EDITOR_COLUMNS:
+        pages = range(0, len(competitors), MATRIX_EDITOR_COLUMNS)
+        start = st.selectbox(
+            "Concurrents affichés",
+            pages,
+            format_func=lambda start: f"{start + 1} à {min(start + MATRIX_EDITOR_COLUMNS, len(competitors))} sur {len(competitors)}",
+            key="competitor_matrix_page"
+        )
+        shown = competitors[start:start + MATRIX_EDITOR_COLUMNS]
+    create_matrix_editor(criteria, competitors, shown, criteres_column_name or "Critères")
     
     # Afficher la légende
     st.write("**Légende :**")
@@ -179,10 +526,9 @@ def create_competitor_comparison_table(key):
         st.write("• - : Service absent")
     with col3:
         st.write("• T : Service partiellement présent")
-    
-    return edited_df, criteres_column_name, concurrents
 
 # Fonction pour créer le Business Model Canvas avec inputs
+@profiler.timed()
 def create_business_model_canvas(key_prefix):
     st.write("## Business Model Canvas")
     
@@ -304,1238 +650,141 @@ def create_business_model_canvas(key_prefix):
                             text_area=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-def generate_pdf():
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=52, leftMargin=52, topMargin=52, bottomMargin=18)
-    story = []
-    
-    # Convertir les données de tableau de format "records" au format "colonnes" attendu
-    def convert_table_format(table_key):
-        if table_key in saved_data and isinstance(saved_data[table_key], list):
-            # Si les données sont au format liste de dictionnaires (format 'records')
-            records = saved_data[table_key]
-            
-            # Convertir en dictionnaire de listes (format 'columns')
-            columns_dict = {}
-            if records:
-                # Initialiser toutes les colonnes possibles
-                for record in records:
-                    for key in record.keys():
-                        if key not in columns_dict:
-                            columns_dict[key] = []
-                
-                # Remplir avec les valeurs
-                for column in columns_dict.keys():
-                    for record in records:
-                        if column in record:
-                            columns_dict[column].append(record[column])
-                        else:
-                            columns_dict[column].append("")  # Valeur par défaut si manquante
-                
-                # Remplacer par le nouveau format
-                saved_data[table_key] = columns_dict
-    
-    # Convertir toutes les tables nécessaires
-    tables_to_convert = [
-        'marche_cibles_table', 
-        'marche_swot_table', 
-        'marche_marketing_table',
-        'marche_concurrents_table',
-        'marche_comparison_table',
-        'marche_matrice_table',
-        'competitors_comparison_table',
-        'modele_partenaires',
-        'modele_activites',
-        'modele_proposition',
-        'modele_relations',
-        'modele_segments',
-        'modele_ressources',
-        'modele_couts',
-        'modele_canaux',
-        'modele_revenus',
-        'projections_table'
+# Tableau en markdown : un simple récapitulatif n'a pas besoin de charger pandas
+def markdown_table(columns):
+    def cell(value):
+        return str(value).replace("|", "\\|").replace("\n", " ")
+    
+    headers = list(columns.keys())
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "|" + " --- |" * len(headers)
     ]
-    
-    for table_key in tables_to_convert:
-        convert_table_format(table_key)
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=12
-    )
-    heading1_style = ParagraphStyle(
-        'Heading1',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=10
-    )
-    heading2_style = ParagraphStyle(
-        'Heading2',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=8
-    )
-    normal_style = styles['Normal']
-    
-    # Crée un style pour les en-têtes verticaux des colonnes
-    header_style = ParagraphStyle(
-        'Header',
-        parent=normal_style,
-        fontSize=8,
-        alignment=TA_CENTER,
+    for row in zip(*columns.values()):
+        lines.append("| " + " | ".join(cell(value) for value in row) + " |")
+    return "\n".join(lines)
+
+# Fonction de rendu avec ses paramètres ; PDF_PROFILE=1 : journaliser le temps de mise en
+# page par section et par type de flowable, en arrière-plan comme pour un rendu immédiat
+def pdf_renderer(render, **kwargs):
+    render = functools.partial(render, **kwargs)
+    if os.environ.get("PDF_PROFILE") == "1":
+        from pdf_profile import profiled
+        return functools.partial(profiled, render)
+    return render
+
+# Génère le PDF à partir des données de la session dans un fichier du spool et
+# retourne son chemin (à supprimer par l'appelant) ; sections limite le rendu
+@profiler.timed()
+def generate_pdf(sections=None):
+    import report_pdf
+    
+    # Cache des sections conservé dans la session entre deux générations
+    if 'pdf_section_cache' not in st.session_state:
+        st.session_state.pdf_section_cache = {}
+    
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=get_pdf_job_manager().spool_dir)
+    os.close(fd)
+    render = pdf_renderer(
+        report_pdf.generate_pdf_file,
+        section_cache=st.session_state.pdf_section_cache,
+        pdf_cache=get_pdf_cache(),
+        sections=sections
     )
-    
-    # Fonction pour créer un tableau avec des paragraphes pour le contenu cellulaire
-    def create_styled_table(data, colWidths, style_commands=None):
-        # Convertir le contenu des cellules en paragraphes pour un meilleur rendu
-        processed_data = []
-        for row in data:
-            processed_row = []
-            for cell in row:
-                if isinstance(cell, str):
-                    processed_row.append(Paragraph(cell, normal_style))
-                else:
-                    processed_row.append(cell)
-            processed_data.append(processed_row)
-        
-        # Créer le tableau avec les données formatées
-        table = Table(processed_data, colWidths=colWidths)
-        
-        # Appliquer le style par défaut
-        default_style = [
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # Centre tout le contenu par défaut
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ]
-        
-        # Ajouter les commandes de style personnalisées
-        if style_commands:
-            default_style.extend(style_commands)
-        
-        table.setStyle(TableStyle(default_style))
-        return table
-    
-    # Titre principal
-    story.append(Paragraph(saved_data.get('projet_titre', "Rapport"), title_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Présentation du projet
-    story.append(Paragraph("PRÉSENTATION DU PROJET", heading1_style))
-    
-    # Description du projet
-    story.append(Paragraph("1. Description du Projet", heading2_style))
-    story.append(Paragraph(f"<b>Problématique :</b> {saved_data.get('pres_prob', '')}", normal_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    # Processez les retours à la ligne pour les champs texte
-    solution_lines = saved_data.get('pres_solution', '').split('\n')
-    story.append(Paragraph("<b>Solution proposée :</b>", normal_style))
-    for line in solution_lines:
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Fiche d'identité
-    story.append(Paragraph("2. Fiche d'Identité", heading2_style))
-    identity_data = [
-        ["Information", "Détail"],
-        ["Raison sociale", saved_data.get('ident_rs', '')],
-        ["Slogan", saved_data.get('ident_slogan', '')],
-        ["Objet social", saved_data.get('ident_objet_social', '')],
-        ["Domaines d'activité", saved_data.get('ident_domaines', '')],
-        ["Siège social", saved_data.get('ident_siege', '')],
-        ["Forme juridique", saved_data.get('ident_forme', '')],
-        ["Nombre d'associés", saved_data.get('ident_associes', '')],
-        ["Valeurs", saved_data.get('ident_valeurs', '')]
-    ]
-    
-    identity_table = create_styled_table(
-        identity_data, 
-        colWidths=[doc.width/3.0, doc.width*2/3.0],
-        style_commands=[('ALIGN', (0, 0), (0, -1), 'LEFT')]  # Aligner la première colonne à gauche
+    render(report_store.snapshot(), path)
+    return path
+
+# Cache des PDF partagé entre les sessions ; PDF_CACHE_DIR active le niveau disque
+@st.cache_resource
+def get_pdf_cache():
+    return PdfCache(cache_dir=os.environ.get("PDF_CACHE_DIR"))
+
+# Alimente le cache des PDF avec un fichier rendu dans un processus du pool
+def cache_pdf_file(pdf_cache, cache_key, path):
+    with open(path, "rb") as f:
+        pdf_cache.put_file(cache_key, f)
+
+# Pool de génération partagé entre les sessions et conservé entre les reruns
+@st.cache_resource
+# PDF_WORKER_MODE=process rend les PDF dans des processus séparés plutôt que des threads ;
+# les PDF sont écrits dans PDF_SPOOL_DIR (dossier temporaire par défaut), pas gardés en mémoire,
+# et oubliés PDF_KEEP_SECONDS après le dernier affichage de la session
+def get_pdf_job_manager():
+    return PdfJobManager(
+        max_workers=int(os.environ.get("PDF_WORKERS", "2")),
+        keep_seconds=float(os.environ.get("PDF_KEEP_SECONDS", "3600")),
+        use_processes=os.environ.get("PDF_WORKER_MODE") == "process",
+        spool_dir=os.environ.get("PDF_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "report-app-pdf")
     )
-    story.append(identity_table)
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Objectifs et Vision
-    story.append(Paragraph("3. Objectifs et Vision", heading2_style))
-    story.append(Paragraph("<b>Objectifs Principaux :</b>", normal_style))
-    for line in saved_data.get('pres_objectifs', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph("<b>Objectifs de Développement Durable :</b>", normal_style))
-    for line in saved_data.get('pres_odd', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph(f"<b>Mission :</b> {saved_data.get('pres_mission', '')}", normal_style))
-    story.append(Paragraph(f"<b>Vision :</b> {saved_data.get('pres_vision', '')}", normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Réalisations
-    story.append(Paragraph("4. Réalisations Accomplies", heading2_style))
-    for line in saved_data.get('pres_realisations', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Analyse de Marché
-    story.append(Paragraph("ANALYSE DE MARCHÉ", heading1_style))
-    
-    # Tendances
-    story.append(Paragraph("1. Tendances du Marché", heading2_style))
-    for line in saved_data.get('marche_tendances', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Cibles Principales
-    story.append(Paragraph("2. Cibles Principales", heading2_style))
-    if 'marche_cibles_table' in saved_data and isinstance(saved_data['marche_cibles_table'], dict):
-        segments = saved_data['marche_cibles_table'].get('Segment', [])
-        benefices = saved_data['marche_cibles_table'].get('Bénéfices', [])
-        
-        if segments and benefices:
-            cibles_data = [["Segment", "Bénéfices"]]
-            for i in range(min(len(segments), len(benefices))):
-                cibles_data.append([segments[i], benefices[i]])
-            
-            cibles_table = create_styled_table(
-                cibles_data, 
-                colWidths=[doc.width/2.0, doc.width/2.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(cibles_table)
-        else:
-            # Table vide en cas de données manquantes
-            default_cibles_data = [
-                ["Segment", "Bénéfices"],
-                ["", ""],
-                ["", ""]
-            ]
-            cibles_table = create_styled_table(
-                default_cibles_data,
-                colWidths=[doc.width/2.0, doc.width/2.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(cibles_table)
-    else:
-        # Table vide en cas de données manquantes
-        default_cibles_data = [
-            ["Segment", "Bénéfices"],
-            ["", ""],
-            ["", ""]
-        ]
-        cibles_table = create_styled_table(
-            default_cibles_data,
-            colWidths=[doc.width/2.0, doc.width/2.0],
-            style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-        )
-        story.append(cibles_table)
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # SWOT - Utiliser les données remplies par l'utilisateur dans Streamlit
-    story.append(Paragraph("3. Analyse SWOT", heading2_style))
-    
-    # Vérifier si les données SWOT existent et sont utilisables
-    if 'marche_swot_table' in saved_data:
-        swot_data = None
-        
-        # Cas 1: Format dictionnaire
-        if isinstance(saved_data['marche_swot_table'], dict):
-            categories = saved_data['marche_swot_table'].get('Catégorie', [])
-            points = saved_data['marche_swot_table'].get('Points', [])
-            
-            if categories and points and len(categories) > 0 and len(points) > 0:
-                swot_data = [["Catégorie", "Points"]]
-                for i in range(min(len(categories), len(points))):
-                    swot_data.append([categories[i], points[i]])
-        
-        # Si on a réussi à récupérer des données, créer le tableau
-        if swot_data and len(swot_data) > 1:
-            swot_table = create_styled_table(
-                swot_data,
-                colWidths=[doc.width/3.0, doc.width*2/3.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(swot_table)
-        else:
-            # Table vide en cas de données manquantes
-            default_swot_data = [
-                ["Catégorie", "Points"],
-                ["Forces", ""],
-                ["Faiblesses", ""],
-                ["Opportunités", ""],
-                ["Menaces", ""]
-            ]
-            swot_table = create_styled_table(
-                default_swot_data,
-                colWidths=[doc.width/3.0, doc.width*2/3.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(swot_table)
-    else:
-        # Table vide en cas de données manquantes
-        default_swot_data = [
-            ["Catégorie", "Points"],
-            ["Forces", ""],
-            ["Faiblesses", ""],
-            ["Opportunités", ""],
-            ["Menaces", ""]
-        ]
-        swot_table = create_styled_table(
-            default_swot_data,
-            colWidths=[doc.width/3.0, doc.width*2/3.0],
-            style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-        )
-        story.append(swot_table)
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Marketing Mix
-    story.append(Paragraph("4. Marketing Mix (4P)", heading2_style))
-    if 'marche_marketing_table' in saved_data and isinstance(saved_data['marche_marketing_table'], dict):
-        elements = saved_data['marche_marketing_table'].get('Élément', [])
-        strategies = saved_data['marche_marketing_table'].get('Stratégie', [])
-        
-        if elements and strategies:
-            marketing_data = [["Élément", "Stratégie"]]
-            for i in range(min(len(elements), len(strategies))):
-                marketing_data.append([elements[i], strategies[i]])
-            
-            marketing_table = create_styled_table(
-                marketing_data, 
-                colWidths=[doc.width/3.0, doc.width*2/3.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(marketing_table)
-        else:
-            # Table vide en cas de données manquantes
-            default_marketing_data = [
-                ["Élément", "Stratégie"],
-                ["Produit", ""],
-                ["Prix", ""],
-                ["Place", ""],
-                ["Promotion", ""]
-            ]
-            marketing_table = create_styled_table(
-                default_marketing_data,
-                colWidths=[doc.width/3.0, doc.width*2/3.0],
-                style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-            )
-            story.append(marketing_table)
-    else:
-        # Table vide en cas de données manquantes
-        default_marketing_data = [
-            ["Élément", "Stratégie"],
-            ["Produit", ""],
-            ["Prix", ""],
-            ["Place", ""],
-            ["Promotion", ""]
-        ]
-        marketing_table = create_styled_table(
-            default_marketing_data,
-            colWidths=[doc.width/3.0, doc.width*2/3.0],
-            style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
-        )
-        story.append(marketing_table)
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Analyse Concurrentielle
-    story.append(Paragraph("5. Analyse Concurrentielle", heading2_style))
-    story.append(Paragraph("Tableau Comparatif des Concurrents", styles['Heading3']))
-    if 'marche_concurrents_table' in saved_data and isinstance(saved_data['marche_concurrents_table'], dict):
-        types = saved_data['marche_concurrents_table'].get('Type', [])
-        noms = saved_data['marche_concurrents_table'].get('Nom', [])
-        locs = saved_data['marche_concurrents_table'].get('Localisation', [])
-        descs = saved_data['marche_concurrents_table'].get('Description', [])
-        
-        if types and noms and locs and descs:
-            concurrents_data = [["Type", "Nom", "Localisation", "Description"]]
-            for i in range(min(len(types), len(noms), len(locs), len(descs))):
-                concurrents_data.append([types[i], noms[i], locs[i], descs[i]])
-            
-            # Une table plus compacte pour les concurrents
-            concurrents_table = create_styled_table(
-                concurrents_data, 
-                colWidths=[doc.width/6.0, doc.width/6.0, doc.width/6.0, doc.width/2.0],
-                style_commands=[
-                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),  # Aligner tout le contenu à gauche
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                ]
-            )
-            story.append(concurrents_table)
-        else:
-            # Table vide en cas de données manquantes
-            default_concurrents_data = [
-                ["Type", "Nom", "Localisation", "Description"],
-                ["", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""]
-            ]
-            concurrents_table = create_styled_table(
-                default_concurrents_data, 
-                colWidths=[doc.width/6.0, doc.width/6.0, doc.width/6.0, doc.width/2.0],
-                style_commands=[
-                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                ]
-            )
-            story.append(concurrents_table)
-    else:
-        # Table vide en cas de données manquantes
-        default_concurrents_data = [
-            ["Type", "Nom", "Localisation", "Description"],
-            ["", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""]
-        ]
-        concurrents_table = create_styled_table(
-            default_concurrents_data, 
-            colWidths=[doc.width/6.0, doc.width/6.0, doc.width/6.0, doc.width/2.0],
-            style_commands=[
-                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-            ]
-        )
-        story.append(concurrents_table)
-    
-    # Tableau Comparatif Détaillé des Concurrents
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph("Tableau Comparatif Détaillé des Concurrents", styles['Heading3']))
-    
-    if 'competitors_comparison_table' in saved_data:
-        # Récupérer le nom personnalisé de la colonne des critères
-        criteres_column_name = saved_data.get("criteres_column_name", "Critères/Concurrents")
-        
-        # Récupérer les critères
-        if isinstance(saved_data['competitors_comparison_table'], dict):
-            criteres = saved_data['competitors_comparison_table'].get(criteres_column_name, [])
-            if not criteres:
-                criteres = saved_data['competitors_comparison_table'].get('Critères/Concurrents', [])
-                
-            # Récupérer les noms des concurrents
-            competitor_names = []
-            for i in range(1, 8):  # Max 7 concurrents
-                comp_name = saved_data.get(f"competitor_name_{i}", "")
-                if comp_name:
-                    competitor_names.append(comp_name)
-            
-            # Préparer les données du tableau
-            if criteres:
-                # Créer des en-têtes horizontaux au lieu de verticaux
-                competitors_data = [[criteres_column_name] + competitor_names]
-                
-                for i, critere in enumerate(criteres):
-                    row = [critere]
-                    for comp in competitor_names:
-                        values = saved_data['competitors_comparison_table'].get(comp, [])
-                        if i < len(values):
-                            row.append(values[i])
-                        else:
-                            row.append("")
-                    competitors_data.append(row)
-                
-                # Créer un tableau adapté avec des colonnes adaptées
-                col_widths = [doc.width/3.0]  # Première colonne plus large
-                col_widths.extend([doc.width/(3.0*len(competitor_names))]*len(competitor_names))  # Colonnes des concurrents 
-                
-                # Créer le tableau
-                comp_table = create_styled_table(
-                    competitors_data,
-                    colWidths=col_widths,
-                    style_commands=[
-                        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Aligner première colonne à gauche
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),  
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4), 
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),   
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4) 
-                    ]
-                )
-                story.append(comp_table)
-                
-                # Ajouter la légende
-                story.append(Spacer(1, 0.1*inch))
-                story.append(Paragraph("<b>Légende :</b>", normal_style))
-                story.append(Paragraph("• + : Service présent", normal_style))
-                story.append(Paragraph("• - : Service absent", normal_style))
-                story.append(Paragraph("• T : Service partiellement présent", normal_style))
-            else:
-                # Table vide en cas de données manquantes
-                default_comp_data = [
-                    ["Critère", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""]
-                ]
-                comp_table = create_styled_table(
-                    default_comp_data,
-                    colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-                    style_commands=[
-                        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                    ]
-                )
-                story.append(comp_table)
-                
-                # Ajouter la légende
-                story.append(Spacer(1, 0.1*inch))
-                story.append(Paragraph("<b>Légende :</b>", normal_style))
-                story.append(Paragraph("• + : Service présent", normal_style))
-                story.append(Paragraph("• - : Service absent", normal_style))
-                story.append(Paragraph("• T : Service partiellement présent", normal_style))
-        else:
-            # Table vide en cas de données manquantes
-            default_comp_data = [
-                ["Critère", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""]
-            ]
-            comp_table = create_styled_table(
-                default_comp_data,
-                colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-                style_commands=[
-                    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                ]
-            )
-            story.append(comp_table)
-            
-            # Ajouter la légende
-            story.append(Spacer(1, 0.1*inch))
-            story.append(Paragraph("<b>Légende :</b>", normal_style))
-            story.append(Paragraph("• + : Service présent", normal_style))
-            story.append(Paragraph("• - : Service absent", normal_style))
-            story.append(Paragraph("• T : Service partiellement présent", normal_style))
-    else:
-        # Table vide en cas de données manquantes
-        default_comp_data = [
-            ["Critère", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""]
-        ]
-        comp_table = create_styled_table(
-            default_comp_data,
-            colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-            style_commands=[
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-            ]
+
+# Streamlit récent accepte une fonction comme contenu d'un bouton de téléchargement :
+# elle n'est appelée qu'au clic, le PDF n'est donc pas recopié en mémoire à chaque rerun
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, "add_deferred")
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+def read_file(open_file):
+    with open_file() as f:
+        return f.read()
+
+# Bouton de téléchargement servi depuis le fichier ouvert par open_file() (le PDF par défaut)
+def download_file_button(container, open_file, label="⬇️ Télécharger le PDF", file_name="rapport.pdf",
+                         mime="application/pdf", deferred=DEFERRED_DOWNLOADS):
+    if deferred:
+        container.download_button(
+            label=label,
+            data=functools.partial(read_file, open_file),
+            file_name=file_name,
+            mime=mime
         )
-        story.append(comp_table)
-        
-        # Ajouter la légende
-        story.append(Spacer(1, 0.1*inch))
-        story.append(Paragraph("<b>Légende :</b>", normal_style))
-        story.append(Paragraph("• + : Service présent", normal_style))
-        story.append(Paragraph("• - : Service absent", normal_style))
-        story.append(Paragraph("• T : Service partiellement présent", normal_style))
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Ajout de la comparaison des fonctionnalités clés
-    story.append(Paragraph("Comparaison des Fonctionnalités Clés", styles['Heading3']))
-    if 'marche_comparison_table' in saved_data:
-        if isinstance(saved_data['marche_comparison_table'], dict):
-            criteres = saved_data['marche_comparison_table'].get('Critères', [])
-            
-            if criteres:
-                # Obtenir tous les noms de concurrents (toutes les colonnes sauf 'Critères')
-                concurrents_noms = [col for col in saved_data['marche_comparison_table'].keys() if col != 'Critères']
-                
-                # Créer l'entête
-                header = ["Critères"] + concurrents_noms
-                comp_data = [header]
-                
-                # Ajouter les lignes
-                for i, critere in enumerate(criteres):
-                    row = [critere]
-                    for concurrent in concurrents_noms:
-                        values = saved_data['marche_comparison_table'].get(concurrent, [])
-                        if i < len(values):
-                            row.append(values[i])
-                        else:
-                            row.append("")
-                    comp_data.append(row)
-                
-                # Créer le tableau
-                comp_func_table = create_styled_table(
-                    comp_data, 
-                    colWidths=[doc.width/(len(header))] * len(header),
-                    style_commands=[
-                        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                    ]
-                )
-                story.append(comp_func_table)
-            else:
-                # Table vide en cas de données manquantes
-                default_comp_func_data = [
-                    ["Fonctionnalité", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""]
-                ]
-                comp_func_table = create_styled_table(
-                    default_comp_func_data,
-                    colWidths=[doc.width/4.0] * 4,
-                    style_commands=[
-                        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                    ]
-                )
-                story.append(comp_func_table)
-        else:
-            # Table vide en cas de données manquantes
-            default_comp_func_data = [
-                ["Fonctionnalité", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""]
-            ]
-            comp_func_table = create_styled_table(
-                default_comp_func_data,
-                colWidths=[doc.width/4.0] * 4,
-                style_commands=[
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                ]
-            )
-            story.append(comp_func_table)
-    else:
-        # Table vide en cas de données manquantes
-        default_comp_func_data = [
-            ["Fonctionnalité", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""]
-        ]
-        comp_func_table = create_styled_table(
-            default_comp_func_data,
-            colWidths=[doc.width/4.0] * 4,
-            style_commands=[
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-            ]
+        return
+    with open_file() as f:
+        container.download_button(
+            label=label,
+            data=f,
+            file_name=file_name,
+            mime=mime
         )
-        story.append(comp_func_table)
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Analyse Comparative
-    story.append(Paragraph("Analyse Comparative", styles['Heading3']))
-    for line in saved_data.get('marche_analyse', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Matrice de Comparaison
-    story.append(Paragraph("Matrice de Comparaison", styles['Heading3']))
-    
-    # Utiliser uniquement les données de marche_matrice_table
-    if 'marche_matrice_table' in saved_data:
-        if isinstance(saved_data['marche_matrice_table'], dict):
-            criteres = saved_data['marche_matrice_table'].get('Critère', [])
-            
-            if criteres:
-                # Obtenir tous les noms de concurrents (toutes les colonnes sauf 'Critère')
-                concurrents_mat = [col for col in saved_data['marche_matrice_table'].keys() if col != 'Critère']
-                
-                # Créer l'entête
-                header = ["Critère"] + concurrents_mat
-                matrice_data = [header]
-                
-                # Ajouter les lignes
-                for i, critere in enumerate(criteres):
-                    row = [critere]
-                    for concurrent in concurrents_mat:
-                        values = saved_data['marche_matrice_table'].get(concurrent, [])
-                        if i < len(values):
-                            row.append(values[i])
-                        else:
-                            row.append("")
-                    matrice_data.append(row)
-                
-                # Créer le tableau
-                if len(header) > 0:
-                    col_widths = [doc.width/3.0]  # Première colonne plus large
-                    if len(header) > 1:
-                        col_widths.extend([doc.width/(3.0*(len(header)-1))]*len(concurrents_mat))
-                    
-                    matrice_table = create_styled_table(
-                        matrice_data,
-                        colWidths=col_widths,
-                        style_commands=[
-                            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                            ('TOPPADDING', (0, 0), (-1, -1), 4),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                        ]
-                    )
-                    story.append(matrice_table)
-                else:
-                    # Table vide en cas de données manquantes
-                    default_matrice_data = [
-                        ["Critère", "", "", ""],
-                        ["", "", "", ""],
-                        ["", "", "", ""],
-                        ["", "", "", ""]
-                    ]
-                    matrice_table = create_styled_table(
-                        default_matrice_data,
-                        colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-                        style_commands=[
-                            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                            ('TOPPADDING', (0, 0), (-1, -1), 4),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                        ]
-                    )
-                    story.append(matrice_table)
-            else:
-                # Table vide en cas de données manquantes
-                default_matrice_data = [
-                    ["Critère", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""],
-                    ["", "", "", ""]
-                ]
-                matrice_table = create_styled_table(
-                    default_matrice_data,
-                    colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-                    style_commands=[
-                        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                    ]
-                )
-                story.append(matrice_table)
+
+# Affiche l'avancement du travail PDF de la session et le bouton de téléchargement
+@profiler.timed()
+def show_pdf_job():
+    manager = get_pdf_job_manager()
+    job = manager.get(st.session_state.get('pdf_job_id'))
+    if job is None:
+        return
+    
+    if job.status == TERMINE:
+        if job.available:
+            download_file_button(st, job.open)
         else:
-            # Table vide en cas de données manquantes
-            default_matrice_data = [
-                ["Critère", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""],
-                ["", "", "", ""]
-            ]
-            matrice_table = create_styled_table(
-                default_matrice_data,
-                colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-                style_commands=[
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                ]
-            )
-            story.append(matrice_table)
+            # Fichier du spool supprimé entre-temps : le PDF ne peut plus être téléchargé
+            manager.discard(job.id)
+            st.session_state.pop('pdf_job_id', None)
+            st.warning("Le PDF n'est plus disponible : générez-le à nouveau.")
+    elif job.status == ERREUR:
+        st.error(f"Erreur lors de la génération du PDF: {job.error}")
     else:
-        # Table vide en cas de données manquantes
-        default_matrice_data = [
-            ["Critère", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""],
-            ["", "", "", ""]
-        ]
-        matrice_table = create_styled_table(
-            default_matrice_data,
-            colWidths=[doc.width/2.0, doc.width/6.0, doc.width/6.0, doc.width/6.0],
-            style_commands=[
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-            ]
-        )
-        story.append(matrice_table)
+        st.progress(job.fraction, text=f"PDF {job.status} : {job.sections_done}/{job.sections_total} sections, {job.pages} page(s)")
 
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Business Model Canvas
-    story.append(Paragraph("Business Model Canvas", heading2_style))
-    
-    # Créer une représentation visuelle du BMC selon l'image partagée
-    bmc_colors = {
-        "partenaires": "#ffadb9",    # Rose
-        "activites": "#b388ff",      # Violet
-        "proposition": "#81c784",     # Vert
-        "relations": "#ffb74d",      # Orange
-        "segments": "#4fc3f7",       # Bleu
-        "ressources": "#b388ff",     # Violet
-        "canaux": "#ffb74d",         # Orange
-        "couts": "#ffd54f",          # Jaune
-        "revenus": "#b388ff"         # Violet
-    }
-    
-    # Définir les styles pour les titres et le contenu du BMC
-    bmc_title_style = ParagraphStyle(
-        'BMC_Title',
-        parent=styles['Heading3'],
-        alignment=TA_CENTER,
-        fontSize=12,
-        leading=14,
-        spaceAfter=6,
-        backColor=colors.white,
-    )
-    
-    bmc_content_style = ParagraphStyle(
-        'BMC_Content',
-        parent=styles['Normal'],
-        fontSize=9,
-        leading=12,
-        spaceBefore=0,
-    )
-    
-    # Construire le tableau du BMC
-    # Première rangée: Partenaires, Activités, Proposition, Relations, Segments
-    top_row_data = [
-        [
-            # Partenaires Clés
-            [Paragraph("<b>Partenaires Clés</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_partenaires', '').split('\n') if line.strip()],
-            
-            # Activités Clés
-            [Paragraph("<b>Activités Clés</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_activites', '').split('\n') if line.strip()],
-            
-            # Proposition de Valeur
-            [Paragraph("<b>Proposition de Valeur</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_proposition', '').split('\n') if line.strip()],
-            
-            # Relations avec les Clients
-            [Paragraph("<b>Relations avec les Clients</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_relations', '').split('\n') if line.strip()],
-            
-            # Segments de Clientèle
-            [Paragraph("<b>Segments de Clientèle</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_segments', '').split('\n') if line.strip()],
-        ]
-    ]
-    
-    # Deuxième rangée: vide, Ressources, vide, Canaux, vide
-    middle_row_data = [
-        [
-            # Vide (continuation de Partenaires)
-            [],
-            
-            # Ressources Clés
-            [Paragraph("<b>Ressources Clés</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_ressources', '').split('\n') if line.strip()],
-            
-            # Vide (continuation de Proposition)
-            [],
-            
-            # Canaux
-            [Paragraph("<b>Canaux</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_canaux', '').split('\n') if line.strip()],
-            
-            # Vide (continuation de Segments)
-            [],
-        ]
-    ]
-    
-    # Troisième rangée: Structure de Coûts, vide, vide, vide, Sources de Revenus
-    bottom_row_data = [
-        [
-            # Structure de Coûts (s'étend sur 2 colonnes)
-            [Paragraph("<b>Structure de Coûts</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_couts', '').split('\n') if line.strip()],
-            
-            # Sources de Revenus (s'étend sur 3 colonnes)
-            [Paragraph("<b>Sources de Revenus</b>", bmc_title_style)] + 
-            [Paragraph(line, bmc_content_style) for line in saved_data.get('bmc_revenus', '').split('\n') if line.strip()],
-        ]
-    ]
-    
-    try:
-        # Créer les tableaux pour chaque rangée
-        top_table = Table(top_row_data, colWidths=[doc.width/5.0]*5)         
-        middle_table = Table(middle_row_data, colWidths=[doc.width/5.0]*5)
-        bottom_table = Table(bottom_row_data, colWidths=[doc.width/2.0, doc.width/2.0])
-        
-        # Appliquer le style aux tableaux
-        top_table.setStyle(TableStyle([
-            # Partenaires Clés
-            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(bmc_colors['partenaires'])),
-            ('VALIGN', (0, 0), (0, 0), 'TOP'),
-            
-            # Activités Clés
-            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(bmc_colors['activites'])),
-            ('VALIGN', (1, 0), (1, 0), 'TOP'),
-            
-            # Proposition de Valeur
-            ('BACKGROUND', (2, 0), (2, 0), colors.HexColor(bmc_colors['proposition'])),
-            ('VALIGN', (2, 0), (2, 0), 'TOP'),
-            
-            # Relations avec les Clients
-            ('BACKGROUND', (3, 0), (3, 0), colors.HexColor(bmc_colors['relations'])),
-            ('VALIGN', (3, 0), (3, 0), 'TOP'),
-            
-            # Segments de Clientèle             # Segments de Clientèle
-            ('BACKGROUND', (4, 0), (4, 0), colors.HexColor(bmc_colors['segments'])),
-            ('VALIGN', (4, 0), (4, 0), 'TOP'),
-            
-            ('BOX', (0, 0), (0, 0), 1, colors.black),
-            ('BOX', (1, 0), (1, 0), 1, colors.black),
-            ('BOX', (2, 0), (2, 0), 1, colors.black),
-            ('BOX', (3, 0), (3, 0), 1, colors.black),
-            ('BOX', (4, 0), (4, 0), 1, colors.black),
-        ]))
-        
-        middle_table.setStyle(TableStyle([
-            # Partenaires Clés (continuation)
-            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(bmc_colors['partenaires'])),
-            ('VALIGN', (0, 0), (0, 0), 'TOP'),
-            
-            # Ressources Clés
-            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(bmc_colors['ressources'])),
-            ('VALIGN', (1, 0), (1, 0), 'TOP'),
-            
-            # Proposition de Valeur (continuation)
-            ('BACKGROUND', (2, 0), (2, 0), colors.HexColor(bmc_colors['proposition'])),
-            ('VALIGN', (2, 0), (2, 0), 'TOP'),
-            
-            # Canaux
-            ('BACKGROUND', (3, 0), (3, 0), colors.HexColor(bmc_colors['canaux'])),
-            ('VALIGN', (3, 0), (3, 0), 'TOP'),
-            
-            # Segments de Clientèle (continuation)
-            ('BACKGROUND', (4, 0), (4, 0), colors.HexColor(bmc_colors['segments'])),
-            ('VALIGN', (4, 0), (4, 0), 'TOP'),
-            
-            ('BOX', (1, 0), (1, 0), 1, colors.black),
-            ('BOX', (3, 0), (3, 0), 1, colors.black),
-        ]))
-        
-        bottom_table.setStyle(TableStyle([
-            # Structure de Coûts
-            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(bmc_colors['couts'])),
-            ('VALIGN', (0, 0), (0, 0), 'TOP'),
-            
-            # Sources de Revenus
-            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(bmc_colors['revenus'])),
-            ('VALIGN', (1, 0), (1, 0), 'TOP'),
-            
-            ('BOX', (0, 0), (0, 0), 1, colors.black),
-            ('BOX', (1, 0), (1, 0), 1, colors.black),
-        ]))
-        
-        # Ajouter les tableaux au story
-        story.append(top_table)
-        story.append(middle_table)
-        story.append(bottom_table)
-    except Exception as e:
-        story.append(Paragraph(f"Erreur lors de la création du Business Model Canvas: {str(e)}", normal_style))
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Modèle d'Affaires - Tableaux détaillés
-    story.append(Paragraph("Modèle d'Affaires", heading2_style))
-    
-    # Fonction pour ajouter un tableau de modèle d'affaires de manière sécurisée
-    def add_modele_table(story, key, title):
-        if key in saved_data:
-            story.append(Paragraph(title, styles['Heading3']))
-            try:
-                if isinstance(saved_data[key], dict) and saved_data[key]:
-                    keys = list(saved_data[key].keys())
-                    if keys:
-                        table_data = [keys]
-                        
-                        # Déterminer le nombre de lignes
-                        n_rows = max([len(val) for val in saved_data[key].values() if isinstance(val, list)]) if saved_data[key] else 0
-                        
-                        # Ajouter chaque ligne
-                        for i in range(n_rows):
-                            row = []
-                            for k in keys:
-                                values = saved_data[key].get(k, [])
-                                if isinstance(values, list) and i < len(values):
-                                    row.append(values[i])
-                                else:
-                                    row.append("")
-                            table_data.append(row)
-                        
-                        # Créer le tableau
-                        if table_data and len(table_data) > 1:
-                            table = create_styled_table(
-                                table_data,
-                                colWidths=[doc.width/len(keys)] * len(keys),
-                                style_commands=[
-                                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                                ]
-                            )
-                            story.append(table)
-                            story.append(Spacer(1, 0.1*inch))
-                        else:
-                            story.append(Paragraph("Données insuffisantes pour créer le tableau", normal_style))
-                    else:
-                        story.append(Paragraph("Aucune colonne définie pour ce tableau", normal_style))
-                elif isinstance(saved_data[key], list) and saved_data[key]:
-                    # Traiter les données au format liste
-                    if saved_data[key][0]:
-                        columns = list(saved_data[key][0].keys())
-                        table_data = [columns]
-                        
-                        for item in saved_data[key]:
-                            row = []
-                            for col in columns:
-                                row.append(item.get(col, ""))
-                            table_data.append(row)
-                        
-                        if len(table_data) > 1:
-                            table = create_styled_table(
-                                table_data,
-                                colWidths=[doc.width/len(columns)] * len(columns),
-                                style_commands=[
-                                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
-                                ]
-                            )
-                            story.append(table)
-                            story.append(Spacer(1, 0.1*inch))
-                        else:
-                            story.append(Paragraph("Données insuffisantes pour créer le tableau", normal_style))
-                    else:
-                        story.append(Paragraph("Données vides pour ce tableau", normal_style))
-                else:
-                    story.append(Paragraph(f"Format de données non reconnu pour {title}", normal_style))
-            except Exception as e:
-                story.append(Paragraph(f"Erreur lors de la création du tableau {title}: {str(e)}", normal_style))
-                story.append(Spacer(1, 0.1*inch))
-    
-    # Ajouter tous les tableaux de modèle d'affaires
-    add_modele_table(story, 'modele_partenaires', "Partenaires Clés")
-    add_modele_table(story, 'modele_activites', "Activités Clés")
-    add_modele_table(story, 'modele_proposition', "Proposition de Valeur")
-    add_modele_table(story, 'modele_relations', "Relations Clients")
-    add_modele_table(story, 'modele_segments', "Segments Clients")
-    add_modele_table(story, 'modele_ressources', "Ressources Clés")
-    add_modele_table(story, 'modele_couts', "Structure de Coûts")
-    add_modele_table(story, 'modele_canaux', "Canaux")
-    add_modele_table(story, 'modele_revenus', "Sources de Revenus")
-    
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Stratégie Commerciale
-    story.append(Paragraph("STRATÉGIE COMMERCIALE", heading1_style))
-    
-    # Cibles Commerciales
-    story.append(Paragraph("1. Cibles Commerciales", heading2_style))
-    story.append(Paragraph("Particuliers", styles['Heading3']))
-    for line in saved_data.get('part', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    
-    # Projections
-    if 'projections_table' in saved_data:
-        story.append(Spacer(1, 0.1*inch))
-        
-        if isinstance(saved_data['projections_table'], dict):
-            annees = saved_data['projections_table'].get('Année', [])
-            visiteurs = saved_data['projections_table'].get('Visiteurs', [])
-            ventes = saved_data['projections_table'].get('Ventes', [])
-            
-            if annees and visiteurs and ventes:
-                projections_data = [["Année", "Visiteurs", "Ventes"]]
-                for i in range(min(len(annees), len(visiteurs), len(ventes))):
-                    projections_data.append([str(annees[i]), visiteurs[i], ventes[i]])
-                
-                projections_table = create_styled_table(
-                    projections_data,
-                    colWidths=[doc.width/3.0, doc.width/3.0, doc.width/3.0]
-                )
-                story.append(projections_table)
-            else:
-                # Table vide en cas de données manquantes
-                default_projections_data = [
-                    ["Année", "Visiteurs", "Ventes"],
-                    ["", "", ""],
-                    ["", "", ""],
-                    ["", "", ""]
-                ]
-                projections_table = create_styled_table(
-                    default_projections_data,
-                    colWidths=[doc.width/3.0, doc.width/3.0, doc.width/3.0]
-                )
-                story.append(projections_table)
+# Aperçu HTML du rapport sous la page : reconstruit à chaque rerun, seules les sections
+# dont les données ont changé sont régénérées ; le PDF n'est construit qu'à l'export
+@profiler.timed()
+def show_html_preview(sections=None):
+    import report_html
+    
+    if 'html_section_cache' not in st.session_state:
+        st.session_state.html_section_cache = {}
+    preview = report_html.build_html(report_store.snapshot(), st.session_state.html_section_cache, sections)
+    with st.expander("👁️ Aperçu du rapport", expanded=True):
+        # st.iframe remplace components.html dans les versions récentes de Streamlit
+        if hasattr(st, "iframe"):
+            st.iframe(preview, height=900)
         else:
-            # Table vide en cas de données manquantes
-            default_projections_data = [
-                ["Année", "Visiteurs", "Ventes"],
-                ["", "", ""],
-                ["", "", ""],
-                ["", "", ""]
-            ]
-            projections_table = create_styled_table(
-                default_projections_data,
-                colWidths=[doc.width/3.0, doc.width/3.0, doc.width/3.0]
-            )
-            story.append(projections_table)
-    
-    # Associations, Écoles, Entreprises
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph("Associations", styles['Heading3']))
-    for line in saved_data.get('assoc', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph("Établissements Scolaires", styles['Heading3']))
-    for line in saved_data.get('ecoles', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph("Entreprises", styles['Heading3']))
-    for line in saved_data.get('entrep', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Détails Techniques
-    story.append(Paragraph(saved_data.get('tech_title_main', "DÉTAILS TECHNIQUES"), heading1_style))
-    
-    # Étude technique
-    story.append(Paragraph(saved_data.get('tech_title_etude', "1. Étude technique du projet"), heading2_style))
-    
-    # Prototype
-    story.append(Paragraph(saved_data.get('tech_title_prototype', "1.1 Prototype"), heading2_style))
-    
-    # Partie Électronique
-    story.append(Paragraph(saved_data.get('tech_title_electronique', "Partie Électronique"), styles['Heading3']))
-    for line in saved_data.get('tech_electronique', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    # Partie Matériaux
-    story.append(Paragraph(saved_data.get('tech_title_materiaux', "Partie Étude des Matériaux"), styles['Heading3']))
-    for line in saved_data.get('tech_materiaux', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Application Mobile
-    story.append(Paragraph(saved_data.get('tech_title_application', "1.2 Application Mobile"), heading2_style))
-    for line in saved_data.get('tech_application', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Algorithmes et Traitement des Données
-    story.append(Paragraph(saved_data.get('tech_title_algorithmes', "1.3 Algorithmes et Traitement des Données"), heading2_style))
-    for line in saved_data.get('tech_algorithmes', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Interface Utilisateur
-    story.append(Paragraph(saved_data.get('tech_title_interface', "1.4 Interface Utilisateur et Expérience"), heading2_style))
-    for line in saved_data.get('tech_interface', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Tests et Validation
-    story.append(Paragraph(saved_data.get('tech_title_tests', "1.5 Tests et Validation"), heading2_style))
-    for line in saved_data.get('tech_tests', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Sections originales
-    story.append(Paragraph(saved_data.get('tech_title_section2', "2. Prototype"), heading2_style))
-    for line in saved_data.get('comp', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    story.append(Paragraph(saved_data.get('tech_title_section3', "3. Application Mobile"), heading2_style))
-    for line in saved_data.get('app', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    story.append(Paragraph(saved_data.get('tech_title_section4', "4. Processus de Production"), heading2_style))
-    for line in saved_data.get('prod', '').split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, normal_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Ajouter simplement le pied de page sans les informations du document
-    story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph("© Tous droits réservés", 
-                          ParagraphStyle(
-                              'Footer',
-                              parent=styles['Normal'],
-                              alignment=TA_CENTER,
-                              fontSize=8
-                          )))
-    
-    # Assembler le document (sans la numérotation de pages)
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+            import streamlit.components.v1 as components
+            components.html(preview, height=900, scrolling=True)
 
 st.sidebar.title("Navigation")
 page = st.sidebar.selectbox(
@@ -1544,14 +793,86 @@ page = st.sidebar.selectbox(
 )
 
 # Bouton de génération PDF dans la barre latérale
+pdf_background = st.sidebar.checkbox("Générer le PDF en arrière-plan", value=True, key="pdf_background")
+# Choix des sections du PDF : les chapitres puis leurs sections ; aucune sélection = rapport complet
+pdf_sections = st.sidebar.multiselect(
+    "Sections du PDF (toutes si vide)",
+    PDF_SECTION_CHOICES,
+    format_func=section_label,
+    key="pdf_sections"
+) or None
+html_preview = st.sidebar.checkbox("👁️ Aperçu du rapport (sections choisies)", key="html_preview")
 if st.sidebar.button("📄 Générer un PDF du rapport"):
-    pdf = generate_pdf()
-    st.sidebar.download_button(
-        label="⬇️ Télécharger le PDF",
-        data=pdf,
-        file_name="rapport.pdf",
-        mime="application/pdf"
-    )
+    if pdf_background:
+        import report_pdf
+        
+        # Le rendu travaille sur un instantané : l'édition peut continuer pendant la génération
+        manager = get_pdf_job_manager()
+        if 'pdf_job_id' in st.session_state:
+            manager.discard(st.session_state.pdf_job_id)
+        snapshot = report_store.snapshot()
+        sections_total = len(report_pdf.select_sections(pdf_sections) or report_pdf.PDF_SECTIONS)
+        pdf_cache = get_pdf_cache()
+        if manager.use_processes:
+            # Les caches ne traversent pas les processus : le cache des PDF est consulté
+            # ici et alimenté au retour du rendu
+            cache_key = report_pdf.report_cache_key(snapshot, pdf_sections)
+            cached_pdf = pdf_cache.get(cache_key)
+            if cached_pdf is not None:
+                st.session_state.pdf_job_id = manager.add_finished(cached_pdf, sections_total)
+            else:
+                st.session_state.pdf_job_id = manager.submit(
+                    pdf_renderer(report_pdf.render_pdf_file, sections=pdf_sections),
+                    snapshot,
+                    sections_total,
+                    on_done=functools.partial(cache_pdf_file, pdf_cache, cache_key)
+                )
+        else:
+            # Cache de sections propre au travail : le thread de rendu ne modifie pas celui de
+            # la session, qui reprend le cache du travail une fois celui-ci terminé
+            section_cache = dict(st.session_state.get('pdf_section_cache', {}))
+            st.session_state.pdf_job_id = manager.submit(
+                pdf_renderer(
+                    report_pdf.generate_pdf_file,
+                    section_cache=section_cache,
+                    pdf_cache=pdf_cache,
+                    sections=pdf_sections
+                ),
+                snapshot,
+                sections_total
+            )
+            st.session_state.pdf_job_section_cache = (st.session_state.pdf_job_id, section_cache)
+    else:
+        # Le fichier est lu par le bouton dès sa création : il peut être supprimé ensuite
+        pdf_path = generate_pdf(pdf_sections)
+        try:
+            download_file_button(st.sidebar, functools.partial(open, pdf_path, "rb"), deferred=False)
+        finally:
+            os.remove(pdf_path)
+
+if pdf_background:
+    pdf_job = get_pdf_job_manager().get(st.session_state.get('pdf_job_id'))
+    # Travail terminé (ou remplacé) : la session reprend les sections qu'il a construites
+    job_section_cache = st.session_state.get('pdf_job_section_cache')
+    if job_section_cache is not None and (pdf_job is None or pdf_job.id != job_section_cache[0] or pdf_job.finished):
+        if pdf_job is not None and pdf_job.id == job_section_cache[0] and pdf_job.status == TERMINE:
+            st.session_state.pdf_section_cache = job_section_cache[1]
+        del st.session_state.pdf_job_section_cache
+    with st.sidebar:
+        if pdf_job is not None and not pdf_job.finished and hasattr(st, "fragment"):
+            # Rafraîchir uniquement ce bloc tant que le travail tourne, puis relancer la page
+            @st.fragment(run_every=1)
+            def pdf_job_fragment():
+                job = get_pdf_job_manager().get(st.session_state.get('pdf_job_id'))
+                if job is None or job.finished:
+                    st.rerun()
+                show_pdf_job()
+            pdf_job_fragment()
+        else:
+            show_pdf_job()
+            if pdf_job is not None and not pdf_job.finished:
+                # Sans st.fragment, un clic relance le script et met à jour l'avancement
+                st.button("🔄 Actualiser", key="pdf_job_refresh")
 
 # Section pour la gestion des sauvegardes locales
 st.sidebar.markdown("---")
@@ -1559,16 +880,54 @@ st.sidebar.subheader("Mes données")
 
 # Bouton de sauvegarde manuelle - AJOUTÉ
 if st.sidebar.button("💾 Sauvegarder mes données"):
-    filename = save_data(saved_data)
+    filename = save_data(report_store.snapshot())
     if filename:
         st.sidebar.success(f"Données sauvegardées dans {filename}")
     else:
         st.sidebar.error("Erreur lors de la sauvegarde")
 
+# État de la sauvegarde automatique du brouillon de la session
+if get_autosaver() is not None:
+    autosave_stats = get_autosaver().stats(autosave_id())
+    if autosave_stats["error"]:
+        st.sidebar.warning(f"Sauvegarde automatique impossible : {autosave_stats['error']}")
+    elif autosave_stats["marks"]:
+        last_write = (
+            datetime.fromtimestamp(autosave_stats["last_write"]).strftime("%H:%M:%S")
+            if autosave_stats["last_write"] else "en attente"
+        )
+        st.sidebar.caption(
+            f"Brouillon enregistré automatiquement ({last_write}) : "
+            f"{autosave_stats['marks']} modification(s), {autosave_stats['writes']} écriture(s), "
+            f"{autosave_stats['avoided']} évitée(s)"
+        )
+
+def draft_label(draft):
+    return f"{datetime.fromtimestamp(draft.modified).strftime('%d/%m/%Y %H:%M')} ({draft.size // 1024 + 1} Ko)"
+
+# Session sans aucune modification (après un plantage ou un rechargement de la page) :
+# proposer de reprendre le brouillon rappelé dans l'adresse de la page
+if get_autosaver() is not None and not autosave_stats["marks"]:
+    draft = get_autosaver().info(previous_draft_id())
+    if draft is not None and draft.id != autosave_id():
+        with st.sidebar.expander("♻️ Restaurer le brouillon"):
+            st.caption(f"Brouillon du {draft_label(draft)}")
+            if st.button("Restaurer ce brouillon", key="draft_restore"):
+                try:
+                    with open(draft.path, "rb") as f:
+                        data = load_report(f)
+                except Exception as e:
+                    st.error(f"Brouillon illisible : {e}")
+                else:
+                    # Le contenu est repris dans le brouillon de la session : une autre page
+                    # encore ouverte sur l'ancien brouillon ne l'écrit pas en même temps
+                    apply_imported_data(data)
+                    st.rerun()
+
 # Exporter les données
 if st.sidebar.button("⬇️ Exporter ma sauvegarde"):
     # Convertir les données en JSON pour téléchargement
-    json_data = json.dumps(st.session_state.user_data, ensure_ascii=False, indent=4)
+    json_data = json.dumps(report_store.snapshot(), ensure_ascii=False, indent=4)
     
     # Proposer le téléchargement
     st.sidebar.download_button(
@@ -1578,18 +937,77 @@ if st.sidebar.button("⬇️ Exporter ma sauvegarde"):
         mime="application/json"
     )
 
+# Libellé d'une sauvegarde du stockage
+def revision_label(revision):
+    return f"{revision.company} — {datetime.fromtimestamp(revision.created_at).strftime('%d/%m/%Y %H:%M')}"
+
+# Export groupé : sauvegardes du stockage rendues en PDF et réunies dans une archive ZIP
+# (le stockage n'est parcouru que lorsque l'export est ouvert)
+if st.sidebar.checkbox("📦 Export groupé de sauvegardes", key="bulk_export"):
+    report_storage = get_report_storage()
+    all_revisions = st.sidebar.checkbox("Toutes les révisions", key="bulk_all_revisions")
+    candidates = report_storage.revisions() if all_revisions else latest_revisions(report_storage)
+    selection = st.sidebar.multiselect(
+        "Sauvegardes à exporter",
+        candidates,
+        default=candidates,
+        format_func=revision_label,
+        key=f"bulk_selection_{all_revisions}"
+    )
+    if st.sidebar.button("🗜️ Créer l'archive", disabled=not selection):
+        progress = st.sidebar.progress(0.0, text=f"0/{len(selection)} rapport(s)")
+        fd, archive_path = tempfile.mkstemp(suffix=".zip", dir=get_pdf_job_manager().spool_dir)
+        os.close(fd)
+        entries = export_reports(
+            report_storage,
+            selection,
+            archive_path,
+            workers=int(os.environ.get("PDF_WORKERS", "2")),
+            use_processes=os.environ.get("PDF_WORKER_MODE") == "process",
+            on_progress=lambda done, total: progress.progress(done / total, text=f"{done}/{total} rapport(s)")
+        )
+        # Une seule archive par session : la précédente est supprimée
+        previous_path = st.session_state.get('bulk_export_path')
+        if previous_path:
+            try:
+                os.remove(previous_path)
+            except OSError:
+                pass
+        st.session_state.bulk_export_path = archive_path
+        st.session_state.bulk_export_errors = [
+            f"{entry['company']} ({entry['created_at']}) : {entry['error']}" for entry in entries if entry["error"]
+        ]
+    archive_path = st.session_state.get('bulk_export_path')
+    if archive_path and os.path.exists(archive_path):
+        for error in st.session_state.get('bulk_export_errors', []):
+            st.sidebar.warning(error)
+        download_file_button(
+            st.sidebar,
+            functools.partial(open, archive_path, "rb"),
+            label="📥 Télécharger l'archive",
+            file_name="rapports.zip",
+            mime="application/zip"
+        )
+
 # AMÉLIORATION de l'importation des fichiers
 uploaded_file = st.sidebar.file_uploader("Importer une sauvegarde", type=['json'], key="file_uploader")
 if uploaded_file is not None:
-    try:
-        # Lire le contenu du fichier
-        content = uploaded_file.read().decode('utf-8')
-        data = json.loads(content)
-        
-        # Mettre à jour les données en mémoire
-        st.session_state.user_data = data
-        saved_data.update(data)  # Aussi mettre à jour saved_data
-        
+    # Un fichier resté dans le widget n'est lu et appliqué qu'une fois : les reruns
+    # suivants ne font que réafficher le résultat de l'import
+    fingerprint = upload_fingerprint(uploaded_file)
+    import_status = st.session_state.get('import_status')
+    if import_status is None or import_status[0] != fingerprint:
+        try:
+            # Lire et valider le fichier au fil de l'eau
+            uploaded_file.seek(0)
+            data = load_report(uploaded_file)
+            apply_imported_data(data)
+            import_status = (fingerprint, None)
+        except Exception as e:
+            import_status = (fingerprint, f"Erreur lors de l'importation: {str(e)}")
+        st.session_state.import_status = import_status
+    
+    if import_status[1] is None:
         # Afficher message de succès et bouton pour appliquer les données
         st.sidebar.success("Sauvegarde importée avec succès!")
         
@@ -1599,23 +1017,27 @@ if uploaded_file is not None:
                 st.rerun()
             except:
                 st.sidebar.info("Veuillez rafraîchir la page pour voir les données importées")
-                
-    except Exception as e:
-        st.sidebar.error(f"Erreur lors de l'importation: {str(e)}")
+    else:
+        st.sidebar.error(import_status[1])
+else:
+    # Fichier retiré : le prochain import sera appliqué même s'il est identique
+    st.session_state.pop('import_status', None)
 
 # Bouton pour effacer toutes les données
 if st.sidebar.button("🗑️ Réinitialiser mes données"):
     # Afficher une demande de confirmation
     confirmation = st.sidebar.checkbox("Confirmer la réinitialisation")
     if confirmation:
-        st.session_state.user_data = {}  # Vider les données
-        saved_data.clear()  # Vider les données actuelles
+        report_store.clear()  # Vider les données
+        autosave_all({})
         st.sidebar.success("Données réinitialisées!")
         try:
             st.rerun()
         except:
             st.sidebar.info("Veuillez rafraîchir la page pour voir les changements")
 
+page_timer = profiler.start("page", page)
+
 # Page 1: Présentation du Projet
 if page == "Présentation du Projet":
     # Ajout d'un input pour changer le titre du projet
@@ -1642,7 +1064,8 @@ if page == "Présentation du Projet":
             create_input("Valeurs", "", "ident_valeurs")
         ]
     }
-    st.table(pd.DataFrame(identite_data))
+    st.markdown(markdown_table(identite_data))
+    create_image_input("Logo de l'entreprise", "ident_logo")
     
     st.header("3. Objectifs et Vision")
     objectifs = create_input("Objectifs Principaux", "", "pres_objectifs", text_area=True)
@@ -1695,7 +1118,7 @@ elif page == "Analyse de Marché":
     
     # Ajout du nouveau tableau comparatif détaillé des concurrents avec inputs
     st.markdown("---")
-    df, criteres_column_name, concurrents = create_competitor_comparison_table("competitors_comparison_table")
+    create_competitor_comparison_table()
     st.markdown("---")
     
     st.subheader("Comparaison des Fonctionnalités Clés")
@@ -1836,7 +1259,44 @@ elif page == "Détails Techniques":
     tech_title_section4 = create_input("Titre section 4", "", "tech_title_section4")
     st.header(tech_title_section4 or "4. Processus de Production")
     production = create_input("Production", "", "prod", text_area=True)
+    
+    st.header("Illustrations")
+    create_image_gallery("Photos du prototype, captures d'écran", "tech_images")
+
+page_timer.stop()
+
+if html_preview:
+    show_html_preview(pdf_sections)
 
 # Pied de page
 st.markdown("---")
 st.markdown(f"Dernière mise à jour: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+# Panneau de profilage : durées cumulées depuis le démarrage du serveur
+rerun_timer.stop()
+if profiler.enabled:
+    with st.sidebar.expander("⏱️ Profilage des reruns"):
+        timings = profiler.snapshot()[:30]
+        if timings:
+            st.markdown(markdown_table({
+                "Type": [row["kind"] for row in timings],
+                "Nom": [row["name"] for row in timings],
+                "Appels": [row["count"] for row in timings],
+                "Total (ms)": [f"{row['total_seconds'] * 1000:.1f}" for row in timings],
+                "Moyenne (ms)": [f"{row['mean_seconds'] * 1000:.2f}" for row in timings],
+                "Max (ms)": [f"{row['max_seconds'] * 1000:.1f}" for row in timings],
+            }))
+        st.download_button(
+            label="Exporter en JSON",
+            data=profiler.to_json(),
+            file_name="profilage_reruns.json",
+            mime="application/json"
+        )
+        st.download_button(
+            label="Exporter au format Prometheus",
+            data=profiler.to_prometheus(),
+            file_name="profilage_reruns.prom",
+            mime="text/plain"
+        )
+        if st.button("Remettre les mesures à zéro", key="profiler_reset"):
+            profiler.reset()
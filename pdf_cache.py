@@ -0,0 +1,223 @@
+"""
+Cache des PDF générés, adressé par le contenu du rapport.
+
+La clé est l'empreinte SHA-256 des données normalisées et de la configuration de
+mise en page : deux générations sur les mêmes données retournent les mêmes octets
+sans relancer ReportLab. Le cache garde les PDF récents en mémoire (LRU bornée en
+nombre et en taille) et, si un dossier est fourni, sur disque. Un PDF du disque plus
+gros que le cache mémoire n'est jamais lu d'un bloc : open() le fournit en fichier.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def report_hash(data, style_config=None):
+    """Empreinte canonique des données du rapport et de la configuration de style."""
+    payload = json.dumps(
+        {"data": data, "style": style_config},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """
+    LRU des PDF en mémoire, avec un second niveau optionnel sur disque.
+    Partagé entre sessions et threads de génération : toutes les opérations sont verrouillées.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024, cache_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Taille des PDF sur disque, tenue à jour à chaque écriture : le dossier n'est
+        # parcouru qu'au démarrage et quand la taille maximale est dépassée
+        self._disk_size = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_size = sum(size for _, size, _ in self._disk_files())
+
+    def get(self, key):
+        """
+        Retourne les octets du PDF ou None. Un PDF du disque plus gros que le cache
+        mémoire n'est pas lu : get() retourne alors None (voir open()).
+        """
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pdf
+
+        pdf = self._read_disk(key)
+        with self._lock:
+            if pdf is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, pdf)
+        return pdf
+
+    def open(self, key):
+        """
+        Retourne le PDF ouvert en lecture binaire (à fermer par l'appelant) ou None.
+        Un PDF du disque plus gros que le cache mémoire est lu depuis son fichier.
+        """
+        pdf = self.get(key)
+        if pdf is not None:
+            return io.BytesIO(pdf)
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            # get() a compté un échec : c'est finalement un succès
+            self.misses -= 1
+            self.hits += 1
+        return f
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._store(key, pdf)
+        self._write_disk(key, pdf)
+
+    def put_file(self, key, f):
+        """
+        Ajoute un PDF lu depuis un fichier ouvert : gardé en mémoire seulement s'il tient
+        dans le cache, recopié par blocs sur disque sinon.
+        """
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        if size <= self.max_bytes:
+            self.put(key, f.read())
+        else:
+            self._write_disk(key, f)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, pdf):
+        # Un PDF plus gros que tout le cache mémoire n'y entre pas (il reste sur disque)
+        if len(pdf) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = pdf
+        self._size += len(pdf)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getsize(path) > self.max_bytes:
+                return None
+            with open(path, "rb") as f:
+                pdf = f.read()
+            # Mettre à jour la date d'accès pour l'éviction LRU sur disque
+            os.utime(path)
+            return pdf
+        except OSError:
+            return None
+
+    def _write_disk(self, key, pdf):
+        # pdf : octets ou fichier ouvert en lecture
+        if not self.cache_dir:
+            return
+        # Écriture atomique : un lecteur concurrent ne voit jamais un PDF partiel
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        path = self._path(key)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(pdf, bytes):
+                    f.write(pdf)
+                else:
+                    shutil.copyfileobj(pdf, f)
+                size = f.tell()
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException as e:
+            # Écriture interrompue : ne pas laisser le fichier temporaire dans le cache
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, OSError):
+                return
+            raise
+        with self._lock:
+            self._disk_size += size - replaced
+            over = self._disk_size > self.max_disk_bytes
+        if over:
+            self._prune_disk()
+
+    def _disk_files(self):
+        # (date d'accès, taille, chemin) des PDF du dossier
+        files = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".pdf"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return files
+
+    def _prune_disk(self):
+        # Supprimer les PDF les moins récemment utilisés jusqu'à 90 % de la taille
+        # maximale : les écritures suivantes ne relancent pas aussitôt un parcours du dossier
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_size = total
@@ -0,0 +1,289 @@
+"""
+Génération des PDF en arrière-plan.
+
+Le rendu est confié à un pool de threads, ou de processus, pour que le script Streamlit
+ne reste pas bloqué pendant la mise en page ; l'interface interroge ensuite l'état du
+travail (sections construites, pages produites) à chaque rafraîchissement.
+
+Avec un dossier de spool, chaque travail écrit son PDF dans un fichier de ce dossier au
+lieu de le garder en mémoire : le téléchargement lit ensuite le fichier. Le fichier vit
+tant que la session consulte son travail ; un travail abandonné (discard) pendant le
+rendu supprime son fichier à la fin du rendu.
+"""
+import functools
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# États possibles d'un travail
+EN_ATTENTE = "en attente"
+EN_COURS = "en cours"
+TERMINE = "terminé"
+ERREUR = "erreur"
+
+
+class PdfJob:
+    """
+    Un travail de génération : état, progression et résultat.
+    Les compteurs sont mis à jour par le thread de rendu et lus par le script.
+    """
+
+    def __init__(self, job_id, sections_total, events=None, path=None):
+        self.id = job_id
+        # File des événements de progression envoyés par un processus de rendu ; vidée par
+        # le script (get) et par le thread qui recueille le résultat, l'un après l'autre
+        self.events = events
+        self._events_lock = threading.Lock()
+        self.status = EN_ATTENTE
+        self.sections_total = sections_total
+        self.sections_done = 0
+        self.pages = 0
+        # Résultat : les octets du PDF, ou le fichier `path` où le rendu l'a écrit
+        self.result = None
+        self.path = path
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Dernière consultation par la session (get) : le travail est oublié quand elle est ancienne
+        self.last_access = self.created_at
+        # Abandonné pendant le rendu : le fichier est supprimé quand le rendu se termine
+        self.cancelled = False
+
+    def section_done(self, name):
+        self.sections_done += 1
+
+    def page_emitted(self, page):
+        self.pages = page
+
+    def drain_events(self, close=False):
+        """
+        Applique les événements reçus du processus de rendu ; avec close, la file est
+        ensuite abandonnée (le rendu est terminé, plus aucun événement n'arrive).
+        """
+        with self._events_lock:
+            if self.events is None:
+                return
+            while True:
+                try:
+                    kind, value = self.events.get_nowait()
+                except (queue.Empty, OSError, EOFError):
+                    break
+                if self.status == EN_ATTENTE:
+                    self.status = EN_COURS
+                    self.started_at = time.time()
+                if kind == "section":
+                    self.section_done(value)
+                else:
+                    self.page_emitted(value)
+            if close:
+                self.events = None
+
+    def open(self):
+        """Ouvre le PDF terminé en lecture (fichier du spool ou octets en mémoire)."""
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self.result)
+
+    @property
+    def finished(self):
+        return self.status in (TERMINE, ERREUR)
+
+    @property
+    def available(self):
+        """PDF terminé et toujours lisible (le fichier du spool peut avoir été supprimé)."""
+        return self.status == TERMINE and (self.path is None or os.path.exists(self.path))
+
+    @property
+    def fraction(self):
+        """Avancement entre 0 et 1 ; la construction des sections compte pour la moitié."""
+        if self.status == TERMINE:
+            return 1.0
+        if not self.sections_total:
+            return 0.0
+        sections = min(self.sections_done, self.sections_total) / self.sections_total
+        # Le nombre de pages final n'est pas connu d'avance : on avance par demi-pas
+        pages = 1.0 - 0.5 ** self.pages if self.pages else 0.0
+        return 0.5 * sections + 0.49 * pages
+
+
+# Exécuté dans un processus du pool : relaie la progression par la file partagée
+def _render_in_process(render, data, events):
+    return render(
+        data,
+        on_section=functools.partial(_put_event, events, "section"),
+        on_page=functools.partial(_put_event, events, "page")
+    )
+
+def _put_event(events, kind, value):
+    events.put((kind, value))
+
+
+class PdfJobManager:
+    """
+    Pool de génération partagé par toutes les sessions du serveur.
+    `render` est appelé avec (données, on_section, on_page) et doit retourner les octets
+    du PDF. Avec use_processes, le rendu tourne dans des processus séparés et échappe au
+    GIL : `render` et les données doivent alors être sérialisables (pickle).
+    Avec spool_dir, `render` reçoit en plus path= (fichier à écrire, voir
+    report_pdf.generate_pdf_file) et les PDF ne restent pas en mémoire.
+    """
+
+    def __init__(self, max_workers=2, keep_seconds=3600, use_processes=False, spool_dir=None):
+        self.use_processes = use_processes
+        self.spool_dir = spool_dir
+        if use_processes:
+            # spawn plutôt que fork : le serveur Streamlit a déjà des threads actifs
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            self._context = context
+            self._events_manager = None
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.keep_seconds = keep_seconds
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            self._prune_spool()
+
+    def submit(self, render, data, sections_total, on_done=None):
+        """
+        Soumet un rendu sur un instantané des données et retourne l'identifiant du travail.
+        on_done(résultat) est appelé dans le processus du serveur quand le rendu réussit,
+        avec les octets du PDF ou, avec un dossier de spool, le chemin du fichier.
+        """
+        job_id = uuid.uuid4().hex
+        path = None
+        if self.spool_dir:
+            path = os.path.join(self.spool_dir, f"{job_id}.pdf")
+            render = functools.partial(render, path=path)
+        if self.use_processes:
+            job = PdfJob(job_id, sections_total, self._new_event_queue(), path)
+        else:
+            job = PdfJob(job_id, sections_total, path=path)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        
+        if self.use_processes:
+            future = self._executor.submit(_render_in_process, render, data, job.events)
+            future.add_done_callback(functools.partial(self._collect, job, on_done))
+        else:
+            self._executor.submit(self._run, job, render, data, on_done)
+        return job.id
+
+    def add_finished(self, result, sections_total):
+        """Enregistre un travail déjà terminé (PDF trouvé en cache)."""
+        job = PdfJob(uuid.uuid4().hex, sections_total)
+        job.result = result
+        job.status = TERMINE
+        job.sections_done = sections_total
+        job.started_at = job.finished_at = time.time()
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        return job.id
+
+    def get(self, job_id):
+        """Travail de la session ; chaque consultation repousse son oubli de keep_seconds."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.last_access = time.time()
+        if job is not None:
+            job.drain_events()
+        return job
+
+    def discard(self, job_id):
+        """Abandonne un travail ; le fichier d'un rendu en cours est supprimé quand il se termine."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            job.cancelled = True
+            finished = job.finished
+        if finished:
+            self._remove_file(job)
+
+    def _run(self, job, render, data, on_done):
+        job.status = EN_COURS
+        job.started_at = time.time()
+        try:
+            self._set_result(job, render(data, on_section=job.section_done, on_page=job.page_emitted))
+            if on_done:
+                on_done(job.path or job.result)
+        except Exception as e:
+            self._finish(job, ERREUR, str(e))
+        else:
+            self._finish(job, TERMINE)
+
+    def _collect(self, job, on_done, future):
+        # Appelé dans un thread du serveur quand le processus a terminé
+        job.drain_events(close=True)
+        try:
+            self._set_result(job, future.result())
+            if on_done:
+                on_done(job.path or job.result)
+        except Exception as e:
+            self._finish(job, ERREUR, str(e))
+        else:
+            self._finish(job, TERMINE)
+
+    def _finish(self, job, status, error=None):
+        # Sous le verrou : un discard() est vu soit ici, soit après la fin du travail,
+        # et le fichier d'un travail abandonné est toujours supprimé
+        with self._lock:
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+            cancelled = job.cancelled
+        if cancelled:
+            self._remove_file(job)
+
+    def _new_event_queue(self):
+        # Les files d'un Manager peuvent être passées en argument à un processus du pool
+        with self._lock:
+            if self._events_manager is None:
+                self._events_manager = self._context.Manager()
+            return self._events_manager.Queue()
+
+    @staticmethod
+    def _set_result(job, result):
+        # Avec un fichier, le rendu retourne seulement sa taille
+        if job.path is None:
+            job.result = result
+
+    @staticmethod
+    def _remove_file(job):
+        if job.path is not None:
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+    def _purge(self):
+        # Oublier les travaux terminés que plus aucune session ne consulte depuis keep_seconds
+        limit = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.last_access < limit]:
+            self._remove_file(self._jobs.pop(job_id))
+
+    def _prune_spool(self):
+        # Fichiers laissés par un serveur précédent (PDF, archives des exports groupés) :
+        # plus aucun travail ne les référence
+        limit = time.time() - self.keep_seconds
+        try:
+            entries = list(os.scandir(self.spool_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith((".pdf", ".zip", ".tmp")) and entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,187 @@
+"""
+Mesures de la mise en page des PDF.
+
+Un PdfBuildProfile passé à report_pdf.generate_pdf() remplace, sur chaque flowable du
+story, les méthodes wrap, split et drawOn par des versions chronométrées. Le temps est
+ventilé par section du rapport et par classe de flowable ; les morceaux issus d'un
+découpage (tableau coupé entre deux pages) sont suivis de la même façon. Un flowable
+imbriqué (paragraphe dans une cellule de tableau) compte dans le temps de son parent.
+
+    python pdf_profile.py saved_data/rapport.json
+"""
+import functools
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("wrap", "split", "draw")
+
+
+class PdfBuildProfile:
+    """Durées de construction du story et de mise en page d'une génération de PDF."""
+
+    def __init__(self):
+        self.sections = {}
+        self.flowables = {}
+        self.pages = 0
+        self.build_seconds = 0.0
+        self.cache_hit = False
+        # Appel chronométré en cours : les appels imbriqués (split qui appelle wrap) ne sont pas recomptés
+        self._active = False
+
+    def _section(self, name):
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = {"story": 0.0, "cached": False, "flowables": 0, "wrap": 0.0, "split": 0.0, "draw": 0.0}
+        return section
+
+    def _class(self, name):
+        stats = self.flowables.get(name)
+        if stats is None:
+            stats = self.flowables[name] = {"count": 0, "calls": 0, "wrap": 0.0, "split": 0.0, "draw": 0.0}
+        return stats
+
+    def section_built(self, name, seconds, cached):
+        section = self._section(name)
+        section["story"] += seconds
+        section["cached"] = cached
+
+    def instrument(self, section, flowables):
+        """Chronomètre wrap, split et drawOn des flowables d'une section (méthodes d'instance)."""
+        for flowable in flowables:
+            self._instrument(section, flowable)
+
+    def _instrument(self, section, flowable):
+        # Un morceau de découpage peut être le flowable lui-même : ne pas l'instrumenter deux fois
+        if flowable.__dict__.get("_build_profile") is self:
+            return
+        flowable._build_profile = self
+        class_name = type(flowable).__name__
+        self._section(section)["flowables"] += 1
+        self._class(class_name)["count"] += 1
+        flowable.wrap = self._timed(flowable.wrap, section, class_name, "wrap")
+        flowable.split = self._timed(flowable.split, section, class_name, "split", split=True)
+        flowable.drawOn = self._timed(flowable.drawOn, section, class_name, "draw")
+
+    def _timed(self, method, section, class_name, phase, split=False):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if self._active:
+                return method(*args, **kwargs)
+            self._active = True
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self._active = False
+                self._section(section)[phase] += elapsed
+                stats = self._class(class_name)
+                stats[phase] += elapsed
+                stats["calls"] += 1
+            if split:
+                # Les morceaux remplacent le flowable dans la suite de la mise en page
+                for piece in result:
+                    self._instrument(section, piece)
+            return result
+        return timed
+
+    def build_done(self, seconds, pages):
+        self.build_seconds = seconds
+        self.pages = pages
+
+    def stats(self):
+        """Mesures sous forme de dictionnaire sérialisable en JSON."""
+        return {
+            "cache_hit": self.cache_hit,
+            "pages": self.pages,
+            "build_seconds": self.build_seconds,
+            "story_seconds": sum(section["story"] for section in self.sections.values()),
+            "sections": {name: dict(section) for name, section in self.sections.items()},
+            "flowables": {name: dict(stats) for name, stats in self.flowables.items()},
+        }
+
+
+def format_profile(stats):
+    """Résumé lisible des mesures : sections puis classes de flowables, les plus coûteuses d'abord."""
+    if stats["cache_hit"]:
+        return "PDF servi par le cache : aucune mise en page."
+    lines = [
+        f"{stats['pages']} page(s), story {stats['story_seconds'] * 1000:.1f} ms, "
+        f"mise en page {stats['build_seconds'] * 1000:.1f} ms",
+        "",
+        f"{'Section':<16} {'Story':>9} {'Wrap':>9} {'Split':>9} {'Draw':>9} {'Flowables':>9}",
+    ]
+    sections = sorted(stats["sections"].items(), key=lambda item: -sum(item[1][phase] for phase in PHASES))
+    for name, section in sections:
+        story = "cache" if section["cached"] else f"{section['story'] * 1000:.1f}"
+        lines.append(
+            f"{name:<16} {story:>9} {section['wrap'] * 1000:>9.1f} {section['split'] * 1000:>9.1f} "
+            f"{section['draw'] * 1000:>9.1f} {section['flowables']:>9}"
+        )
+    lines.extend(["", f"{'Flowable':<16} {'Wrap':>9} {'Split':>9} {'Draw':>9} {'Nombre':>9} {'Appels':>9}"])
+    classes = sorted(stats["flowables"].items(), key=lambda item: -sum(item[1][phase] for phase in PHASES))
+    for name, flowable in classes:
+        lines.append(
+            f"{name:<16} {flowable['wrap'] * 1000:>9.1f} {flowable['split'] * 1000:>9.1f} "
+            f"{flowable['draw'] * 1000:>9.1f} {flowable['count']:>9} {flowable['calls']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def _enable_logging(level):
+    # Ni Streamlit ni un processus de rendu ne configurent ce logger : son niveau effectif
+    # (WARNING) masquerait le profil, qui part alors sur stderr
+    if not logger.handlers and not logger.isEnabledFor(level):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+
+def log_profile(stats, level=logging.INFO):
+    """
+    Écrit le résumé des mesures dans le journal du module (logger pdf_profile), sur
+    stderr si le journal n'est pas configuré pour ce niveau.
+    """
+    _enable_logging(level)
+    logger.log(level, "Profil de génération du PDF\n%s", format_profile(stats))
+
+
+def profiled(render, data, *args, **kwargs):
+    """
+    Appelle render(data, ..., profile=PdfBuildProfile()) et journalise les mesures.
+    Défini au niveau du module : functools.partial(profiled, render) peut être confié à un
+    processus du pool, les mesures sont alors journalisées par ce processus.
+    """
+    profile = PdfBuildProfile()
+    result = render(data, *args, profile=profile, **kwargs)
+    log_profile(profile.stats())
+    return result
+
+
+def main(argv=None):
+    import argparse
+    import report_pdf
+
+    parser = argparse.ArgumentParser(description="Mesure la génération du PDF d'une sauvegarde JSON.")
+    parser.add_argument("json_path", help="sauvegarde JSON à rendre")
+    parser.add_argument("--json", help="écrire les mesures dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.json_path, encoding='utf-8') as f:
+        data = json.load(f)
+    _, stats = report_pdf.render_pdf_profiled(data)
+    print(format_profile(stats))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Sauvegarde automatique des brouillons, avec regroupement des écritures.
+
+Le script Streamlit signale chaque champ modifié (mark) ; la valeur est rangée dans un
+état miroir propre au brouillon et la clé marquée comme modifiée. Un thread unique
+écrit les brouillons modifiés quand la saisie s'interrompt depuis `delay` secondes
+(ou au plus tard après `max_delay` secondes de modifications continues) : une rafale
+de frappes ne produit qu'une écriture. Chaque écriture est atomique (fichier
+temporaire puis renommage), un brouillon sur disque n'est donc jamais tronqué.
+
+Une fois écrit, le contenu d'un brouillon n'est plus gardé en mémoire : les modifications
+suivantes sont mises de côté et le thread d'écriture les reporte dans le contenu relu
+depuis le fichier (jamais sous le verrou commun). Un fichier illisible n'est pas remplacé.
+Les écritures d'un même brouillon se font l'une après l'autre, dans l'ordre des états.
+
+info() décrit le brouillon d'un identifiant donné, pour le proposer à la restauration
+(nouvelle session après un plantage ou un rechargement de la page) : seul celui qui
+connaît l'identifiant le retrouve. Les brouillons plus vieux que `max_age` sont supprimés.
+"""
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+# Brouillon présent sur disque : date de dernière écriture (timestamp) et taille en octets
+DraftInfo = namedtuple("DraftInfo", ["id", "path", "modified", "size"])
+
+# Taille d'un brouillon vide ("{}") : rien à restaurer
+EMPTY_DRAFT_BYTES = 2
+
+# Identifiant de brouillon valide (nom de fichier sans chemin)
+DRAFT_ID = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+
+class Draft:
+    """État miroir d'un brouillon et compteurs associés ; protégé par le verrou de l'Autosaver."""
+
+    def __init__(self, draft_id, path):
+        self.id = draft_id
+        self.path = path
+        # Contenu du brouillon ; None quand il est écrit et relu depuis le fichier au besoin
+        self.data = None
+        # Valeurs modifiées tant que le contenu n'est pas relu
+        self.changes = {}
+        self.dirty = set()
+        self.first_change = None
+        self.last_change = None
+        self.marks = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.last_write = None
+        self.error = None
+        # Une seule écriture à la fois (pris avant le verrou de l'Autosaver)
+        self.lock = threading.Lock()
+
+    @property
+    def avoided(self):
+        """Modifications absorbées par une écriture groupée plutôt qu'écrites une par une."""
+        return max(self.marks - self.writes, 0)
+
+    def stats(self):
+        return {
+            "marks": self.marks,
+            "writes": self.writes,
+            "avoided": self.avoided,
+            "pending": len(self.dirty),
+            "bytes_written": self.bytes_written,
+            "last_write": self.last_write,
+            "error": self.error,
+        }
+
+
+class Autosaver:
+    """
+    Brouillons de toutes les sessions du serveur, écrits par un seul thread.
+    Le thread ne lit jamais l'état de la session Streamlit, seulement les valeurs reçues
+    par mark(), que l'application remplace sans jamais les modifier sur place.
+    """
+
+    def __init__(self, directory="saved_data/autosave", delay=2.0, max_delay=30.0, max_age=7 * 24 * 3600):
+        self.directory = directory
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_age = max_age
+        self._drafts = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="autosave", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        self.prune()
+
+    def mark(self, draft_id, key, value):
+        """
+        Enregistre la nouvelle valeur d'une clé ; l'écriture sur disque est différée.
+        La valeur n'est pas copiée : elle ne doit plus être modifiée sur place (voir
+        report_model.ReportStore).
+        """
+        with self._condition:
+            draft = self._draft(draft_id)
+            if draft.data is not None:
+                draft.data[key] = value
+            else:
+                # Contenu déjà écrit : la valeur y sera reportée par le thread d'écriture
+                draft.changes[key] = value
+            self._touch(draft, key)
+
+    def replace(self, draft_id, data):
+        """Remplace tout le brouillon (import d'une sauvegarde, réinitialisation)."""
+        data = dict(data)
+        with self._condition:
+            draft = self._draft(draft_id)
+            draft.data = data
+            draft.changes = {}
+            self._touch(draft, None)
+
+    def flush(self, draft_id=None):
+        """Écrit immédiatement les brouillons modifiés (d'une session ou de toutes)."""
+        with self._condition:
+            drafts = [self._drafts[draft_id]] if draft_id in self._drafts else (
+                [] if draft_id is not None else list(self._drafts.values())
+            )
+            pending = [draft for draft in drafts if draft.dirty]
+        for draft in pending:
+            self._save(draft)
+
+    def info(self, draft_id):
+        """Brouillon non vide enregistré sous cet identifiant ; None s'il n'existe pas ou a expiré."""
+        if not isinstance(draft_id, str) or not DRAFT_ID.fullmatch(draft_id):
+            return None
+        path = self._path(draft_id)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size <= EMPTY_DRAFT_BYTES or stat.st_mtime < time.time() - self.max_age:
+            return None
+        return DraftInfo(draft_id, path, stat.st_mtime, stat.st_size)
+
+    def prune(self):
+        """
+        Supprime les brouillons (et fichiers temporaires) plus vieux que max_age secondes
+        et oublie les sessions sans modification depuis aussi longtemps ; le brouillon
+        d'une session modifiée plus récemment est conservé.
+        """
+        limit = time.time() - self.max_age
+        with self._condition:
+            idle_limit = time.monotonic() - self.max_age
+            for draft_id, draft in list(self._drafts.items()):
+                if not draft.dirty and (draft.last_change is None or draft.last_change < idle_limit):
+                    del self._drafts[draft_id]
+            live = {draft.path for draft in self._drafts.values()}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if (entry.name.endswith((".json", ".tmp")) and entry.path not in live
+                        and entry.stat().st_mtime < limit):
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self, draft_id=None):
+        """Compteurs d'un brouillon, ou cumulés sur tous les brouillons."""
+        with self._condition:
+            if draft_id is not None:
+                draft = self._drafts.get(draft_id)
+                return draft.stats() if draft else Draft(draft_id, None).stats()
+            totals = {"drafts": len(self._drafts), "marks": 0, "writes": 0, "avoided": 0, "pending": 0, "bytes_written": 0}
+            for draft in self._drafts.values():
+                stats = draft.stats()
+                for name in ("marks", "writes", "avoided", "pending", "bytes_written"):
+                    totals[name] += stats[name]
+            return totals
+
+    def stop(self):
+        """Arrête le thread après avoir écrit les brouillons en attente."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _draft(self, draft_id):
+        draft = self._drafts.get(draft_id)
+        if draft is None:
+            draft = self._drafts[draft_id] = Draft(draft_id, self._path(draft_id))
+        return draft
+
+    def _path(self, draft_id):
+        return os.path.join(self.directory, f"{draft_id}.json")
+
+    def _touch(self, draft, key):
+        # Appelé verrou pris
+        now = time.monotonic()
+        if not draft.dirty:
+            draft.first_change = now
+        draft.dirty.add(key)
+        draft.last_change = now
+        draft.marks += 1
+        self._condition.notify()
+
+    @staticmethod
+    def _read(path):
+        # Contenu d'un brouillon écrit (vide s'il n'existe pas encore) ; OSError ou ValueError
+        # s'il est illisible
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(data, dict):
+            raise ValueError("le brouillon n'est pas un objet JSON")
+        return data
+
+    def _take(self, draft):
+        # Appelé verrou pris : sérialise l'état miroir et remet les clés modifiées à zéro
+        payload = json.dumps(draft.data, ensure_ascii=False, indent=4)
+        draft.dirty.clear()
+        draft.first_change = None
+        return payload
+
+    def _save(self, draft):
+        # Écrit un brouillon modifié ; draft.lock ordonne les écritures du brouillon entre le
+        # thread et flush(), le contenu écrit est donc toujours le plus récent
+        with draft.lock:
+            with self._condition:
+                if not draft.dirty:
+                    return
+                loaded = draft.data is not None
+            if not loaded:
+                # Contenu déjà écrit : le relire hors du verrou commun
+                try:
+                    data = self._read(draft.path)
+                except (OSError, ValueError) as e:
+                    # Ne pas écraser un brouillon illisible ; nouvel essai après `delay`
+                    with self._condition:
+                        draft.error = f"brouillon illisible, non remplacé ({e})"
+                        draft.first_change = draft.last_change = time.monotonic()
+                    return
+            with self._condition:
+                if draft.data is None:
+                    data.update(draft.changes)
+                    draft.data = data
+                    draft.changes = {}
+                payload = self._take(draft)
+            self._write(draft, payload)
+
+    def _due(self, draft, now):
+        # Échéance d'écriture d'un brouillon modifié
+        return min(draft.last_change + self.delay, draft.first_change + self.max_delay) - now
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                dirty = [draft for draft in self._drafts.values() if draft.dirty]
+                ready = [draft for draft in dirty if self._due(draft, now) <= 0]
+                if not ready:
+                    timeout = min((self._due(draft, now) for draft in dirty), default=None)
+                    self._condition.wait(timeout)
+                    continue
+            for draft in ready:
+                self._save(draft)
+
+    def _write(self, draft, payload):
+        # Appelé avec draft.lock. Écriture atomique : fichier temporaire dans le même dossier
+        # puis renommage
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, draft.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            with self._condition:
+                draft.error = str(e)
+            return
+        with self._condition:
+            draft.writes += 1
+            draft.bytes_written += len(payload.encode("utf-8"))
+            draft.last_write = time.time()
+            draft.error = None
+            # Brouillon à jour sur disque : ne plus garder son contenu en mémoire
+            if not draft.dirty:
+                draft.data = None
@@ -0,0 +1,237 @@
+"""
+Contenu du rapport commun au PDF (report_pdf) et à l'aperçu HTML (report_html).
+
+Lignes des tableaux (en-tête compris), tableaux vides, textes et couleurs fixes,
+dimensions de la page et des images. Ce module ne dépend pas de ReportLab : l'aperçu
+l'importe sans charger le rendu PDF. Les dimensions sont en points, comme dans
+ReportLab.
+"""
+from report_model import CompetitorMatrix
+
+# Unités de ReportLab (reportlab.lib.units), calculées de la même façon
+inch = 72.0
+mm = inch / 2.54 * 0.1
+
+# Format A4 (reportlab.lib.pagesizes.A4)
+A4 = (210 * mm, 297 * mm)
+
+# Mise en page du document (points)
+PDF_LAYOUT = {
+    'pagesize': A4,
+    'rightMargin': 52,
+    'leftMargin': 52,
+    'topMargin': 52,
+    'bottomMargin': 18
+}
+
+# Concurrents par tableau comparatif détaillé : au-delà, la matrice est découpée en
+# tableaux de COMPARATIF_COLUMNS_PER_TABLE concurrents qui répètent la colonne des critères
+COMPARATIF_COLUMNS_PER_TABLE = 7
+
+# Couleurs de chaque case du Business Model Canvas
+BMC_COLORS = {
+    "partenaires": "#ffadb9",    # Rose
+    "activites": "#b388ff",      # Violet
+    "proposition": "#81c784",     # Vert
+    "relations": "#ffb74d",      # Orange
+    "segments": "#4fc3f7",       # Bleu
+    "ressources": "#b388ff",     # Violet
+    "canaux": "#ffb74d",         # Orange
+    "couts": "#ffd54f",          # Jaune
+    "revenus": "#b388ff"         # Violet
+}
+
+# Lignes des tableaux : chaque fonction retourne None si les données manquent, la
+# section affiche alors le tableau vide de EMPTY_ROWS
+
+# Lignes des colonnes données d'une table, jusqu'à la plus courte ; None si l'une manque
+def column_rows(data, key, names):
+    if key not in data:
+        return None
+    columns = [data[key].get(name, []) for name in names]
+    if not all(columns):
+        return None
+    return [list(names)] + [list(row) for row in zip(*columns)]
+
+def identite_rows(data):
+    return [
+        ["Information", "Détail"],
+        ["Raison sociale", data.get('ident_rs', '')],
+        ["Slogan", data.get('ident_slogan', '')],
+        ["Objet social", data.get('ident_objet_social', '')],
+        ["Domaines d'activité", data.get('ident_domaines', '')],
+        ["Siège social", data.get('ident_siege', '')],
+        ["Forme juridique", data.get('ident_forme', '')],
+        ["Nombre d'associés", data.get('ident_associes', '')],
+        ["Valeurs", data.get('ident_valeurs', '')]
+    ]
+
+def cibles_rows(data):
+    return column_rows(data, 'marche_cibles_table', ("Segment", "Bénéfices"))
+
+def swot_rows(data):
+    return column_rows(data, 'marche_swot_table', ("Catégorie", "Points"))
+
+def marketing_rows(data):
+    return column_rows(data, 'marche_marketing_table', ("Élément", "Stratégie"))
+
+def concurrents_rows(data):
+    return column_rows(data, 'marche_concurrents_table', ("Type", "Nom", "Localisation", "Description"))
+
+def projections_rows(data):
+    rows = column_rows(data, 'projections_table', ("Année", "Visiteurs", "Ventes"))
+    if rows is not None:
+        for row in rows[1:]:
+            row[0] = str(row[0])
+    return rows
+
+def comparatif_tables(data):
+    """
+    Tableaux de la matrice comparative : liste de (titre, lignes), un par groupe de
+    COMPARATIF_COLUMNS_PER_TABLE concurrents (titre None s'il n'y a qu'un tableau) ;
+    None si la matrice n'a aucun critère. Seules les cellules remplies sont lues.
+    """
+    matrix = CompetitorMatrix.from_report(data)
+    if not matrix.criteria:
+        return None
+    # Nom personnalisé de la colonne des critères
+    header = data.get("criteres_column_name", "Critères/Concurrents")
+    # Seuls les concurrents nommés ont une colonne
+    competitors = [competitor for competitor in matrix.competitors if competitor[1]]
+    size = COMPARATIF_COLUMNS_PER_TABLE
+    if len(competitors) <= size:
+        return [(None, [[header] + [name for _, name in competitors]] + matrix.rows(competitors))]
+    tables = []
+    for start in range(0, len(competitors), size):
+        group = competitors[start:start + size]
+        title = f"Concurrents {start + 1} à {start + len(group)} sur {len(competitors)}"
+        tables.append((title, [[header] + [name for _, name in group]] + matrix.rows(group)))
+    return tables
+
+# Tableau à une colonne de critères suivie d'une colonne par concurrent (toutes les autres colonnes)
+def criteria_rows(data, key, criteria_column):
+    if key not in data:
+        return None
+    criteres = data[key].get(criteria_column, [])
+    if not criteres:
+        return None
+    concurrents = [col for col in data[key].keys() if col != criteria_column]
+    rows = [[criteria_column] + concurrents]
+    for i, critere in enumerate(criteres):
+        row = [critere]
+        for concurrent in concurrents:
+            values = data[key].get(concurrent, [])
+            row.append(values[i] if i < len(values) else "")
+        rows.append(row)
+    return rows
+
+def fonctionnalites_rows(data):
+    return criteria_rows(data, 'marche_comparison_table', 'Critères')
+
+def matrice_rows(data):
+    return criteria_rows(data, 'marche_matrice_table', 'Critère')
+
+# Lignes d'un tableau du modèle d'affaires : colonnes de même longueur (table normalisée)
+def modele_rows(columns):
+    return [list(columns.keys())] + [list(row) for row in zip(*columns.values())]
+
+# Images des détails techniques : (empreinte, légende) des lignes qui ont une image
+def tech_image_rows(data):
+    columns = data.get('tech_images') or {}
+    legendes = columns.get('Légende', [])
+    return [
+        (image, legendes[i] if i < len(legendes) else "")
+        for i, image in enumerate(columns.get('Image', [])) if image
+    ]
+
+# Tableaux vides affichés quand les données d'une section manquent
+EMPTY_ROWS = {
+    'cibles': [
+        ["Segment", "Bénéfices"],
+        ["", ""],
+        ["", ""]
+    ],
+    'swot': [
+        ["Catégorie", "Points"],
+        ["Forces", ""],
+        ["Faiblesses", ""],
+        ["Opportunités", ""],
+        ["Menaces", ""]
+    ],
+    'marketing': [
+        ["Élément", "Stratégie"],
+        ["Produit", ""],
+        ["Prix", ""],
+        ["Place", ""],
+        ["Promotion", ""]
+    ],
+    'concurrents': [
+        ["Type", "Nom", "Localisation", "Description"],
+        ["", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""]
+    ],
+    'comparatif': [
+        ["Critère", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""]
+    ],
+    'fonctionnalites': [
+        ["Fonctionnalité", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""]
+    ],
+    'matrice': [
+        ["Critère", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""],
+        ["", "", "", ""]
+    ],
+    'projections': [
+        ["Année", "Visiteurs", "Ventes"],
+        ["", "", ""],
+        ["", "", ""],
+        ["", "", ""]
+    ],
+}
+
+# Textes de la légende du tableau comparatif détaillé
+COMPARATIF_LEGEND = [
+    "+ : Service présent",
+    "- : Service absent",
+    "T : Service partiellement présent",
+]
+
+# Cadres des images (points) : logo de la fiche d'identité, illustrations techniques
+LOGO_BOX = (1.8*inch, 1.0*inch)
+TECH_IMAGE_HEIGHT = 3.5*inch
+
+# Tableaux détaillés du modèle d'affaires : (clé, titre)
+MODELE_TABLES = [
+    ('modele_partenaires', "Partenaires Clés"),
+    ('modele_activites', "Activités Clés"),
+    ('modele_proposition', "Proposition de Valeur"),
+    ('modele_relations', "Relations Clients"),
+    ('modele_segments', "Segments Clients"),
+    ('modele_ressources', "Ressources Clés"),
+    ('modele_couts', "Structure de Coûts"),
+    ('modele_canaux', "Canaux"),
+    ('modele_revenus', "Sources de Revenus"),
+]
+
+# Sous-parties techniques : (clé du titre, titre par défaut, style du titre, clé du contenu, espace après)
+TECH_PARTS = [
+    ('tech_title_electronique', "Partie Électronique", 'heading3', 'tech_electronique', 0.1),
+    ('tech_title_materiaux', "Partie Étude des Matériaux", 'heading3', 'tech_materiaux', 0.2),
+    ('tech_title_application', "1.2 Application Mobile", 'heading2', 'tech_application', 0.2),
+    ('tech_title_algorithmes', "1.3 Algorithmes et Traitement des Données", 'heading2', 'tech_algorithmes', 0.2),
+    ('tech_title_interface', "1.4 Interface Utilisateur et Expérience", 'heading2', 'tech_interface', 0.2),
+    ('tech_title_tests', "1.5 Tests et Validation", 'heading2', 'tech_tests', 0.2),
+    # Sections originales
+    ('tech_title_section2', "2. Prototype", 'heading2', 'comp', 0.2),
+    ('tech_title_section3', "3. Application Mobile", 'heading2', 'app', 0.2),
+    ('tech_title_section4', "4. Processus de Production", 'heading2', 'prod', 0.2),
+]
@@ -0,0 +1,189 @@
+"""
+Export groupé de sauvegardes dans une archive ZIP.
+
+export_reports() rend les PDF d'une sélection de révisions du stockage (report_storage)
+dans un pool de processus et les ajoute à l'archive au fur et à mesure, avec la
+sauvegarde JSON de chaque révision et un manifeste (manifest.json). Au plus
+2 × workers rendus sont en cours à la fois et chaque PDF passe par un fichier
+temporaire recopié par blocs dans l'archive : la mémoire utilisée ne dépend pas du
+nombre de rapports exportés.
+
+    python report_export.py -o export.zip [--company ACME ...] [--all-revisions] [-j 4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from report_storage import open_storage
+
+MANIFEST_NAME = "manifest.json"
+
+
+def latest_revisions(storage, companies=None):
+    """Révision la plus récente de chaque entreprise (ou des entreprises données)."""
+    latest = {}
+    for revision in storage.revisions():
+        if revision.company not in latest and (companies is None or revision.company in companies):
+            latest[revision.company] = revision
+    return sorted(latest.values(), key=lambda revision: revision.company)
+
+
+def archive_name(revision):
+    """Nom de base des fichiers d'une révision dans l'archive : <entreprise>_<horodatage>."""
+    return f"{revision.company}_{datetime.fromtimestamp(revision.created_at).strftime('%Y%m%d_%H%M%S')}"
+
+
+# Exécuté dans un processus du pool : retourne (pages, taille, durée)
+def _render(data, pdf_path):
+    # ReportLab n'est chargé qu'au premier rendu : l'application importe ce module au démarrage
+    import report_pdf
+
+    start = time.perf_counter()
+    pages = []
+    size = report_pdf.render_pdf_file(data, pdf_path, on_page=pages.append)
+    return (pages[-1] if pages else 0), size, time.perf_counter() - start
+
+
+def _executor(workers, use_processes):
+    if use_processes:
+        # spawn plutôt que fork : l'appelant (serveur Streamlit) peut avoir des threads actifs
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+
+
+def export_reports(storage, revisions, output, workers=None, use_processes=True, on_progress=None):
+    """
+    Écrit dans output (chemin ou fichier binaire) une archive ZIP avec, pour chaque
+    révision, sa sauvegarde JSON (json/) et son PDF (pdf/), plus le manifeste.
+    on_progress(terminés, total) est appelé après chaque rapport. Retourne les entrées
+    du manifeste, dans l'ordre des révisions ; un rapport en erreur n'arrête pas l'export.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    entries = []
+    names = set()
+    done = 0
+
+    def finish(future):
+        nonlocal done
+        entry, pdf_path = pending.pop(future)
+        try:
+            entry["pages"], entry["pdf_bytes"], entry["seconds"] = future.result()
+            archive.write(pdf_path, entry["pdf"], compress_type=zipfile.ZIP_STORED)
+        except Exception as e:
+            entry["pdf"] = None
+            entry["error"] = str(e)
+        finally:
+            try:
+                os.remove(pdf_path)
+            except OSError:
+                pass
+        done += 1
+        if on_progress:
+            on_progress(done, len(revisions))
+
+    with tempfile.TemporaryDirectory(prefix="export-") as tmp, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive, \
+            _executor(workers, use_processes) as executor:
+        pending = {}
+        for revision in revisions:
+            # Noms uniques même pour deux révisions de la même seconde
+            name = base = archive_name(revision)
+            suffix = 2
+            while name in names:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            names.add(name)
+            entry = {
+                "company": revision.company,
+                "revision": revision.id,
+                "created_at": datetime.fromtimestamp(revision.created_at).isoformat(timespec="seconds"),
+                "json": f"json/{name}.json",
+                "pdf": f"pdf/{name}.pdf",
+                "pages": None,
+                "pdf_bytes": None,
+                "seconds": None,
+                "error": None,
+            }
+            entries.append(entry)
+
+            data = storage.load(revision.id)
+            if data is None:
+                entry["json"] = entry["pdf"] = None
+                entry["error"] = "révision introuvable"
+                done += 1
+                if on_progress:
+                    on_progress(done, len(revisions))
+                continue
+            archive.writestr(entry["json"], json.dumps(data, ensure_ascii=False, indent=4))
+
+            # Borner les rendus en cours : les données et les PDF en attente restent peu nombreux
+            while len(pending) >= max_in_flight:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    finish(future)
+            pdf_path = os.path.join(tmp, f"{len(entries)}.pdf")
+            pending[executor.submit(_render, data, pdf_path)] = (entry, pdf_path)
+            del data
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                finish(future)
+
+        manifest = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "reports": len(entries),
+            "errors": sum(1 for entry in entries if entry["error"]),
+            "entries": entries,
+        }
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=4, default=str))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporte des sauvegardes (JSON et PDF) dans une archive ZIP.")
+    parser.add_argument("-o", "--output", default="export_rapports.zip", help="archive à créer (défaut : export_rapports.zip)")
+    parser.add_argument("--company", nargs="+", default=None, help="entreprises à exporter (défaut : toutes)")
+    parser.add_argument("--all-revisions", action="store_true", help="toutes les révisions, pas seulement la plus récente")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("--storage", choices=["file", "sqlite"], default=None, help="stockage (défaut : REPORT_STORAGE ou file)")
+    parser.add_argument("--path", default=None, help="dossier ou base de données (défaut : REPORT_STORAGE_PATH)")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage, args.path)
+    if args.all_revisions:
+        revisions = [
+            revision for revision in storage.revisions()
+            if args.company is None or revision.company in args.company
+        ]
+    else:
+        revisions = latest_revisions(storage, args.company)
+    if not revisions:
+        print("Aucune sauvegarde à exporter.")
+        return 1
+
+    start = time.perf_counter()
+    entries = export_reports(
+        storage, revisions, args.output, args.workers,
+        on_progress=lambda done, total: print(f"\r{done}/{total} rapport(s)", end="", flush=True)
+    )
+    print()
+    for entry in entries:
+        if entry["error"]:
+            print(f"{entry['company']} ({entry['created_at']}) : {entry['error']}")
+    errors = sum(1 for entry in entries if entry["error"])
+    print(f"{len(entries) - errors} rapport(s) exporté(s), {errors} erreur(s) dans {args.output} "
+          f"en {time.perf_counter() - start:.2f}s")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
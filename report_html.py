@@ -0,0 +1,333 @@
+"""
+Aperçu HTML du rapport.
+
+build_html() produit, à partir des mêmes données que report_pdf.generate_pdf, une page
+HTML de même structure (fiche d'identité, SWOT, 4P, tableaux comparatifs, Business
+Model Canvas, parties techniques...) sans mise en page ReportLab : l'aperçu peut être
+reconstruit à chaque modification, seul l'export paie la construction du PDF. Les
+lignes des tableaux viennent des mêmes fonctions que le PDF (report_content :
+cibles_rows, swot_rows...) et les sections suivent report_sections.SECTION_KEYS ;
+l'aperçu ne charge donc pas ReportLab.
+
+Avec un cache de sections, une section n'est régénérée que si l'une des valeurs
+qu'elle lit a changé.
+"""
+import base64
+import html
+import re
+
+from report_content import (
+    BMC_COLORS, COMPARATIF_COLUMNS_PER_TABLE, COMPARATIF_LEGEND, EMPTY_ROWS, LOGO_BOX, MODELE_TABLES,
+    PDF_LAYOUT, TECH_IMAGE_HEIGHT, TECH_PARTS, comparatif_tables, concurrents_rows, cibles_rows,
+    fonctionnalites_rows, identite_rows, marketing_rows, matrice_rows, modele_rows, projections_rows,
+    swot_rows, tech_image_rows,
+)
+from report_images import PREVIEW_DPI, fit_box, open_image_store
+from report_model import normalize_report
+from report_sections import SECTION_KEYS, select_sections
+
+# Largeur utile de la page du PDF (points), pour le cadre des illustrations
+PAGE_WIDTH = PDF_LAYOUT['pagesize'][0] - PDF_LAYOUT['leftMargin'] - PDF_LAYOUT['rightMargin']
+
+# Balises de mise en forme ReportLab reprises dans l'aperçu ; le reste du texte est échappé
+INLINE_TAGS = re.compile(r"&lt;(/?)(b|i|u|strike|sub|sup|br ?/?)&gt;", re.IGNORECASE)
+
+# Feuille de style : page A4, polices et tableaux proches de ceux du PDF
+PREVIEW_CSS = """
+body { margin: 0; background: #f0f2f6; }
+.page { box-sizing: border-box; max-width: 210mm; margin: 0 auto; padding: 18mm;
+        background: white; font: 10pt/12pt Helvetica, Arial, sans-serif; color: black; }
+h1, h2, h3 { font-family: Helvetica, Arial, sans-serif; font-weight: bold; }
+h1 { font-size: 16pt; margin: 12pt 0 10pt; }
+h1.title { font-size: 18pt; text-align: center; }
+h2 { font-size: 14pt; margin: 10pt 0 8pt; }
+h3 { font-size: 12pt; margin: 8pt 0 6pt; }
+p { margin: 0 0 2pt; }
+section { margin-bottom: 14pt; }
+table { border-collapse: collapse; margin: 4pt 0 8pt; table-layout: fixed; }
+th, td { border: 0.5pt solid black; padding: 6pt; text-align: left; vertical-align: middle;
+         font-weight: normal; overflow-wrap: anywhere; }
+th { background: lightgrey; }
+table.compact th, table.compact td { padding: 4pt; }
+.bmc { display: grid; grid-template-columns: repeat(10, 1fr); gap: 0; margin: 4pt 0 8pt; }
+.bmc div { border: 1pt solid black; padding: 4pt; font-size: 9pt; line-height: 12pt; min-height: 60pt; }
+.bmc h4 { margin: 0 0 6pt; font-size: 12pt; text-align: center; }
+.footer { margin-top: 36pt; text-align: center; font-size: 8pt; }
+.logo { margin: 0 0 6pt; }
+figure { margin: 6pt 0 14pt; text-align: center; }
+figcaption { font-size: 9pt; font-style: italic; }
+"""
+
+# Cases du Business Model Canvas : (clé, titre, emplacement dans la grille de 10 colonnes)
+BMC_BOXES = [
+    ('partenaires', "Partenaires Clés", "1 / 1 / 3 / 3"),
+    ('activites', "Activités Clés", "1 / 3 / 2 / 5"),
+    ('ressources', "Ressources Clés", "2 / 3 / 3 / 5"),
+    ('proposition', "Proposition de Valeur", "1 / 5 / 3 / 7"),
+    ('relations', "Relations avec les Clients", "1 / 7 / 2 / 9"),
+    ('canaux', "Canaux", "2 / 7 / 3 / 9"),
+    ('segments', "Segments de Clientèle", "1 / 9 / 3 / 11"),
+    ('couts', "Structure de Coûts", "3 / 1 / 4 / 6"),
+    ('revenus', "Sources de Revenus", "3 / 6 / 4 / 11"),
+]
+
+
+def inline(text):
+    """Texte d'un champ en HTML : échappé, sauf les balises de mise en forme de INLINE_TAGS."""
+    text = "" if text is None else str(text)
+    return INLINE_TAGS.sub(r"<\1\2>", html.escape(text, quote=False))
+
+
+# Un paragraphe par ligne non vide d'un champ texte, comme add_text_lines
+def text_lines(text):
+    return "".join(f"<p>{inline(line)}</p>" for line in (text or "").split('\n') if line.strip())
+
+
+def table(rows, widths, compact=False):
+    """Tableau HTML : la première ligne est l'en-tête, widths les largeurs relatives à la page."""
+    # Largeur totale : certains tableaux du PDF n'occupent pas toute la page
+    parts = [f'<table class="{"compact" if compact else ""}" style="width:{sum(widths) * 100:.2f}%"><colgroup>']
+    parts.extend(f'<col style="width:{width / sum(widths) * 100:.2f}%">' for width in widths)
+    parts.append('</colgroup><tr>')
+    parts.extend(f'<th>{inline(cell)}</th>' for cell in rows[0])
+    parts.append('</tr>')
+    for row in rows[1:]:
+        parts.append('<tr>')
+        parts.extend(f'<td>{inline(cell)}</td>' for cell in row)
+        parts.append('</tr>')
+    parts.append('</table>')
+    return "".join(parts)
+
+
+def image(digest, box_width, box_height):
+    """
+    Image du stockage à la taille qu'elle a dans le PDF, intégrée en data URI : variante
+    à la définition de l'écran (PREVIEW_DPI), créée une fois puis relue.
+    """
+    try:
+        variant = open_image_store().variant(digest, box_width, box_height, dpi=PREVIEW_DPI)
+        with open(variant.path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode("ascii")
+    except (OSError, ValueError):
+        return f"<p><i>Image introuvable : {html.escape(str(digest)[:12])}</i></p>"
+    width, height = fit_box(variant.width, variant.height, box_width, box_height)
+    mime = "image/png" if variant.path.endswith(".png") else "image/jpeg"
+    return f'<img src="data:{mime};base64,{encoded}" style="width:{width:.0f}pt;height:{height:.0f}pt" alt="">'
+
+
+# ---------------------------------------------------------------------------
+# Sections de l'aperçu : une fonction par section de report_sections.SECTION_KEYS,
+# qui reçoit les données normalisées et retourne le HTML de la section.
+# ---------------------------------------------------------------------------
+
+def html_section_titre(data):
+    return f'<h1 class="title">{inline(data.get("projet_titre", "Rapport"))}</h1>'
+
+def html_section_description(data):
+    return (
+        "<h1>PRÉSENTATION DU PROJET</h1>"
+        "<h2>1. Description du Projet</h2>"
+        f"<p><b>Problématique :</b> {inline(data.get('pres_prob', ''))}</p>"
+        "<p><b>Solution proposée :</b></p>"
+        + text_lines(data.get('pres_solution', ''))
+    )
+
+def html_section_identite(data):
+    logo = f'<div class="logo">{image(data["ident_logo"], *LOGO_BOX)}</div>' if data.get('ident_logo') else ""
+    return "<h2>2. Fiche d'Identité</h2>" + logo + table(identite_rows(data), [1/3, 2/3])
+
+def html_section_objectifs(data):
+    return (
+        "<h2>3. Objectifs et Vision</h2>"
+        "<p><b>Objectifs Principaux :</b></p>"
+        + text_lines(data.get('pres_objectifs', ''))
+        + "<p><b>Objectifs de Développement Durable :</b></p>"
+        + text_lines(data.get('pres_odd', ''))
+        + f"<p><b>Mission :</b> {inline(data.get('pres_mission', ''))}</p>"
+        f"<p><b>Vision :</b> {inline(data.get('pres_vision', ''))}</p>"
+    )
+
+def html_section_realisations(data):
+    return "<h2>4. Réalisations Accomplies</h2>" + text_lines(data.get('pres_realisations', ''))
+
+def html_section_tendances(data):
+    return (
+        "<h1>ANALYSE DE MARCHÉ</h1>"
+        "<h2>1. Tendances du Marché</h2>"
+        + text_lines(data.get('marche_tendances', ''))
+    )
+
+def html_section_cibles(data):
+    return "<h2>2. Cibles Principales</h2>" + table(cibles_rows(data) or EMPTY_ROWS['cibles'], [1/2, 1/2])
+
+def html_section_swot(data):
+    return "<h2>3. Analyse SWOT</h2>" + table(swot_rows(data) or EMPTY_ROWS['swot'], [1/3, 2/3])
+
+def html_section_marketing(data):
+    return "<h2>4. Marketing Mix (4P)</h2>" + table(marketing_rows(data) or EMPTY_ROWS['marketing'], [1/3, 2/3])
+
+def html_section_concurrents(data):
+    return (
+        "<h2>5. Analyse Concurrentielle</h2>"
+        "<h3>Tableau Comparatif des Concurrents</h3>"
+        + table(concurrents_rows(data) or EMPTY_ROWS['concurrents'], [1/6, 1/6, 1/6, 1/2], compact=True)
+    )
+
+def html_section_comparatif(data):
+    tables = comparatif_tables(data)
+    parts = ["<h3>Tableau Comparatif Détaillé des Concurrents</h3>"]
+    if tables is None:
+        parts.append(table(EMPTY_ROWS['comparatif'], [1/2, 1/6, 1/6, 1/6], compact=True))
+    else:
+        for title, rows in tables:
+            count = len(rows[0]) - 1
+            if title is not None:
+                # Même découpage que le PDF
+                parts.append(f"<p><i>{inline(title)}</i></p>")
+                widths = [1/4] + [3/(4*COMPARATIF_COLUMNS_PER_TABLE)] * count
+            else:
+                widths = [1/3] + [1/(3*count)] * count if count else [1/3]
+            parts.append(table(rows, widths, compact=True))
+    legend = "".join(f"<p>• {inline(item)}</p>" for item in COMPARATIF_LEGEND)
+    return "".join(parts) + "<p><b>Légende :</b></p>" + legend
+
+def html_section_fonctionnalites(data):
+    rows = fonctionnalites_rows(data) or EMPTY_ROWS['fonctionnalites']
+    return (
+        "<h3>Comparaison des Fonctionnalités Clés</h3>"
+        + table(rows, [1/len(rows[0])] * len(rows[0]), compact=True)
+    )
+
+def html_section_analyse(data):
+    return "<h3>Analyse Comparative</h3>" + text_lines(data.get('marche_analyse', ''))
+
+def html_section_matrice(data):
+    rows = matrice_rows(data)
+    if rows is not None:
+        # Matrice réduite à la colonne des critères : aucune colonne à répartir
+        count = len(rows[0]) - 1
+        widths = [1/3] + ([1/(3*count)] * count if count else [])
+    else:
+        rows = EMPTY_ROWS['matrice']
+        widths = [1/2, 1/6, 1/6, 1/6]
+    return "<h3>Matrice de Comparaison</h3>" + table(rows, widths, compact=True)
+
+def html_section_bmc(data):
+    boxes = []
+    for key, title, area in BMC_BOXES:
+        boxes.append(
+            f'<div style="grid-area:{area};background:{BMC_COLORS[key]}">'
+            f'<h4>{title}</h4>{text_lines(data.get(f"bmc_{key}", ""))}</div>'
+        )
+    return f'<h2>Business Model Canvas</h2><div class="bmc">{"".join(boxes)}</div>'
+
+def html_section_modele(data):
+    parts = ["<h2>Modèle d'Affaires</h2>"]
+    for key, title in MODELE_TABLES:
+        if key not in data:
+            continue
+        parts.append(f"<h3>{title}</h3>")
+        columns = data[key]
+        if not columns:
+            parts.append(f"<p>Format de données non reconnu pour {title}</p>")
+            continue
+        rows = modele_rows(columns)
+        if len(rows) > 1:
+            parts.append(table(rows, [1/len(rows[0])] * len(rows[0]), compact=True))
+        else:
+            parts.append("<p>Données insuffisantes pour créer le tableau</p>")
+    return "".join(parts)
+
+def html_section_strategie(data):
+    parts = [
+        "<h1>STRATÉGIE COMMERCIALE</h1>",
+        "<h2>1. Cibles Commerciales</h2>",
+        "<h3>Particuliers</h3>",
+        text_lines(data.get('part', '')),
+    ]
+    if 'projections_table' in data:
+        parts.append(table(projections_rows(data) or EMPTY_ROWS['projections'], [1/3, 1/3, 1/3]))
+    for title, key in (("Associations", 'assoc'), ("Établissements Scolaires", 'ecoles'), ("Entreprises", 'entrep')):
+        parts.append(f"<h3>{title}</h3>")
+        parts.append(text_lines(data.get(key, '')))
+    return "".join(parts)
+
+def html_section_technique(data):
+    parts = [
+        f"<h1>{inline(data.get('tech_title_main', 'DÉTAILS TECHNIQUES'))}</h1>",
+        f"<h2>{inline(data.get('tech_title_etude', '1. Étude technique du projet'))}</h2>",
+        f"<h2>{inline(data.get('tech_title_prototype', '1.1 Prototype'))}</h2>",
+    ]
+    for title_key, default_title, title_style, content_key, space_after in TECH_PARTS:
+        tag = 'h2' if title_style == 'heading2' else 'h3'
+        parts.append(f"<{tag}>{inline(data.get(title_key, default_title))}</{tag}>")
+        parts.append(text_lines(data.get(content_key, '')))
+    images = tech_image_rows(data)
+    if images:
+        parts.append("<h3>Illustrations</h3>")
+        for digest, legende in images:
+            caption = f"<figcaption>{inline(legende)}</figcaption>" if legende else ""
+            parts.append(f"<figure>{image(digest, PAGE_WIDTH, TECH_IMAGE_HEIGHT)}{caption}</figure>")
+    return "".join(parts)
+
+def html_section_pied(data):
+    return '<p class="footer">© Tous droits réservés</p>'
+
+HTML_SECTIONS = {
+    'titre': html_section_titre,
+    'description': html_section_description,
+    'identite': html_section_identite,
+    'objectifs': html_section_objectifs,
+    'realisations': html_section_realisations,
+    'tendances': html_section_tendances,
+    'cibles': html_section_cibles,
+    'swot': html_section_swot,
+    'marketing': html_section_marketing,
+    'concurrents': html_section_concurrents,
+    'comparatif': html_section_comparatif,
+    'fonctionnalites': html_section_fonctionnalites,
+    'analyse': html_section_analyse,
+    'matrice': html_section_matrice,
+    'bmc': html_section_bmc,
+    'modele': html_section_modele,
+    'strategie': html_section_strategie,
+    'technique': html_section_technique,
+    'pied': html_section_pied,
+}
+
+
+# Vrai si les valeurs lues par une section n'ont pas changé depuis sa mise en cache
+def unchanged(previous, current):
+    return all(old is new or old == new for old, new in zip(previous, current))
+
+
+def build_html(data, section_cache=None, sections=None, on_section=None):
+    """
+    Page HTML de l'aperçu : toutes les sections, ou celles de la liste sections (noms
+    de sections et de chapitres, comme pour report_pdf.generate_pdf). Si un cache
+    (dictionnaire) est fourni, le HTML d'une section est réutilisé tant que les valeurs
+    qu'elle lit n'ont pas changé ; seules ces valeurs sont normalisées.
+    on_section(nom, régénérée) est appelé après chaque section.
+    """
+    selected = select_sections(sections)
+    body = []
+    for name, keys in SECTION_KEYS:
+        if selected is not None and name not in selected:
+            continue
+        values = tuple(data.get(key) for key in keys)
+        cached = section_cache.get(name) if section_cache is not None else None
+        rebuilt = cached is None or not unchanged(cached[0], values)
+        if rebuilt:
+            fragment = HTML_SECTIONS[name](normalize_report({key: data[key] for key in keys if key in data}))
+            if section_cache is not None:
+                section_cache[name] = (values, fragment)
+        else:
+            fragment = cached[1]
+        body.append(f'<section id="{name}">{fragment}</section>')
+        if on_section:
+            on_section(name, rebuilt)
+    return (
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">'
+        f'<style>{PREVIEW_CSS}</style></head><body><div class="page">{"".join(body)}</div></body></html>'
+    )
+
@@ -0,0 +1,173 @@
+"""
+Images du rapport (logo, photos du prototype, captures d'écran).
+
+Les images déposées sont rangées dans un stockage adressé par le contenu : le fichier
+porte l'empreinte SHA-256 de ses octets et le rapport n'enregistre que cette
+empreinte. Une image déposée deux fois n'est stockée qu'une fois et les sauvegardes
+restent petites.
+
+Le PDF et l'aperçu ne lisent jamais l'original : variant() le réduit une fois avec
+PIL à la définition voulue pour son cadre (points × dpi / 72), le réencode (JPEG, ou
+PNG s'il est transparent) et garde cette variante sur disque. Les rendus suivants
+relisent la variante : une photo de plusieurs mégapixels n'est plus décodée ni
+embarquée en pleine résolution à chaque PDF.
+"""
+import hashlib
+import io
+import math
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+# Limites d'une image déposée
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_IMAGE_PIXELS = 50_000_000
+
+# Formats acceptés (formats PIL, puis extensions proposées au dépôt)
+IMAGE_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+IMAGE_TYPES = ["png", "jpg", "jpeg", "gif", "webp"]
+
+# Définition des variantes : PDF imprimable, aperçu à l'écran
+PDF_DPI = 150
+PREVIEW_DPI = 96
+JPEG_QUALITY = 85
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Variante d'une image : fichier et taille en pixels
+ImageVariant = namedtuple("ImageVariant", ["path", "width", "height"])
+
+
+class ImageError(ValueError):
+    """Image refusée : le message est destiné à l'utilisateur."""
+
+
+def is_digest(value):
+    return isinstance(value, str) and DIGEST_PATTERN.fullmatch(value) is not None
+
+
+def fit_box(width, height, box_width, box_height):
+    """Taille d'une image de width × height pixels agrandie ou réduite pour tenir dans le cadre."""
+    scale = min(box_width / width, box_height / height)
+    return width * scale, height * scale
+
+
+# Écriture atomique : un rendu concurrent ne lit jamais un fichier partiel
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+
+
+class ImageStore:
+    """
+    Stockage des images : originals/<empreinte> pour les fichiers déposés,
+    variants/<empreinte>_<largeur>x<hauteur>.<jpg|png> pour les variantes réduites.
+    Les fichiers ne sont jamais modifiés une fois écrits : le stockage peut être lu par
+    plusieurs sessions et par les processus de rendu sans verrou.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.originals_dir = os.path.join(root, "originals")
+        self.variants_dir = os.path.join(root, "variants")
+        os.makedirs(self.originals_dir, exist_ok=True)
+        os.makedirs(self.variants_dir, exist_ok=True)
+
+    def original_path(self, digest):
+        if not is_digest(digest):
+            raise ImageError(f"Référence d'image invalide : {digest!r}")
+        return os.path.join(self.originals_dir, digest)
+
+    def __contains__(self, digest):
+        return is_digest(digest) and os.path.exists(self.original_path(digest))
+
+    def put(self, data):
+        """Vérifie et enregistre une image (octets) ; retourne son empreinte."""
+        if len(data) > MAX_IMAGE_BYTES:
+            raise ImageError(f"Image trop volumineuse (plus de {MAX_IMAGE_BYTES // (1024 * 1024)} Mo).")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.original_path(digest)
+        if not os.path.exists(path):
+            self._check(data)
+            _write_atomic(path, lambda f: f.write(data))
+        return digest
+
+    def _check(self, data):
+        from PIL import Image
+
+        # Seul l'en-tête est lu : format et dimensions, sans décoder l'image
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format, (width, height) = image.format, image.size
+        except Exception:
+            raise ImageError("Le fichier n'est pas une image lisible.")
+        if image_format not in IMAGE_FORMATS:
+            raise ImageError(f"Format d'image non pris en charge : {image_format}.")
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ImageError(f"Image trop grande ({width} × {height} pixels).")
+
+    def variant(self, digest, box_width, box_height, dpi=PDF_DPI):
+        """
+        Variante de l'image pour un cadre de box_width × box_height points à dpi points
+        par pouce, créée au premier appel. L'image n'est jamais agrandie.
+        """
+        from PIL import Image
+
+        max_width = max(1, math.ceil(box_width * dpi / 72))
+        max_height = max(1, math.ceil(box_height * dpi / 72))
+        original = self.original_path(digest)
+        with Image.open(original) as image:
+            ext = "png" if _has_alpha(image) else "jpg"
+            path = os.path.join(self.variants_dir, f"{digest}_{max_width}x{max_height}.{ext}")
+            if not os.path.exists(path):
+                self._make_variant(image, path, ext, max_width, max_height)
+        # L'en-tête de la variante suffit pour connaître sa taille
+        with Image.open(path) as variant:
+            return ImageVariant(path, *variant.size)
+
+    def _make_variant(self, image, path, ext, max_width, max_height):
+        from PIL import Image, ImageOps
+
+        # JPEG : décoder directement à une échelle réduite (1/2, 1/4, 1/8) au lieu de la
+        # pleine résolution ; le cadre est pris carré, l'orientation EXIF pouvant le tourner
+        side = max(max_width, max_height)
+        image.draft("RGB", (side, side))
+        image = ImageOps.exif_transpose(image)
+        if ext == "png":
+            image = image.convert("RGBA")
+        else:
+            image = image.convert("RGB")
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+        if ext == "png":
+            _write_atomic(path, lambda f: image.save(f, "PNG", optimize=True))
+        else:
+            _write_atomic(path, lambda f: image.save(f, "JPEG", quality=JPEG_QUALITY, optimize=True))
+
+
+_stores = {}
+
+def open_image_store(path=None):
+    """
+    Stockage des images : dossier donné, sinon REPORT_IMAGES_PATH, sinon saved_data/images.
+    Un seul ImageStore par dossier et par processus.
+    """
+    path = path or os.environ.get("REPORT_IMAGES_PATH") or os.path.join("saved_data", "images")
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = ImageStore(path)
+    return store
+
@@ -0,0 +1,263 @@
+"""
+Import des sauvegardes JSON du rapport.
+
+La sauvegarde est lue par morceaux et l'objet de premier niveau est analysé clé par clé :
+chaque valeur est validée contre le schéma des données du rapport dès qu'elle est
+complète, et un fichier trop volumineux ou mal formé est rejeté sans avoir été
+entièrement décodé. La mémoire nécessaire est bornée par la plus grosse valeur
+(MAX_VALUE_BYTES) et non par la taille du fichier.
+"""
+import codecs
+import json
+import re
+
+from report_images import is_digest
+
+# Limites d'un import
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+MAX_VALUE_BYTES = 5 * 1024 * 1024
+MAX_TABLE_ROWS = 10000
+# Tables plus longues : une ligne par cellule remplie de la matrice des concurrents
+TABLE_MAX_ROWS = {'competitor_cells': 250000}
+CHUNK_SIZE = 64 * 1024
+
+# Champs texte saisis avec create_input
+TEXT_KEYS = {
+    'projet_titre', 'pres_prob', 'pres_solution',
+    'ident_rs', 'ident_slogan', 'ident_objet_social', 'ident_domaines',
+    'ident_siege', 'ident_forme', 'ident_associes', 'ident_valeurs',
+    'pres_objectifs', 'pres_odd', 'pres_mission', 'pres_vision', 'pres_realisations',
+    'marche_titre', 'marche_tendances', 'marche_analyse', 'criteres_column_name',
+    'bmc_partenaires', 'bmc_activites', 'bmc_proposition', 'bmc_relations', 'bmc_segments',
+    'bmc_ressources', 'bmc_canaux', 'bmc_couts', 'bmc_revenus',
+    'strategie_titre', 'part', 'assoc', 'ecoles', 'entrep',
+    'technique_titre', 'tech_title_main', 'tech_title_etude', 'tech_title_prototype',
+    'tech_title_electronique', 'tech_electronique', 'tech_title_materiaux', 'tech_materiaux',
+    'tech_title_application', 'tech_application', 'tech_title_algorithmes', 'tech_algorithmes',
+    'tech_title_interface', 'tech_interface', 'tech_title_tests', 'tech_tests',
+    'tech_title_section2', 'comp', 'tech_title_section3', 'app', 'tech_title_section4', 'prod',
+}
+
+# Champs texte numérotés (concurrents, projections par année)
+TEXT_KEY_PATTERNS = [
+    re.compile(r"competitor_name_\d+"),
+    re.compile(r"vis\d+"),
+    re.compile(r"ventes\d+"),
+]
+
+# Tableaux : clé -> colonnes autorisées (None : colonnes libres)
+TABLE_KEYS = {
+    'marche_cibles_table': {'Segment', 'Bénéfices'},
+    'marche_swot_table': {'Catégorie', 'Points'},
+    'marche_marketing_table': {'Élément', 'Stratégie'},
+    'marche_concurrents_table': {'Type', 'Nom', 'Localisation', 'Description'},
+    'marche_comparison_table': None,
+    'marche_matrice_table': None,
+    'competitors_comparison_table': None,
+    'competitor_list': {'id', 'Concurrent'},
+    'competitor_criteria': {'id', 'Critère'},
+    'competitor_cells': {'Critère', 'Concurrent', 'Valeur'},
+    'modele_partenaires': None,
+    'modele_activites': None,
+    'modele_proposition': None,
+    'modele_relations': None,
+    'modele_segments': None,
+    'modele_ressources': None,
+    'modele_couts': None,
+    'modele_canaux': None,
+    'modele_revenus': None,
+    'projections_table': {'Année', 'Visiteurs', 'Ventes'},
+    'tech_images': {'Image', 'Légende'},
+}
+
+# Références d'images (empreintes du stockage report_images) : champs, et colonne par tableau
+IMAGE_KEYS = {'ident_logo'}
+IMAGE_COLUMNS = {'tech_images': 'Image'}
+
+# Types acceptés dans une cellule de tableau
+CELL_TYPES = (str, int, float, bool, type(None))
+
+
+class ReportImportError(ValueError):
+    """Sauvegarde refusée : le message est destiné à l'utilisateur."""
+
+
+def _format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.0f} Mo"
+    return f"{size / 1024:.0f} Ko"
+
+
+def load_report(fileobj, max_bytes=MAX_IMPORT_BYTES, max_value_bytes=MAX_VALUE_BYTES):
+    """Lit et valide une sauvegarde JSON depuis un fichier binaire ; retourne le dictionnaire."""
+    report = {}
+    for key, value in iter_report_items(fileobj, max_bytes, max_value_bytes):
+        validate_item(key, value)
+        report[key] = value
+    return report
+
+
+def validate_item(key, value):
+    """Vérifie une clé de premier niveau et la forme de sa valeur."""
+    if key in TABLE_KEYS:
+        validate_table(key, value, TABLE_KEYS[key])
+    elif key in IMAGE_KEYS:
+        if value and not is_digest(value):
+            raise ReportImportError(f"Le champ '{key}' doit être une référence d'image.")
+    elif key in TEXT_KEYS or any(pattern.fullmatch(key) for pattern in TEXT_KEY_PATTERNS):
+        if not isinstance(value, str):
+            raise ReportImportError(f"Le champ '{key}' doit être un texte.")
+    else:
+        raise ReportImportError(f"Clé inconnue dans la sauvegarde : '{key}'.")
+
+
+def validate_table(key, value, allowed_columns):
+    max_rows = TABLE_MAX_ROWS.get(key, MAX_TABLE_ROWS)
+    # Deux formats possibles : liste d'enregistrements ou dictionnaire de colonnes
+    if isinstance(value, list):
+        if len(value) > max_rows:
+            raise ReportImportError(f"Le tableau '{key}' dépasse {max_rows} lignes.")
+        for row in value:
+            if not isinstance(row, dict):
+                raise ReportImportError(f"Le tableau '{key}' doit contenir des lignes de type objet.")
+            _check_cells(key, row.keys(), row.values(), allowed_columns)
+        if key in IMAGE_COLUMNS:
+            _check_image_refs(key, [row.get(IMAGE_COLUMNS[key]) for row in value])
+    elif isinstance(value, dict):
+        for column, values in value.items():
+            if not isinstance(values, list):
+                raise ReportImportError(f"La colonne '{column}' du tableau '{key}' doit être une liste.")
+            if len(values) > max_rows:
+                raise ReportImportError(f"Le tableau '{key}' dépasse {max_rows} lignes.")
+            _check_cells(key, [column], values, allowed_columns)
+        if key in IMAGE_COLUMNS:
+            _check_image_refs(key, value.get(IMAGE_COLUMNS[key], []))
+    else:
+        raise ReportImportError(f"Le tableau '{key}' doit être une liste ou un objet de colonnes.")
+
+
+def _check_cells(key, columns, cells, allowed_columns):
+    if allowed_columns is not None:
+        unknown = [column for column in columns if column not in allowed_columns]
+        if unknown:
+            raise ReportImportError(f"Colonne inconnue dans le tableau '{key}' : '{unknown[0]}'.")
+    for cell in cells:
+        if not isinstance(cell, CELL_TYPES):
+            raise ReportImportError(f"Le tableau '{key}' contient une cellule non scalaire.")
+
+
+def _check_image_refs(key, cells):
+    for cell in cells:
+        if cell and not is_digest(cell):
+            raise ReportImportError(
+                f"La colonne '{IMAGE_COLUMNS[key]}' du tableau '{key}' doit contenir des références d'image."
+            )
+
+
+class _Reader:
+    """Tampon de texte alimenté par morceaux depuis un fichier binaire UTF-8."""
+
+    def __init__(self, fileobj, max_bytes):
+        self.fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.pos = 0
+        self.read_bytes = 0
+        self.eof = False
+
+    def fill(self, min_chars=1):
+        """Ajoute au moins min_chars caractères au tampon (sauf fin de fichier)."""
+        # Libérer la partie déjà analysée
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        target = len(self.buffer) + min_chars
+        while not self.eof and len(self.buffer) < target:
+            chunk = self.fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                try:
+                    self.buffer += self.decoder.decode(b"", final=True)
+                except UnicodeDecodeError:
+                    raise ReportImportError("Le fichier n'est pas encodé en UTF-8.")
+                break
+            self.read_bytes += len(chunk)
+            if self.read_bytes > self.max_bytes:
+                raise ReportImportError(
+                    f"Sauvegarde trop volumineuse (plus de {_format_size(self.max_bytes)})."
+                )
+            try:
+                self.buffer += self.decoder.decode(chunk)
+            except UnicodeDecodeError:
+                raise ReportImportError("Le fichier n'est pas encodé en UTF-8.")
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return
+            self.fill()
+
+    def peek(self):
+        self.skip_whitespace()
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars or not char:
+            found = repr(char) if char else "la fin du fichier"
+            raise ReportImportError(
+                f"JSON invalide : {' ou '.join(repr(c) for c in chars)} attendu, {found} trouvé "
+                f"(caractère {self.read_offset()})."
+            )
+        self.pos += 1
+        return char
+
+    def read_offset(self):
+        # Position approximative dans le fichier, pour les messages d'erreur
+        return self.read_bytes - len(self.buffer) + self.pos
+
+    def decode_value(self, decoder, max_value_bytes):
+        """Décode la valeur JSON qui commence à la position courante."""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                # Une valeur qui touche la fin du tampon peut être tronquée (nombre coupé)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ReportImportError(f"JSON invalide : {e.msg} (caractère {self.read_offset()}).")
+            pending = len(self.buffer) - self.pos
+            if pending > max_value_bytes:
+                raise ReportImportError(
+                    f"Une valeur de la sauvegarde dépasse {_format_size(max_value_bytes)}."
+                )
+            # Doubler le tampon avant de réessayer : coût linéaire même pour une grosse valeur
+            self.fill(max(pending, CHUNK_SIZE))
+
+
+def iter_report_items(fileobj, max_bytes=MAX_IMPORT_BYTES, max_value_bytes=MAX_VALUE_BYTES):
+    """Génère les paires (clé, valeur) de l'objet JSON de premier niveau, au fil de la lecture."""
+    reader = _Reader(fileobj, max_bytes)
+    decoder = json.JSONDecoder()
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                reader.expect('"')
+            key = reader.decode_value(decoder, max_value_bytes)
+            reader.expect(":")
+            value = reader.decode_value(decoder, max_value_bytes)
+            yield key, value
+            if reader.expect(",}") == "}":
+                break
+
+    if reader.peek():
+        raise ReportImportError("JSON invalide : contenu inattendu après l'objet principal.")
@@ -0,0 +1,318 @@
+"""
+Modèle des données du rapport.
+
+Toutes les tables du rapport ont une seule forme en mémoire : un dictionnaire de
+colonnes (nom -> liste de valeurs), toutes de la même longueur. Les anciens formats
+(liste d'enregistrements de st.data_editor, colonnes de longueurs différentes) sont
+convertis une fois, à l'entrée (import, édition) ; le PDF et l'export lisent ensuite
+directement les colonnes, sans tester le format de chaque table.
+
+Le format colonnes est aussi plus compact qu'une liste d'enregistrements : un seul
+dictionnaire par table au lieu d'un par ligne.
+
+ReportStore garde les données d'une session : les valeurs y sont remplacées, jamais
+modifiées sur place, ce qui permet de passer des instantanés aux rendus et aux exports
+sans les copier.
+
+CompetitorMatrix lit la matrice comparative des concurrents, enregistrée en trois
+tables : les concurrents et les critères (avec un identifiant stable) et les seules
+cellules remplies.
+"""
+from report_tables import TABLES_TO_CONVERT, records_to_columns
+
+
+class Table:
+    """Table en colonnes : `columns` associe à chaque nom de colonne la liste de ses valeurs."""
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns=None):
+        self.columns = columns if columns is not None else {}
+
+    @classmethod
+    def from_value(cls, value, missing=""):
+        """Table depuis une valeur JSON : liste d'enregistrements ou dictionnaire de colonnes."""
+        if isinstance(value, list):
+            return cls(records_to_columns(value, missing))
+        if not isinstance(value, dict):
+            return cls()
+        columns = {name: values if isinstance(values, list) else [] for name, values in value.items()}
+        # Colonnes de longueurs différentes : compléter les plus courtes
+        total = max((len(values) for values in columns.values()), default=0)
+        for name, values in columns.items():
+            if len(values) < total:
+                columns[name] = values + [missing] * (total - len(values))
+        return cls(columns)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Table depuis un DataFrame (conversion colonne par colonne par pandas)."""
+        return cls(df.to_dict('list'))
+
+    @property
+    def names(self):
+        return list(self.columns)
+
+    def __len__(self):
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def __eq__(self, other):
+        return isinstance(other, Table) and self.columns == other.columns
+
+    def __repr__(self):
+        return f"Table({len(self.columns)} colonnes, {len(self)} lignes)"
+
+    def column(self, name, default=None):
+        values = self.columns.get(name)
+        if values is None:
+            return [] if default is None else default
+        return values
+
+    def row(self, position):
+        return [values[position] for values in self.columns.values()]
+
+    def rows(self):
+        """Lignes de la table, dans l'ordre des colonnes."""
+        return [list(row) for row in zip(*self.columns.values())]
+
+    def copy(self):
+        return Table({name: list(values) for name, values in self.columns.items()})
+
+    def take(self, positions):
+        """Nouvelle table réduite aux lignes données (dans cet ordre)."""
+        return Table({name: [values[position] for position in positions] for name, values in self.columns.items()})
+
+    def set_row(self, position, values, missing=""):
+        """Remplace une ligne ; values associe un nom de colonne à sa valeur."""
+        for name, column in self.columns.items():
+            column[position] = values.get(name, missing)
+
+    def append_row(self, values, missing=""):
+        for name, column in self.columns.items():
+            column.append(values.get(name, missing))
+
+    def to_json(self):
+        """Forme JSON : dictionnaire de colonnes (les listes sont partagées avec la table)."""
+        return dict(self.columns)
+
+    def to_records(self):
+        names = list(self.columns)
+        return [dict(zip(names, row)) for row in zip(*self.columns.values())]
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+
+class Report:
+    """Rapport : champs texte (et autres valeurs simples) d'un côté, tables de l'autre."""
+
+    __slots__ = ("fields", "tables")
+
+    TABLE_KEYS = frozenset(TABLES_TO_CONVERT)
+
+    def __init__(self, fields=None, tables=None):
+        self.fields = fields if fields is not None else {}
+        self.tables = tables if tables is not None else {}
+
+    @classmethod
+    def from_json(cls, data):
+        fields = {}
+        tables = {}
+        for key, value in data.items():
+            if key in cls.TABLE_KEYS:
+                tables[key] = value if isinstance(value, Table) else Table.from_value(value)
+            else:
+                fields[key] = value
+        return cls(fields, tables)
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def table(self, key):
+        """Table du rapport, vide si elle n'existe pas."""
+        return self.tables.get(key) or Table()
+
+    def to_json(self):
+        data = dict(self.fields)
+        for key, table in self.tables.items():
+            data[key] = table.to_json()
+        return data
+
+
+class ReportStore:
+    """
+    Données du rapport d'une session, modifiées par le script à chaque rerun.
+    snapshot() retourne un dictionnaire qui ne changera plus : le stockage n'est recopié
+    (superficiellement) qu'à la première écriture qui suit un instantané. Une valeur
+    enregistrée ne doit plus être modifiée sur place : un instantané peut être lu par un
+    autre thread (rendu PDF, sauvegarde automatique) pendant que la session continue.
+    """
+
+    __slots__ = ("_data", "_shared", "version")
+
+    def __init__(self, data=None):
+        self._data = dict(data) if data else {}
+        self._shared = False
+        # Incrémentée à chaque modification
+        self.version = 0
+
+    def _writable(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+        self.version += 1
+        return self._data
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        """Remplace la valeur d'une clé ; retourne False si c'était déjà cette valeur."""
+        if key in self._data and self._data[key] is value:
+            return False
+        self._writable()[key] = value
+        return True
+
+    def update(self, data):
+        if data:
+            self._writable().update(data)
+
+    def clear(self):
+        self._data = {}
+        self._shared = False
+        self.version += 1
+
+    def snapshot(self):
+        """Instantané des données, à lire sans le modifier."""
+        self._shared = True
+        return self._data
+
+
+# Matrice comparative des concurrents : trois tables au format colonnes
+COMPETITOR_LIST_KEY = 'competitor_list'            # id, Concurrent
+COMPETITOR_CRITERIA_KEY = 'competitor_criteria'    # id, Critère
+COMPETITOR_CELLS_KEY = 'competitor_cells'          # Critère, Concurrent (identifiants), Valeur
+COMPETITOR_MATRIX_KEYS = [COMPETITOR_LIST_KEY, COMPETITOR_CRITERIA_KEY, COMPETITOR_CELLS_KEY]
+
+# Ancien format : sept champs competitor_name_i et un tableau dense, une colonne par nom
+LEGACY_COMPETITORS = 7
+LEGACY_MATRIX_KEYS = ['competitors_comparison_table'] + [
+    f"competitor_name_{i}" for i in range(1, LEGACY_COMPETITORS + 1)
+]
+
+
+class CompetitorMatrix:
+    """
+    Matrice comparative : un critère par ligne, un concurrent par colonne. Critères et
+    concurrents sont des listes de (identifiant, nom) ; `cells` associe à
+    (identifiant du critère, identifiant du concurrent) la valeur des seules cellules
+    remplies. Renommer ou supprimer une ligne ne déplace pas les autres cellules, et la
+    taille ne dépend que du nombre de cellules remplies.
+    """
+
+    __slots__ = ("criteria", "competitors", "cells")
+
+    def __init__(self, criteria=None, competitors=None, cells=None):
+        self.criteria = criteria if criteria is not None else []
+        self.competitors = competitors if competitors is not None else []
+        self.cells = cells if cells is not None else {}
+
+    @classmethod
+    def from_report(cls, data):
+        """Matrice des données du rapport (tables normalisées), ou de l'ancien format à défaut."""
+        if any(key in data for key in COMPETITOR_MATRIX_KEYS):
+            return cls(
+                id_list(data.get(COMPETITOR_CRITERIA_KEY), 'Critère'),
+                id_list(data.get(COMPETITOR_LIST_KEY), 'Concurrent'),
+                cells_from_json(data.get(COMPETITOR_CELLS_KEY)),
+            )
+        if 'competitors_comparison_table' in data:
+            return cls.from_legacy(data)
+        return cls()
+
+    @classmethod
+    def from_legacy(cls, data):
+        """Conversion de l'ancien format : concurrents nommés (1 à 7) et critères dans l'ordre."""
+        table = data['competitors_comparison_table']
+        criteres = table.get(data.get("criteres_column_name", "Critères/Concurrents"), [])
+        if not criteres:
+            criteres = table.get('Critères/Concurrents', [])
+        criteria = [(row + 1, critere) for row, critere in enumerate(criteres)]
+        competitors = []
+        cells = {}
+        for i in range(1, LEGACY_COMPETITORS + 1):
+            name = data.get(f"competitor_name_{i}", "")
+            if not name:
+                continue
+            competitors.append((i, name))
+            for row, value in enumerate(table.get(name, [])[:len(criteria)]):
+                if value not in ("", None):
+                    cells[(row + 1, i)] = value
+        return cls(criteria, competitors, cells)
+
+    def to_json(self):
+        """Les trois tables de la matrice, au format colonnes."""
+        return {
+            COMPETITOR_CRITERIA_KEY: id_list_to_json(self.criteria, 'Critère'),
+            COMPETITOR_LIST_KEY: id_list_to_json(self.competitors, 'Concurrent'),
+            COMPETITOR_CELLS_KEY: cells_to_json(self.cells),
+        }
+
+    def rows(self, competitors=None):
+        """Lignes (nom du critère puis valeurs) pour les concurrents donnés, tous par défaut."""
+        competitors = self.competitors if competitors is None else competitors
+        cells = self.cells
+        return [
+            [name] + [cells.get((criterion_id, competitor_id), "") for competitor_id, _ in competitors]
+            for criterion_id, name in self.criteria
+        ]
+
+
+# Liste (identifiant, nom) d'une table à colonnes id et nom
+def id_list(columns, name_column):
+    if not columns:
+        return []
+    return list(zip(columns.get('id', []), columns.get(name_column, [])))
+
+def id_list_to_json(items, name_column):
+    return {'id': [item_id for item_id, _ in items], name_column: [name for _, name in items]}
+
+def cells_from_json(columns):
+    """Dictionnaire des cellules remplies depuis la table competitor_cells."""
+    if not columns:
+        return {}
+    return dict(zip(zip(columns.get('Critère', []), columns.get('Concurrent', [])), columns.get('Valeur', [])))
+
+def cells_to_json(cells):
+    return {
+        'Critère': [criterion_id for criterion_id, _ in cells],
+        'Concurrent': [competitor_id for _, competitor_id in cells],
+        'Valeur': list(cells.values()),
+    }
+
+
+def normalize_report(data):
+    """
+    Copie des données où chaque table est au format colonnes, toutes de même longueur,
+    et où une matrice comparative à l'ancien format est convertie en ses trois tables.
+    Le dictionnaire reçu n'est pas modifié ; une table déjà normalisée n'est pas recopiée.
+    """
+    data = Report.from_json(data).to_json()
+    if 'competitors_comparison_table' in data and not any(key in data for key in COMPETITOR_MATRIX_KEYS):
+        data.update(CompetitorMatrix.from_legacy(data).to_json())
+    return data
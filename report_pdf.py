@@ -0,0 +1,925 @@
+"""
+Rendu PDF du rapport avec ReportLab.
+
+Ce module ne dépend pas de Streamlit : il reçoit les données du rapport sous forme de
+dictionnaire (le contenu de saved_data ou d'une sauvegarde JSON) et peut donc être
+utilisé par l'application, par les travaux en arrière-plan et en ligne de commande.
+"""
+import io
+import os
+import json
+import hashlib
+import copy
+import shutil
+import tempfile
+import time
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
+from reportlab.platypus import Image as ReportLabImage
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from pdf_cache import report_hash
+from report_content import (
+    BMC_COLORS, COMPARATIF_COLUMNS_PER_TABLE, COMPARATIF_LEGEND, EMPTY_ROWS, LOGO_BOX, MODELE_TABLES,
+    PDF_LAYOUT, TECH_IMAGE_HEIGHT, TECH_PARTS, comparatif_tables, concurrents_rows, cibles_rows,
+    fonctionnalites_rows, identite_rows, marketing_rows, matrice_rows, modele_rows, projections_rows,
+    swot_rows, tech_image_rows,
+)
+from report_images import fit_box, open_image_store
+from report_model import normalize_report
+from report_sections import SECTION_KEYS, section_data, select_sections
+
+
+# Styles du PDF
+def create_pdf_styles():
+    styles = getSampleStyleSheet()
+    normal_style = styles['Normal']
+    return {
+        'sample': styles,
+        'title': ParagraphStyle(
+            'title',
+            parent=styles['Heading1'],
+            fontSize=18,
+            alignment=TA_CENTER,
+            spaceAfter=12
+        ),
+        'heading1': ParagraphStyle(
+            'Heading1',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=10
+        ),
+        'heading2': ParagraphStyle(
+            'Heading2',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=8
+        ),
+        'heading3': styles['Heading3'],
+        'normal': normal_style,
+        # Style pour les en-têtes verticaux des colonnes
+        'header': ParagraphStyle(
+            'Header',
+            parent=normal_style,
+            fontSize=8,
+            alignment=TA_CENTER,
+        ),
+        'bmc_title': ParagraphStyle(
+            'BMC_Title',
+            parent=styles['Heading3'],
+            alignment=TA_CENTER,
+            fontSize=12,
+            leading=14,
+            spaceAfter=6,
+            backColor=colors.white,
+        ),
+        'bmc_content': ParagraphStyle(
+            'BMC_Content',
+            parent=styles['Normal'],
+            fontSize=9,
+            leading=12,
+            spaceBefore=0,
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            alignment=TA_CENTER,
+            fontSize=8
+        ),
+        # Légende sous les images
+        'caption': ParagraphStyle(
+            'Caption',
+            parent=styles['Normal'],
+            fontName='Helvetica-Oblique',
+            alignment=TA_CENTER,
+            fontSize=9
+        ),
+    }
+
+# Styles construits une seule fois : les flowables ne modifient pas leurs styles
+PDF_STYLES = create_pdf_styles()
+
+# Texte « simple » d'une cellule : sans balise ni entité, espaces déjà normalisés
+def is_plain_cell(text):
+    return '<' not in text and '&' not in text and '>' not in text and text == ' '.join(text.split())
+
+# Fragments analysés des textes courts, par (texte, style) : les valeurs répétées
+# (+, -, T, Oui, Non...) ne passent qu'une fois par l'analyseur de Paragraph
+PARAGRAPH_MEMO_MAX_LENGTH = 64
+PARAGRAPH_MEMO_MAX_ENTRIES = 4096
+_paragraph_frags = {}
+
+def cell_paragraph(text, style):
+    if len(text) > PARAGRAPH_MEMO_MAX_LENGTH:
+        return Paragraph(text, style)
+    key = (text, style)
+    parsed = _paragraph_frags.get(key)
+    if parsed is None:
+        paragraph = Paragraph(text, style)
+        if len(_paragraph_frags) >= PARAGRAPH_MEMO_MAX_ENTRIES:
+            _paragraph_frags.clear()
+        _paragraph_frags[key] = (paragraph.style, paragraph.frags, paragraph.bulletText)
+        return paragraph
+    parsed_style, frags, bullet_text = parsed
+    # Les fragments ne sont pas modifiés par la mise en page : ils peuvent être partagés
+    return Paragraph(text, parsed_style, bulletText=bullet_text, frags=frags)
+
+# Fonction pour créer un tableau avec des paragraphes pour le contenu cellulaire
+def create_styled_table(data, colWidths, normal_style, style_commands=None, repeat_rows=0):
+    """
+    Crée un tableau dont les cellules texte sont mises en forme avec normal_style.
+    Les cellules vides et les textes simples qui tiennent sur une ligne restent des
+    chaînes, dessinées par le tableau avec la police du style ; les autres deviennent
+    des Paragraph (balises, retour à la ligne). Les repeat_rows premières lignes sont
+    répétées en haut de chaque page.
+    """
+    font_name = normal_style.fontName
+    font_size = normal_style.fontSize
+    # Largeur disponible sans retour à la ligne (padding par défaut : 6 de chaque côté)
+    max_widths = [None if w is None else w - 12 for w in colWidths] if colWidths else None
+    
+    # Convertir le contenu des cellules en paragraphes si nécessaire
+    processed_data = []
+    left_aligned = []
+    for row_index, row in enumerate(data):
+        processed_row = []
+        run_start = None
+        for col_index, cell in enumerate(row):
+            plain = False
+            if isinstance(cell, str):
+                if not cell.strip():
+                    cell = ""
+                elif (max_widths is not None and max_widths[col_index] is not None and is_plain_cell(cell)
+                      and stringWidth(cell, font_name, font_size) <= max_widths[col_index]):
+                    plain = True
+                else:
+                    cell = cell_paragraph(cell, normal_style)
+            processed_row.append(cell)
+            # Un Paragraph occupe toute la largeur de sa cellule (texte à gauche) :
+            # aligner de même les chaînes simples
+            if plain and run_start is None:
+                run_start = col_index
+            elif not plain and run_start is not None:
+                left_aligned.append(('ALIGN', (run_start, row_index), (col_index - 1, row_index), 'LEFT'))
+                run_start = None
+        if run_start is not None:
+            left_aligned.append(('ALIGN', (run_start, row_index), (len(row) - 1, row_index), 'LEFT'))
+        processed_data.append(processed_row)
+    
+    # Créer le tableau avec les données formatées
+    table = Table(processed_data, colWidths=colWidths, repeatRows=repeat_rows)
+    
+    # Appliquer le style par défaut
+    default_style = [
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # Centre tout le contenu par défaut
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+        # Police des cellules restées en chaînes : celle des paragraphes
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('LEADING', (0, 0), (-1, -1), normal_style.leading),
+    ]
+    
+    # Ajouter les commandes de style personnalisées
+    if style_commands:
+        default_style.extend(style_commands)
+    default_style.extend(left_aligned)
+    
+    table.setStyle(TableStyle(default_style))
+    return table
+
+# Ajoute un paragraphe par ligne non vide d'un champ texte
+def add_text_lines(story, text, style):
+    for line in text.split('\n'):
+        if line.strip():
+            story.append(Paragraph(line, style))
+
+# Padding réduit utilisé par les tableaux comparatifs
+COMPACT_PADDING = [
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
+]
+
+def image_flowable(digest, box_width, box_height, styles, hAlign='CENTER'):
+    """
+    Image du stockage (report_images) dans un cadre de box_width × box_height points :
+    la variante réduite à la définition du PDF, créée une fois puis relue.
+    """
+    try:
+        variant = open_image_store().variant(digest, box_width, box_height)
+    except (OSError, ValueError):
+        return Paragraph(f"<i>Image introuvable : {str(digest)[:12]}</i>", styles['normal'])
+    width, height = fit_box(variant.width, variant.height, box_width, box_height)
+    return ReportLabImage(variant.path, width=width, height=height, hAlign=hAlign)
+
+# ---------------------------------------------------------------------------
+# Sections du PDF : chaque fonction reçoit les données, la largeur utile de la
+# page et les styles, et retourne la liste de flowables de sa section.
+# ---------------------------------------------------------------------------
+
+def build_section_titre(data, width, styles):
+    story = []
+    # Titre principal
+    story.append(Paragraph(data.get('projet_titre', "Rapport"), styles['title']))
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_description(data, width, styles):
+    normal_style = styles['normal']
+    story = []
+    # Présentation du projet
+    story.append(Paragraph("PRÉSENTATION DU PROJET", styles['heading1']))
+    
+    # Description du projet
+    story.append(Paragraph("1. Description du Projet", styles['heading2']))
+    story.append(Paragraph(f"<b>Problématique :</b> {data.get('pres_prob', '')}", normal_style))
+    story.append(Spacer(1, 0.1*inch))
+    
+    # Processez les retours à la ligne pour les champs texte
+    story.append(Paragraph("<b>Solution proposée :</b>", normal_style))
+    add_text_lines(story, data.get('pres_solution', ''), normal_style)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_identite(data, width, styles):
+    story = []
+    # Fiche d'identité
+    story.append(Paragraph("2. Fiche d'Identité", styles['heading2']))
+    # Logo de l'entreprise au-dessus de la fiche
+    if data.get('ident_logo'):
+        story.append(image_flowable(data['ident_logo'], *LOGO_BOX, styles, hAlign='LEFT'))
+        story.append(Spacer(1, 0.1*inch))
+    identity_table = create_styled_table(
+        identite_rows(data), 
+        colWidths=[width/3.0, width*2/3.0],
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 0), (0, -1), 'LEFT')]  # Aligner la première colonne à gauche
+    )
+    story.append(identity_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_objectifs(data, width, styles):
+    normal_style = styles['normal']
+    story = []
+    # Objectifs et Vision
+    story.append(Paragraph("3. Objectifs et Vision", styles['heading2']))
+    story.append(Paragraph("<b>Objectifs Principaux :</b>", normal_style))
+    add_text_lines(story, data.get('pres_objectifs', ''), normal_style)
+    
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph("<b>Objectifs de Développement Durable :</b>", normal_style))
+    add_text_lines(story, data.get('pres_odd', ''), normal_style)
+    
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph(f"<b>Mission :</b> {data.get('pres_mission', '')}", normal_style))
+    story.append(Paragraph(f"<b>Vision :</b> {data.get('pres_vision', '')}", normal_style))
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_realisations(data, width, styles):
+    story = []
+    # Réalisations
+    story.append(Paragraph("4. Réalisations Accomplies", styles['heading2']))
+    add_text_lines(story, data.get('pres_realisations', ''), styles['normal'])
+    story.append(Spacer(1, 0.3*inch))
+    return story
+
+def build_section_tendances(data, width, styles):
+    story = []
+    # Analyse de Marché
+    story.append(Paragraph("ANALYSE DE MARCHÉ", styles['heading1']))
+    
+    # Tendances
+    story.append(Paragraph("1. Tendances du Marché", styles['heading2']))
+    add_text_lines(story, data.get('marche_tendances', ''), styles['normal'])
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_cibles(data, width, styles):
+    story = []
+    # Cibles Principales
+    story.append(Paragraph("2. Cibles Principales", styles['heading2']))
+    # Table vide en cas de données manquantes
+    cibles_data = cibles_rows(data) or EMPTY_ROWS['cibles']
+    
+    cibles_table = create_styled_table(
+        cibles_data, 
+        colWidths=[width/2.0, width/2.0],
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
+    )
+    story.append(cibles_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_swot(data, width, styles):
+    story = []
+    # SWOT - Utiliser les données remplies par l'utilisateur dans Streamlit
+    story.append(Paragraph("3. Analyse SWOT", styles['heading2']))
+    
+    # Table vide en cas de données manquantes
+    swot_data = swot_rows(data) or EMPTY_ROWS['swot']
+    
+    swot_table = create_styled_table(
+        swot_data,
+        colWidths=[width/3.0, width*2/3.0],
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
+    )
+    story.append(swot_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_marketing(data, width, styles):
+    story = []
+    # Marketing Mix
+    story.append(Paragraph("4. Marketing Mix (4P)", styles['heading2']))
+    # Table vide en cas de données manquantes
+    marketing_data = marketing_rows(data) or EMPTY_ROWS['marketing']
+    
+    marketing_table = create_styled_table(
+        marketing_data, 
+        colWidths=[width/3.0, width*2/3.0],
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT'), ('ALIGN', (1, 1), (1, -1), 'LEFT')]
+    )
+    story.append(marketing_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_concurrents(data, width, styles):
+    story = []
+    # Analyse Concurrentielle
+    story.append(Paragraph("5. Analyse Concurrentielle", styles['heading2']))
+    story.append(Paragraph("Tableau Comparatif des Concurrents", styles['heading3']))
+    # Table vide en cas de données manquantes
+    concurrents_data = concurrents_rows(data) or EMPTY_ROWS['concurrents']
+    
+    # Une table plus compacte pour les concurrents
+    concurrents_table = create_styled_table(
+        concurrents_data, 
+        colWidths=[width/6.0, width/6.0, width/6.0, width/2.0],
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 1), (-1, -1), 'LEFT')] + COMPACT_PADDING  # Aligner tout le contenu à gauche
+    )
+    story.append(concurrents_table)
+    return story
+
+def build_section_comparatif(data, width, styles):
+    normal_style = styles['normal']
+    story = []
+    # Tableau Comparatif Détaillé des Concurrents
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("Tableau Comparatif Détaillé des Concurrents", styles['heading3']))
+    
+    tables = comparatif_tables(data)
+    if tables is not None:
+        chunked = len(tables) > 1
+        for title, competitors_data in tables:
+            competitor_count = len(competitors_data[0]) - 1
+            if chunked:
+                # Matrice découpée : mêmes largeurs de colonnes dans tous les tableaux
+                story.append(Paragraph(f"<i>{title}</i>", normal_style))
+                col_widths = [width/4.0] + [width*3/(4.0*COMPARATIF_COLUMNS_PER_TABLE)]*competitor_count
+            else:
+                # Créer un tableau adapté avec des colonnes adaptées
+                col_widths = [width/3.0]  # Première colonne plus large
+                if competitor_count:
+                    col_widths.extend([width/(3.0*competitor_count)]*competitor_count)  # Colonnes des concurrents
+            
+            # Créer le tableau ; l'en-tête des concurrents est répété sur chaque page
+            story.append(create_styled_table(
+                competitors_data,
+                colWidths=col_widths,
+                normal_style=normal_style,
+                style_commands=[('ALIGN', (0, 0), (0, -1), 'LEFT')] + COMPACT_PADDING,  # Aligner première colonne à gauche
+                repeat_rows=1
+            ))
+            if chunked:
+                story.append(Spacer(1, 0.1*inch))
+    else:
+        # Table vide en cas de données manquantes
+        comp_table = create_styled_table(
+            EMPTY_ROWS['comparatif'],
+            colWidths=[width/2.0, width/6.0, width/6.0, width/6.0],
+            normal_style=normal_style,
+            style_commands=[('ALIGN', (0, 0), (0, -1), 'LEFT')] + COMPACT_PADDING
+        )
+        story.append(comp_table)
+    
+    # Ajouter la légende
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph("<b>Légende :</b>", normal_style))
+    for item in COMPARATIF_LEGEND:
+        story.append(Paragraph(f"• {item}", normal_style))
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_fonctionnalites(data, width, styles):
+    story = []
+    # Ajout de la comparaison des fonctionnalités clés
+    story.append(Paragraph("Comparaison des Fonctionnalités Clés", styles['heading3']))
+    # Table vide en cas de données manquantes
+    comp_data = fonctionnalites_rows(data) or EMPTY_ROWS['fonctionnalites']
+    
+    # Créer le tableau
+    comp_func_table = create_styled_table(
+        comp_data, 
+        colWidths=[width/(len(comp_data[0]))] * len(comp_data[0]),
+        normal_style=styles['normal'],
+        style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT')] + COMPACT_PADDING
+    )
+    story.append(comp_func_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_analyse(data, width, styles):
+    story = []
+    # Analyse Comparative
+    story.append(Paragraph("Analyse Comparative", styles['heading3']))
+    add_text_lines(story, data.get('marche_analyse', ''), styles['normal'])
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_matrice(data, width, styles):
+    story = []
+    # Matrice de Comparaison
+    story.append(Paragraph("Matrice de Comparaison", styles['heading3']))
+    
+    # Utiliser uniquement les données de marche_matrice_table
+    matrice_data = matrice_rows(data)
+    if matrice_data is not None:
+        header = matrice_data[0]
+        # Créer le tableau
+        col_widths = [width/3.0]  # Première colonne plus large
+        if len(header) > 1:
+            col_widths.extend([width/(3.0*(len(header)-1))]*(len(header)-1))
+        
+        matrice_table = create_styled_table(
+            matrice_data,
+            colWidths=col_widths,
+            normal_style=styles['normal'],
+            style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT')] + COMPACT_PADDING
+        )
+    else:
+        # Table vide en cas de données manquantes
+        matrice_table = create_styled_table(
+            EMPTY_ROWS['matrice'],
+            colWidths=[width/2.0, width/6.0, width/6.0, width/6.0],
+            normal_style=styles['normal'],
+            style_commands=[('ALIGN', (0, 1), (0, -1), 'LEFT')] + COMPACT_PADDING
+        )
+    story.append(matrice_table)
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_bmc(data, width, styles):
+    story = []
+    # Business Model Canvas
+    story.append(Paragraph("Business Model Canvas", styles['heading2']))
+    
+    bmc_title_style = styles['bmc_title']
+    bmc_content_style = styles['bmc_content']
+    
+    # Contenu d'une case du BMC : titre puis une ligne par paragraphe
+    def bmc_cell(title, key):
+        return ([Paragraph(f"<b>{title}</b>", bmc_title_style)] + 
+                [Paragraph(line, bmc_content_style) for line in data.get(key, '').split('\n') if line.strip()])
+    
+    # Construire le tableau du BMC
+    # Première rangée: Partenaires, Activités, Proposition, Relations, Segments
+    top_row_data = [
+        [
+            bmc_cell("Partenaires Clés", 'bmc_partenaires'),
+            bmc_cell("Activités Clés", 'bmc_activites'),
+            bmc_cell("Proposition de Valeur", 'bmc_proposition'),
+            bmc_cell("Relations avec les Clients", 'bmc_relations'),
+            bmc_cell("Segments de Clientèle", 'bmc_segments'),
+        ]
+    ]
+    
+    # Deuxième rangée: vide, Ressources, vide, Canaux, vide
+    middle_row_data = [
+        [
+            # Vide (continuation de Partenaires)
+            [],
+            bmc_cell("Ressources Clés", 'bmc_ressources'),
+            # Vide (continuation de Proposition)
+            [],
+            bmc_cell("Canaux", 'bmc_canaux'),
+            # Vide (continuation de Segments)
+            [],
+        ]
+    ]
+    
+    # Troisième rangée: Structure de Coûts, Sources de Revenus
+    bottom_row_data = [
+        [
+            bmc_cell("Structure de Coûts", 'bmc_couts'),
+            bmc_cell("Sources de Revenus", 'bmc_revenus'),
+        ]
+    ]
+    
+    try:
+        # Créer les tableaux pour chaque rangée
+        top_table = Table(top_row_data, colWidths=[width/5.0]*5)         
+        middle_table = Table(middle_row_data, colWidths=[width/5.0]*5)
+        bottom_table = Table(bottom_row_data, colWidths=[width/2.0, width/2.0])
+        
+        # Appliquer le style aux tableaux
+        top_table.setStyle(TableStyle([
+            # Partenaires Clés
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(BMC_COLORS['partenaires'])),
+            ('VALIGN', (0, 0), (0, 0), 'TOP'),
+            
+            # Activités Clés
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(BMC_COLORS['activites'])),
+            ('VALIGN', (1, 0), (1, 0), 'TOP'),
+            
+            # Proposition de Valeur
+            ('BACKGROUND', (2, 0), (2, 0), colors.HexColor(BMC_COLORS['proposition'])),
+            ('VALIGN', (2, 0), (2, 0), 'TOP'),
+            
+            # Relations avec les Clients
+            ('BACKGROUND', (3, 0), (3, 0), colors.HexColor(BMC_COLORS['relations'])),
+            ('VALIGN', (3, 0), (3, 0), 'TOP'),
+            
+            # Segments de Clientèle
+            ('BACKGROUND', (4, 0), (4, 0), colors.HexColor(BMC_COLORS['segments'])),
+            ('VALIGN', (4, 0), (4, 0), 'TOP'),
+            
+            ('BOX', (0, 0), (0, 0), 1, colors.black),
+            ('BOX', (1, 0), (1, 0), 1, colors.black),
+            ('BOX', (2, 0), (2, 0), 1, colors.black),
+            ('BOX', (3, 0), (3, 0), 1, colors.black),
+            ('BOX', (4, 0), (4, 0), 1, colors.black),
+        ]))
+        
+        middle_table.setStyle(TableStyle([
+            # Partenaires Clés (continuation)
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(BMC_COLORS['partenaires'])),
+            ('VALIGN', (0, 0), (0, 0), 'TOP'),
+            
+            # Ressources Clés
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(BMC_COLORS['ressources'])),
+            ('VALIGN', (1, 0), (1, 0), 'TOP'),
+            
+            # Proposition de Valeur (continuation)
+            ('BACKGROUND', (2, 0), (2, 0), colors.HexColor(BMC_COLORS['proposition'])),
+            ('VALIGN', (2, 0), (2, 0), 'TOP'),
+            
+            # Canaux
+            ('BACKGROUND', (3, 0), (3, 0), colors.HexColor(BMC_COLORS['canaux'])),
+            ('VALIGN', (3, 0), (3, 0), 'TOP'),
+            
+            # Segments de Clientèle (continuation)
+            ('BACKGROUND', (4, 0), (4, 0), colors.HexColor(BMC_COLORS['segments'])),
+            ('VALIGN', (4, 0), (4, 0), 'TOP'),
+            
+            ('BOX', (1, 0), (1, 0), 1, colors.black),
+            ('BOX', (3, 0), (3, 0), 1, colors.black),
+        ]))
+        
+        bottom_table.setStyle(TableStyle([
+            # Structure de Coûts
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(BMC_COLORS['couts'])),
+            ('VALIGN', (0, 0), (0, 0), 'TOP'),
+            
+            # Sources de Revenus
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor(BMC_COLORS['revenus'])),
+            ('VALIGN', (1, 0), (1, 0), 'TOP'),
+            
+            ('BOX', (0, 0), (0, 0), 1, colors.black),
+            ('BOX', (1, 0), (1, 0), 1, colors.black),
+        ]))
+        
+        # Ajouter les tableaux au story
+        story.append(top_table)
+        story.append(middle_table)
+        story.append(bottom_table)
+    except Exception as e:
+        story.append(Paragraph(f"Erreur lors de la création du Business Model Canvas: {str(e)}", styles['normal']))
+    
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+# Fonction pour ajouter un tableau de modèle d'affaires de manière sécurisée
+def add_modele_table(story, data, key, title, width, styles):
+    normal_style = styles['normal']
+    if key in data:
+        story.append(Paragraph(title, styles['heading3']))
+        try:
+            columns = data[key]
+            if columns:
+                # Table normalisée : colonnes de même longueur, lues ligne par ligne
+                table_data = modele_rows(columns)
+                keys = table_data[0]
+                
+                # Créer le tableau
+                if len(table_data) > 1:
+                    table = create_styled_table(
+                        table_data,
+                        colWidths=[width/len(keys)] * len(keys),
+                        normal_style=normal_style,
+                        style_commands=[('ALIGN', (0, 1), (-1, -1), 'LEFT')] + COMPACT_PADDING
+                    )
+                    story.append(table)
+                    story.append(Spacer(1, 0.1*inch))
+                else:
+                    story.append(Paragraph("Données insuffisantes pour créer le tableau", normal_style))
+            else:
+                story.append(Paragraph(f"Format de données non reconnu pour {title}", normal_style))
+        except Exception as e:
+            story.append(Paragraph(f"Erreur lors de la création du tableau {title}: {str(e)}", normal_style))
+            story.append(Spacer(1, 0.1*inch))
+
+def build_section_modele(data, width, styles):
+    story = []
+    # Modèle d'Affaires - Tableaux détaillés
+    story.append(Paragraph("Modèle d'Affaires", styles['heading2']))
+    
+    # Ajouter tous les tableaux de modèle d'affaires
+    for key, title in MODELE_TABLES:
+        add_modele_table(story, data, key, title, width, styles)
+    
+    story.append(Spacer(1, 0.2*inch))
+    return story
+
+def build_section_strategie(data, width, styles):
+    normal_style = styles['normal']
+    story = []
+    # Stratégie Commerciale
+    story.append(Paragraph("STRATÉGIE COMMERCIALE", styles['heading1']))
+    
+    # Cibles Commerciales
+    story.append(Paragraph("1. Cibles Commerciales", styles['heading2']))
+    story.append(Paragraph("Particuliers", styles['heading3']))
+    add_text_lines(story, data.get('part', ''), normal_style)
+    
+    # Projections
+    if 'projections_table' in data:
+        story.append(Spacer(1, 0.1*inch))
+        
+        # Table vide en cas de données manquantes
+        projections_data = projections_rows(data) or EMPTY_ROWS['projections']
+        
+        projections_table = create_styled_table(
+            projections_data,
+            colWidths=[width/3.0, width/3.0, width/3.0],
+            normal_style=normal_style
+        )
+        story.append(projections_table)
+    
+    # Associations, Écoles, Entreprises
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph("Associations", styles['heading3']))
+    add_text_lines(story, data.get('assoc', ''), normal_style)
+    
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph("Établissements Scolaires", styles['heading3']))
+    add_text_lines(story, data.get('ecoles', ''), normal_style)
+    
+    story.append(Spacer(1, 0.1*inch))
+    story.append(Paragraph("Entreprises", styles['heading3']))
+    add_text_lines(story, data.get('entrep', ''), normal_style)
+    story.append(Spacer(1, 0.3*inch))
+    return story
+
+def build_section_technique(data, width, styles):
+    story = []
+    # Détails Techniques
+    story.append(Paragraph(data.get('tech_title_main', "DÉTAILS TECHNIQUES"), styles['heading1']))
+    
+    # Étude technique
+    story.append(Paragraph(data.get('tech_title_etude', "1. Étude technique du projet"), styles['heading2']))
+    
+    # Prototype
+    story.append(Paragraph(data.get('tech_title_prototype', "1.1 Prototype"), styles['heading2']))
+    
+    for title_key, default_title, title_style, content_key, space_after in TECH_PARTS:
+        story.append(Paragraph(data.get(title_key, default_title), styles[title_style]))
+        add_text_lines(story, data.get(content_key, ''), styles['normal'])
+        story.append(Spacer(1, space_after*inch))
+    
+    # Photos du prototype, captures d'écran : une image par ligne, avec sa légende
+    images = tech_image_rows(data)
+    if images:
+        story.append(Paragraph("Illustrations", styles['heading3']))
+        for digest, legende in images:
+            figure = [image_flowable(digest, width, TECH_IMAGE_HEIGHT, styles)]
+            if legende:
+                figure.append(Paragraph(legende, styles['caption']))
+            figure.append(Spacer(1, 0.2*inch))
+            story.append(KeepTogether(figure))
+    return story
+
+def build_section_pied(data, width, styles):
+    story = []
+    # Ajouter simplement le pied de page sans les informations du document
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph("© Tous droits réservés", styles['footer']))
+    return story
+
+# Fonction de construction de chaque section
+SECTION_BUILDERS = {
+    'titre': build_section_titre,
+    'description': build_section_description,
+    'identite': build_section_identite,
+    'objectifs': build_section_objectifs,
+    'realisations': build_section_realisations,
+    'tendances': build_section_tendances,
+    'cibles': build_section_cibles,
+    'swot': build_section_swot,
+    'marketing': build_section_marketing,
+    'concurrents': build_section_concurrents,
+    'comparatif': build_section_comparatif,
+    'fonctionnalites': build_section_fonctionnalites,
+    'analyse': build_section_analyse,
+    'matrice': build_section_matrice,
+    'bmc': build_section_bmc,
+    'modele': build_section_modele,
+    'strategie': build_section_strategie,
+    'technique': build_section_technique,
+    'pied': build_section_pied,
+}
+
+# Sections du rapport dans l'ordre du PDF : (nom, clés lues dans les données, fonction) ;
+# les clés et la sélection des sections viennent de report_sections
+PDF_SECTIONS = [(name, keys, SECTION_BUILDERS[name]) for name, keys in SECTION_KEYS]
+
+# Empreinte des seules données lues par une section
+def section_fingerprint(data, keys, width):
+    subset = {key: data[key] for key in keys if key in data}
+    payload = json.dumps([subset, width], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_story(data, width, section_cache=None, on_section=None, profile=None, sections=None):
+    """
+    Construit le story du PDF section par section (toutes, ou celles de la liste sections).
+    Si un cache est fourni, les flowables d'une section sont réutilisés tant que
+    les clés qu'elle lit n'ont pas changé. on_section(nom) est appelé après chaque section.
+    profile (PdfBuildProfile) mesure la construction et la mise en page de chaque section.
+    """
+    styles = PDF_STYLES
+    story = []
+    for name, keys, builder in PDF_SECTIONS:
+        if sections is not None and name not in sections:
+            continue
+        start = time.perf_counter()
+        if section_cache is None:
+            flowables = builder(data, width, styles)
+            hit = False
+        else:
+            fingerprint = section_fingerprint(data, keys, width)
+            cached = section_cache.get(name)
+            hit = cached is not None and cached[0] == fingerprint
+            if hit:
+                flowables = cached[1]
+            else:
+                flowables = builder(data, width, styles)
+                section_cache[name] = (fingerprint, flowables)
+            # doc.build marque les flowables pendant la mise en page (_postponed, _frame...) :
+            # on lui passe des copies pour garder les originaux du cache intacts
+            flowables = [copy.copy(flowable) for flowable in flowables]
+        if profile is not None:
+            profile.section_built(name, time.perf_counter() - start, hit)
+            profile.instrument(name, flowables)
+        story.extend(flowables)
+        if on_section:
+            on_section(name)
+    return story
+
+# Configuration prise en compte dans la clé du cache des PDF :
+# incrémenter la version à chaque modification des styles ou des sections
+PDF_STYLE_CONFIG = {
+    'layout': PDF_LAYOUT,
+    'version': 4
+}
+
+# Configuration de la clé du cache : celle du rapport complet ou d'une sélection de sections
+def pdf_style_config(sections=None):
+    if sections is None:
+        return PDF_STYLE_CONFIG
+    return dict(PDF_STYLE_CONFIG, sections=sections)
+
+def generate_pdf(data, section_cache=None, on_section=None, on_page=None, pdf_cache=None, profile=None, output=None,
+                 sections=None):
+    """
+    Génère le PDF du rapport à partir d'un dictionnaire de données.
+    section_cache (dict) réutilise les flowables des sections inchangées, pdf_cache
+    (PdfCache) les PDF déjà produits. on_section(nom) est appelé après chaque section
+    et on_page(numéro) à chaque page. profile (pdf_profile.PdfBuildProfile) reçoit les
+    durées de construction et de mise en page.
+    output (fichier binaire vide, ouvert en lecture et écriture) reçoit le PDF à la place
+    d'un BytesIO : le document n'est alors pas gardé en mémoire une fois écrit.
+    sections (noms de sections ou de chapitres, voir select_sections) limite le rendu :
+    les données des autres sections ne sont ni converties ni mises en page.
+    Retourne le fichier, repositionné au début.
+    """
+    sections = select_sections(sections)
+    if sections is not None:
+        data = section_data(data, sections)
+    
+    # Convertir toutes les tables nécessaires, sur une copie
+    data = normalize_report(data)
+    
+    # Données inchangées depuis une génération précédente : réutiliser le PDF
+    if pdf_cache is not None:
+        cache_key = report_hash(data, pdf_style_config(sections))
+        if output is None:
+            pdf = pdf_cache.get(cache_key)
+            cached = io.BytesIO(pdf) if pdf is not None else None
+        else:
+            # Vers un fichier : un gros PDF du cache disque est recopié par blocs
+            cached = pdf_cache.open(cache_key)
+        if cached is not None:
+            if profile is not None:
+                profile.cache_hit = True
+            if output is None:
+                return cached
+            with cached:
+                shutil.copyfileobj(cached, output)
+            output.seek(0)
+            return output
+    
+    buffer = io.BytesIO() if output is None else output
+    doc = SimpleDocTemplate(buffer, **PDF_LAYOUT)
+    
+    story = build_story(data, doc.width, section_cache, on_section, profile, sections)
+    
+    # Assembler le document (sans la numérotation de pages)
+    start = time.perf_counter()
+    if on_page:
+        def page_done(canvas, doc):
+            on_page(doc.page)
+        doc.build(story, onFirstPage=page_done, onLaterPages=page_done)
+    else:
+        doc.build(story)
+    if profile is not None:
+        profile.build_done(time.perf_counter() - start, doc.page)
+    
+    if pdf_cache is not None:
+        if output is None:
+            pdf_cache.put(cache_key, buffer.getvalue())
+        else:
+            pdf_cache.put_file(cache_key, buffer)
+    buffer.seek(0)
+    return buffer
+
+# Variante retournant directement les octets du PDF
+def generate_pdf_bytes(data, section_cache=None, on_section=None, on_page=None, pdf_cache=None, sections=None):
+    return generate_pdf(data, section_cache, on_section, on_page, pdf_cache, sections=sections).getvalue()
+
+def render_pdf(report, on_section=None, on_page=None, sections=None):
+    """
+    Rend un rapport en PDF : dictionnaire en entrée, octets en sortie.
+    Sans cache ni état partagé et définie au niveau du module, elle peut être envoyée
+    telle quelle à un ProcessPoolExecutor.
+    """
+    return generate_pdf(report, on_section=on_section, on_page=on_page, sections=sections).getvalue()
+
+def generate_pdf_file(data, path, section_cache=None, on_section=None, on_page=None, pdf_cache=None, profile=None,
+                      sections=None):
+    """
+    Génère le PDF directement dans le fichier `path` et retourne sa taille en octets.
+    Le PDF est écrit à côté puis renommé : un lecteur ne voit jamais de fichier tronqué.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            generate_pdf(data, section_cache, on_section, on_page, pdf_cache, profile, output=f, sections=sections)
+            size = f.seek(0, os.SEEK_END)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return size
+
+def render_pdf_file(report, path, on_section=None, on_page=None, sections=None, profile=None):
+    """Comme render_pdf, en écrivant le PDF dans le fichier `path` ; retourne sa taille."""
+    return generate_pdf_file(report, path, on_section=on_section, on_page=on_page, profile=profile, sections=sections)
+
+def render_pdf_profiled(report, on_section=None, on_page=None, sections=None):
+    """Comme render_pdf, avec les mesures de la mise en page : retourne (octets, statistiques)."""
+    from pdf_profile import PdfBuildProfile
+    
+    profile = PdfBuildProfile()
+    pdf = generate_pdf(report, on_section=on_section, on_page=on_page, profile=profile, sections=sections).getvalue()
+    return pdf, profile.stats()
+
+def report_cache_key(report, sections=None):
+    """Clé du rapport dans le cache des PDF (données normalisées et configuration de style)."""
+    sections = select_sections(sections)
+    if sections is not None:
+        report = section_data(report, sections)
+    return report_hash(normalize_report(report), pdf_style_config(sections))
@@ -0,0 +1,153 @@
+"""
+Profilage des reruns de l'application.
+
+Mesure, quand il est activé, la durée de chaque appel des fonctions d'aide du script
+(create_input, create_editable_table...) et de chaque page affichée. Les mesures sont
+cumulées pour tout le serveur et exportables en JSON ou au format texte de Prometheus.
+Désactivé, le profileur ne coûte rien : timed() rend la fonction telle quelle.
+"""
+import functools
+import json
+import threading
+import time
+
+
+class Timer:
+    """Mesure en cours, terminée par stop()."""
+
+    def __init__(self, profiler, kind, name):
+        self.profiler = profiler
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.stopped = False
+
+    def stop(self):
+        if not self.stopped:
+            self.stopped = True
+            self.profiler.record(self.kind, self.name, time.perf_counter() - self.start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _NullTimer:
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class RerunProfiler:
+    """
+    Durées cumulées par (type, nom) : nombre d'appels, total, maximum et dernière durée.
+    Partagé entre les sessions : les mises à jour sont verrouillées.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def timed(self, name=None, kind="helper"):
+        """Décorateur : mesure chaque appel de la fonction."""
+        def decorator(func):
+            if not self.enabled:
+                return func
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(kind, label, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def start(self, kind, name):
+        """Démarre une mesure (bloc de code, page) ; utilisable aussi comme contexte `with`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return Timer(self, kind, name)
+
+    def record(self, kind, name, seconds):
+        with self._lock:
+            stats = self._stats.get((kind, name))
+            if stats is None:
+                stats = self._stats[(kind, name)] = [0, 0.0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] = seconds
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Liste des mesures, de la plus coûteuse (durée totale) à la moins coûteuse."""
+        with self._lock:
+            items = [(kind, name, list(stats)) for (kind, name), stats in self._stats.items()]
+        rows = [
+            {
+                "kind": kind,
+                "name": name,
+                "count": count,
+                "total_seconds": total,
+                "mean_seconds": total / count,
+                "max_seconds": maximum,
+                "last_seconds": last,
+            }
+            for kind, name, (count, total, maximum, last) in items
+        ]
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows
+
+    def to_json(self):
+        return json.dumps(
+            {"started_at": self.started_at, "timings": self.snapshot()},
+            ensure_ascii=False,
+            indent=4
+        )
+
+    def to_prometheus(self, prefix="report_app"):
+        """Export au format texte de Prometheus (résumé par type et par nom, plus le maximum)."""
+        rows = self.snapshot()
+        metric = f"{prefix}_duration_seconds"
+        lines = [
+            f"# HELP {metric} Durée des appels instrumentés pendant les reruns.",
+            f"# TYPE {metric} summary",
+        ]
+        for row in rows:
+            labels = _labels(row)
+            lines.append(f"{metric}_count{{{labels}}} {row['count']}")
+            lines.append(f"{metric}_sum{{{labels}}} {row['total_seconds']:.9f}")
+        lines.extend([
+            f"# HELP {metric}_max Durée maximale d'un appel instrumenté.",
+            f"# TYPE {metric}_max gauge",
+        ])
+        for row in rows:
+            lines.append(f"{metric}_max{{{_labels(row)}}} {row['max_seconds']:.9f}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(row):
+    return f'kind="{_escape(row["kind"])}",name="{_escape(row["name"])}"'
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,115 @@
+"""
+Chapitres et sections du rapport PDF.
+
+Ce module ne dépend ni de ReportLab ni de Streamlit : l'application y lit les titres
+proposés dans le choix des sections sans charger le rendu PDF (report_pdf), et
+l'aperçu HTML (report_html) y trouve les sections et les clés qu'elles lisent.
+"""
+from report_content import MODELE_TABLES, TECH_PARTS
+from report_model import COMPETITOR_MATRIX_KEYS, LEGACY_MATRIX_KEYS
+
+# Chapitres du rapport : sections rendues quand le chapitre est choisi
+PDF_PARTS = {
+    'presentation': ['description', 'identite', 'objectifs', 'realisations'],
+    'marche': ['tendances', 'cibles', 'swot', 'marketing', 'concurrents', 'comparatif',
+               'fonctionnalites', 'analyse', 'matrice', 'bmc', 'modele'],
+    'strategie': ['strategie'],
+    'technique': ['technique'],
+}
+
+# Titres des chapitres et des sections, pour le choix des sections à rendre
+PDF_PART_TITLES = {
+    'presentation': "Présentation du Projet",
+    'marche': "Analyse de Marché",
+    'strategie': "Stratégie Commerciale",
+    'technique': "Détails Techniques",
+}
+PDF_SECTION_TITLES = {
+    'titre': "Titre du rapport",
+    'description': "Description du projet",
+    'identite': "Fiche d'identité",
+    'objectifs': "Objectifs et vision",
+    'realisations': "Réalisations",
+    'tendances': "Tendances du marché",
+    'cibles': "Cibles principales",
+    'swot': "Analyse SWOT",
+    'marketing': "Marketing mix",
+    'concurrents': "Concurrents",
+    'comparatif': "Tableau comparatif détaillé",
+    'fonctionnalites': "Fonctionnalités clés",
+    'analyse': "Analyse comparative",
+    'matrice': "Matrice de comparaison",
+    'bmc': "Business Model Canvas",
+    'modele': "Modèle d'affaires",
+    'strategie': "Stratégie commerciale",
+    'technique': "Détails techniques",
+    'pied': "Pied de page",
+}
+
+# Toujours rendues avec une sélection : le titre et le pied de page encadrent le rapport
+FRAME_SECTIONS = ('titre', 'pied')
+
+# Choix des sections à rendre : chaque chapitre puis ses sections (une section qui porte le
+# nom de son chapitre se confond avec lui)
+PDF_SECTION_CHOICES = [
+    choice for part, names in PDF_PARTS.items()
+    for choice in [part] + [name for name in names if name != part]
+]
+
+
+def section_label(name):
+    """Libellé d'un chapitre ou d'une section dans le choix des sections du PDF."""
+    if name in PDF_PART_TITLES:
+        return f"{PDF_PART_TITLES[name]} (chapitre entier)"
+    return PDF_SECTION_TITLES[name]
+
+
+# Sections du rapport dans l'ordre du PDF : (nom, clés lues dans les données)
+SECTION_KEYS = [
+    ('titre', ['projet_titre']),
+    ('description', ['pres_prob', 'pres_solution']),
+    ('identite', ['ident_rs', 'ident_slogan', 'ident_objet_social', 'ident_domaines',
+                  'ident_siege', 'ident_forme', 'ident_associes', 'ident_valeurs', 'ident_logo']),
+    ('objectifs', ['pres_objectifs', 'pres_odd', 'pres_mission', 'pres_vision']),
+    ('realisations', ['pres_realisations']),
+    ('tendances', ['marche_tendances']),
+    ('cibles', ['marche_cibles_table']),
+    ('swot', ['marche_swot_table']),
+    ('marketing', ['marche_marketing_table']),
+    ('concurrents', ['marche_concurrents_table']),
+    ('comparatif', COMPETITOR_MATRIX_KEYS + ['criteres_column_name'] + LEGACY_MATRIX_KEYS),
+    ('fonctionnalites', ['marche_comparison_table']),
+    ('analyse', ['marche_analyse']),
+    ('matrice', ['marche_matrice_table']),
+    ('bmc', ['bmc_partenaires', 'bmc_activites', 'bmc_proposition', 'bmc_relations', 'bmc_segments',
+             'bmc_ressources', 'bmc_canaux', 'bmc_couts', 'bmc_revenus']),
+    ('modele', [key for key, title in MODELE_TABLES]),
+    ('strategie', ['part', 'projections_table', 'assoc', 'ecoles', 'entrep']),
+    ('technique', ['tech_title_main', 'tech_title_etude', 'tech_title_prototype'] +
+                  [key for part in TECH_PARTS for key in (part[0], part[3])] + ['tech_images']),
+    ('pied', []),
+]
+
+
+def select_sections(names):
+    """
+    Sections à rendre, dans l'ordre du rapport, pour une liste de noms de sections et
+    de chapitres (PDF_PARTS). Retourne None (tout le rapport) si names est vide.
+    """
+    if not names:
+        return None
+    wanted = set(FRAME_SECTIONS)
+    for name in names:
+        if name in PDF_PARTS:
+            wanted.update(PDF_PARTS[name])
+        elif name in PDF_SECTION_TITLES:
+            wanted.add(name)
+        else:
+            raise ValueError(f"Section inconnue : {name}")
+    return [name for name, keys in SECTION_KEYS if name in wanted]
+
+
+def section_data(data, sections):
+    """Sous-ensemble des données lu par les sections données (les autres tables ne sont pas converties)."""
+    wanted = {key for name, keys in SECTION_KEYS if name in sections for key in keys}
+    return {key: value for key, value in data.items() if key in wanted}
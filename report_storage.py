@@ -0,0 +1,593 @@
+"""
+Stockage persistant des sauvegardes du rapport.
+
+Deux implémentations de la même interface :
+
+- FileStorage : un fichier JSON horodaté par sauvegarde dans saved_data/ (comportement
+  historique, lisible par batch_pdf.py) ;
+- SQLiteStorage : une base SQLite en mode WAL, une ligne par révision, indexée par
+  entreprise et par date ; la dernière révision d'une entreprise se retrouve par l'index
+  sans parcourir l'historique. Une révision sur SNAPSHOT_EVERY est complète, les autres
+  ne stockent que les champs et les colonnes de tableaux modifiés depuis la précédente.
+
+Une politique de rétention (nombre de révisions gardées par entreprise, ancienneté
+maximale) est appliquée à chaque sauvegarde. open_storage() choisit le stockage d'après
+la variable d'environnement REPORT_STORAGE (file ou sqlite).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# Une révision enregistrée ; location indique où elle se trouve (fichier ou base)
+Revision = namedtuple("Revision", ["id", "company", "created_at", "size", "location"])
+
+
+def company_key(data):
+    """Nom d'entreprise utilisé pour regrouper les révisions d'un même rapport."""
+    return data.get('ident_rs', 'entreprise').replace(" ", "_")
+
+
+class RetentionPolicy:
+    """
+    Révisions à conserver pour une entreprise : les keep_last plus récentes et/ou celles
+    de moins de keep_days jours. None désactive le critère ; la révision la plus récente
+    n'est jamais supprimée.
+    """
+
+    def __init__(self, keep_last=None, keep_days=None):
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+
+    @property
+    def enabled(self):
+        return self.keep_last is not None or self.keep_days is not None
+
+    def cutoff(self, now=None):
+        """Date en deçà de laquelle une révision est trop ancienne, ou None."""
+        if self.keep_days is None:
+            return None
+        return (now if now is not None else time.time()) - self.keep_days * 86400
+
+
+class ReportStorage:
+    """Interface commune des stockages de sauvegardes."""
+
+    def __init__(self, retention=None):
+        self.retention = retention or RetentionPolicy()
+
+    def save(self, data):
+        """Enregistre une nouvelle révision et retourne sa Revision."""
+        raise NotImplementedError
+
+    def load(self, revision_id):
+        """Retourne les données d'une révision, ou None si elle n'existe pas."""
+        raise NotImplementedError
+
+    def latest(self, company):
+        """Retourne (Revision, données) de la révision la plus récente d'une entreprise, ou None."""
+        raise NotImplementedError
+
+    def revisions(self, company=None, limit=None):
+        """Liste des révisions, de la plus récente à la plus ancienne."""
+        raise NotImplementedError
+
+    def companies(self):
+        """Entreprises qui ont au moins une révision."""
+        raise NotImplementedError
+
+    def apply_retention(self, company=None):
+        """Supprime les révisions hors politique (d'une entreprise ou de toutes) ; retourne leur nombre."""
+        raise NotImplementedError
+
+    def compact(self, company=None):
+        """Réduit la place occupée par l'historique ; retourne la taille avant et après, ou None."""
+        return None
+
+
+class FileStorage(ReportStorage):
+    """Un fichier <entreprise>_<horodatage>.json par sauvegarde, comme save_data() historiquement."""
+
+    def __init__(self, save_dir="saved_data", retention=None):
+        super().__init__(retention)
+        self.save_dir = save_dir
+
+    def save(self, data):
+        os.makedirs(self.save_dir, exist_ok=True)
+        company = company_key(data)
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+        filename = f"{self.save_dir}/{company}_{timestamp}.json"
+        with open(filename, "w", encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        if self.retention.enabled:
+            self.apply_retention(company)
+        return Revision(filename, company, now, os.path.getsize(filename), filename)
+
+    def load(self, revision_id):
+        try:
+            with open(revision_id, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def latest(self, company):
+        revisions = self.revisions(company, limit=1)
+        if not revisions:
+            return None
+        return revisions[0], self.load(revisions[0].id)
+
+    def revisions(self, company=None, limit=None):
+        # Le dossier doit être parcouru : coût proportionnel au nombre de fichiers
+        result = [
+            revision for revision in self._scan()
+            if company is None or revision.company == company
+        ]
+        result.sort(key=lambda revision: revision.created_at, reverse=True)
+        return result[:limit] if limit is not None else result
+
+    def companies(self):
+        return sorted({revision.company for revision in self._scan()})
+
+    def apply_retention(self, company=None):
+        by_company = {}
+        for revision in self.revisions(company):
+            by_company.setdefault(revision.company, []).append(revision)
+        removed = 0
+        for revisions in by_company.values():
+            for revision in _expired(revisions, self.retention):
+                try:
+                    os.remove(revision.id)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _scan(self):
+        try:
+            entries = list(os.scandir(self.save_dir))
+        except FileNotFoundError:
+            return []
+        revisions = []
+        for entry in entries:
+            name = entry.name
+            if not name.endswith(".json"):
+                continue
+            # <entreprise>_<AAAAMMJJ>_<HHMMSS>.json ; l'entreprise peut contenir des "_"
+            parts = name[:-5].rsplit("_", 2)
+            if len(parts) != 3:
+                continue
+            try:
+                created_at = datetime.strptime(f"{parts[1]}_{parts[2]}", "%Y%m%d_%H%M%S").timestamp()
+                size = entry.stat().st_size
+            except (ValueError, OSError):
+                continue
+            path = f"{self.save_dir}/{name}"
+            revisions.append(Revision(path, parts[0], created_at, size, path))
+        return revisions
+
+
+# Révisions d'une entreprise (de la plus récente à la plus ancienne) à supprimer
+def _expired(revisions, retention):
+    cutoff = retention.cutoff()
+    expired = []
+    for index, revision in enumerate(revisions):
+        if index == 0:
+            continue
+        too_many = retention.keep_last is not None and index >= retention.keep_last
+        too_old = cutoff is not None and revision.created_at < cutoff
+        if too_many or too_old:
+            expired.append(revision)
+    return expired
+
+
+# Une révision complète toutes les SNAPSHOT_EVERY révisions d'une entreprise : au plus
+# SNAPSHOT_EVERY - 1 deltas à appliquer pour reconstruire n'importe quelle révision
+SNAPSHOT_EVERY = 20
+
+
+def diff_report(previous, current):
+    """
+    Delta entre deux révisions, au niveau des clés de premier niveau et, pour les
+    tableaux stockés en colonnes, au niveau des colonnes :
+    {"set": {clé: valeur}, "del": [clés], "cols": {clé: {"set": {...}, "del": [...]}}, "order": [...]}.
+    """
+    delta = {}
+    values = {}
+    columns = {}
+    for key, value in current.items():
+        if key in previous and previous[key] == value:
+            continue
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            column_delta = _diff_columns(old, value)
+            if column_delta is not None:
+                columns[key] = column_delta
+                continue
+        values[key] = value
+    removed = [key for key in previous if key not in current]
+    if values:
+        delta["set"] = values
+    if removed:
+        delta["del"] = removed
+    if columns:
+        delta["cols"] = columns
+    # L'ordre des clés est conservé tel quel (il fixe l'ordre des colonnes des tableaux)
+    if list(_apply_keys(previous, delta)) != list(current):
+        delta["order"] = list(current)
+    return delta
+
+
+def _diff_columns(old, new):
+    # None si le delta ne redonnerait pas les colonnes dans le même ordre
+    column_delta = {}
+    changed = {column: values for column, values in new.items() if old.get(column, None) != values or column not in old}
+    removed = [column for column in old if column not in new]
+    if changed:
+        column_delta["set"] = changed
+    if removed:
+        column_delta["del"] = removed
+    if list(_apply_keys(old, column_delta)) != list(new):
+        return None
+    return column_delta
+
+
+def _apply_keys(base, delta):
+    result = dict(base)
+    for key in delta.get("del", ()):
+        result.pop(key, None)
+    result.update(delta.get("set", {}))
+    for key in delta.get("cols", {}):
+        result.setdefault(key, None)
+    return result
+
+
+def apply_delta(data, delta):
+    """Applique un delta produit par diff_report ; data est modifié et retourné."""
+    for key in delta.get("del", ()):
+        data.pop(key, None)
+    data.update(delta.get("set", {}))
+    for key, column_delta in delta.get("cols", {}).items():
+        table = data[key] = dict(data[key])
+        for column in column_delta.get("del", ()):
+            table.pop(column, None)
+        table.update(column_delta.get("set", {}))
+    if "order" in delta:
+        data = {key: data[key] for key in delta["order"]}
+    return data
+
+
+class SQLiteStorage(ReportStorage):
+    """
+    Révisions stockées dans une base SQLite (mode WAL : les lectures ne bloquent pas
+    l'écriture). Chaque révision est soit complète, soit un delta par rapport à la
+    révision précédente de la même entreprise ; base_id relie un delta à la révision
+    complète qui ouvre sa chaîne. Partagée entre sessions et threads : les accès sont
+    verrouillés.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path="saved_data/reports.db", retention=None, snapshot_every=SNAPSHOT_EVERY):
+        super().__init__(retention)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Dernière révision connue par entreprise : (id, données, base_id, longueur de chaîne)
+        self._heads = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS revisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    company TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS revisions_company_created
+                    ON revisions (company, created_at);
+                CREATE INDEX IF NOT EXISTS revisions_created
+                    ON revisions (created_at);
+            """)
+            if version < 2:
+                # Version 1 : uniquement des révisions complètes
+                columns = [row[1] for row in self._conn.execute("PRAGMA table_info(revisions)")]
+                if "kind" not in columns:
+                    self._conn.execute("ALTER TABLE revisions ADD COLUMN kind TEXT NOT NULL DEFAULT 'full'")
+                    self._conn.execute("ALTER TABLE revisions ADD COLUMN base_id INTEGER")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS revisions_base ON revisions (base_id, id)")
+            self._conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+    def save(self, data):
+        company = company_key(data)
+        # Copie indépendante : l'appelant continue de modifier ses données après la sauvegarde
+        current = json.loads(json.dumps(data, ensure_ascii=False))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                head = self._head(company)
+                if head is None or head[3] + 1 >= self.snapshot_every:
+                    kind, base_id, chain = "full", None, 0
+                    payload = _dumps(current)
+                else:
+                    kind, base_id, chain = "delta", head[2], head[3] + 1
+                    payload = _dumps(diff_report(head[1], current))
+                cursor = self._conn.execute(
+                    "INSERT INTO revisions (company, created_at, data, kind, base_id) VALUES (?, ?, ?, ?, ?)",
+                    (company, now, payload, kind, base_id)
+                )
+                revision_id = cursor.lastrowid
+                self._heads[company] = (revision_id, current, base_id if base_id is not None else revision_id, chain)
+                if self.retention.enabled:
+                    self._apply_retention(company)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._heads.pop(company, None)
+                raise
+        return Revision(revision_id, company, now, len(payload.encode("utf-8")), f"{self.path}#{revision_id}")
+
+    def load(self, revision_id):
+        with self._lock:
+            return self._reconstruct(revision_id)
+
+    def latest(self, company):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, company, created_at, length(CAST(data AS BLOB)) FROM revisions "
+                "WHERE company = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                (company,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = self._reconstruct(row[0])
+        return self._revision(row), data
+
+    def revisions(self, company=None, limit=None):
+        query = "SELECT id, company, created_at, length(CAST(data AS BLOB)) FROM revisions"
+        params = []
+        if company is not None:
+            query += " WHERE company = ?"
+            params.append(company)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._revision(row) for row in rows]
+
+    def companies(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT company FROM revisions ORDER BY company").fetchall()
+        return [row[0] for row in rows]
+
+    def apply_retention(self, company=None):
+        if not self.retention.enabled:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = sum(self._apply_retention(name) for name in self._companies(company))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._heads.clear()
+                raise
+        return removed
+
+    def compact(self, company=None, vacuum=True):
+        """
+        Réencode l'historique : une révision complète toutes les snapshot_every révisions,
+        des deltas entre les deux (les révisions complètes des anciennes versions de la base
+        deviennent des deltas). Retourne la taille de la base (octets) avant et après.
+        """
+        with self._lock:
+            before = self._database_size()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name in self._companies(company):
+                    self._compact_company(name)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._heads.clear()
+            if vacuum:
+                self._conn.execute("VACUUM")
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return before, self._database_size()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _companies(self, company):
+        if company is not None:
+            return [company]
+        return [row[0] for row in self._conn.execute("SELECT DISTINCT company FROM revisions")]
+
+    def _head(self, company):
+        # Appelé verrou pris ; le cache est vérifié contre la base (un autre processus a pu écrire)
+        row = self._conn.execute(
+            "SELECT id, kind, base_id FROM revisions WHERE company = ? ORDER BY id DESC LIMIT 1",
+            (company,)
+        ).fetchone()
+        if row is None:
+            return None
+        head = self._heads.get(company)
+        if head is not None and head[0] == row[0]:
+            return head
+        base_id = row[0] if row[1] == "full" else row[2]
+        chain = self._conn.execute(
+            "SELECT COUNT(*) FROM revisions WHERE base_id = ? AND id <= ?", (base_id, row[0])
+        ).fetchone()[0]
+        head = (row[0], self._reconstruct(row[0]), base_id, chain)
+        self._heads[company] = head
+        return head
+
+    def _reconstruct(self, revision_id):
+        # Révision complète de la chaîne puis deltas dans l'ordre, par l'index (base_id, id)
+        row = self._conn.execute(
+            "SELECT kind, base_id, data FROM revisions WHERE id = ?", (revision_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        kind, base_id, payload = row
+        if kind == "full":
+            return json.loads(payload)
+        data = json.loads(self._conn.execute("SELECT data FROM revisions WHERE id = ?", (base_id,)).fetchone()[0])
+        for (delta,) in self._conn.execute(
+            "SELECT data FROM revisions WHERE base_id = ? AND id <= ? ORDER BY id", (base_id, revision_id)
+        ):
+            data = apply_delta(data, json.loads(delta))
+        return data
+
+    def _apply_retention(self, company):
+        # Appelé verrou pris, dans une transaction ; les requêtes passent par les index
+        latest = self._conn.execute(
+            "SELECT id FROM revisions WHERE company = ? ORDER BY id DESC LIMIT 1", (company,)
+        ).fetchone()
+        if latest is None:
+            return 0
+        # Plus petit identifiant conservé : les révisions sont conservées par ordre d'enregistrement
+        keep_from = None
+        if self.retention.keep_last is not None:
+            row = self._conn.execute(
+                "SELECT id FROM revisions WHERE company = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (company, max(self.retention.keep_last, 1) - 1)
+            ).fetchone()
+            if row is not None:
+                keep_from = row[0]
+        cutoff = self.retention.cutoff()
+        if cutoff is not None:
+            row = self._conn.execute(
+                "SELECT MIN(id) FROM revisions WHERE company = ? AND created_at >= ?", (company, cutoff)
+            ).fetchone()
+            keep_from = max(keep_from or 0, row[0] if row[0] is not None else latest[0])
+        if keep_from is None:
+            return 0
+        self._rebase(keep_from)
+        removed = self._conn.execute(
+            "DELETE FROM revisions WHERE company = ? AND id < ?", (company, keep_from)
+        ).rowcount
+        if removed:
+            self._heads.pop(company, None)
+        return removed
+
+    def _rebase(self, revision_id):
+        # La plus ancienne révision conservée devient complète : la suite de sa chaîne s'y rattache
+        kind, base_id = self._conn.execute(
+            "SELECT kind, base_id FROM revisions WHERE id = ?", (revision_id,)
+        ).fetchone()
+        if kind == "full":
+            return
+        data = self._reconstruct(revision_id)
+        self._conn.execute(
+            "UPDATE revisions SET kind = 'full', base_id = NULL, data = ? WHERE id = ?",
+            (_dumps(data), revision_id)
+        )
+        self._conn.execute(
+            "UPDATE revisions SET base_id = ? WHERE base_id = ? AND id > ?",
+            (revision_id, base_id, revision_id)
+        )
+
+    def _compact_company(self, company):
+        data = None
+        previous = None
+        chain = 0
+        base_id = None
+        rows = self._conn.execute(
+            "SELECT id, kind, base_id, data FROM revisions WHERE company = ? ORDER BY id", (company,)
+        ).fetchall()
+        for revision_id, kind, old_base_id, payload in rows:
+            stored = json.loads(payload)
+            data = stored if kind == "full" else apply_delta(data, stored)
+            if previous is None or chain + 1 >= self.snapshot_every:
+                new = ("full", None, _dumps(data))
+                base_id, chain = revision_id, 0
+            else:
+                new = ("delta", base_id, _dumps(diff_report(previous, data)))
+                chain += 1
+            if new != (kind, old_base_id, payload):
+                self._conn.execute(
+                    "UPDATE revisions SET kind = ?, base_id = ?, data = ? WHERE id = ?",
+                    new + (revision_id,)
+                )
+            # Copie : les deltas suivants modifient data en place
+            previous = json.loads(_dumps(data))
+
+    def _database_size(self):
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def _revision(self, row):
+        return Revision(row[0], row[1], row[2], row[3], f"{self.path}#{row[0]}")
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def open_storage(kind=None, path=None, retention=None):
+    """
+    Ouvre le stockage configuré. Sans argument, lit l'environnement :
+    REPORT_STORAGE (file par défaut, ou sqlite), REPORT_STORAGE_PATH,
+    REPORT_KEEP_REVISIONS et REPORT_KEEP_DAYS pour la rétention.
+    """
+    kind = kind or os.environ.get("REPORT_STORAGE", "file")
+    path = path or os.environ.get("REPORT_STORAGE_PATH")
+    if retention is None:
+        keep_last = os.environ.get("REPORT_KEEP_REVISIONS")
+        keep_days = os.environ.get("REPORT_KEEP_DAYS")
+        retention = RetentionPolicy(
+            keep_last=int(keep_last) if keep_last else None,
+            keep_days=float(keep_days) if keep_days else None
+        )
+    if kind == "sqlite":
+        return SQLiteStorage(path or "saved_data/reports.db", retention)
+    if kind == "file":
+        return FileStorage(path or "saved_data", retention)
+    raise ValueError(f"Stockage inconnu : {kind} (file ou sqlite attendu)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintenance du stockage des sauvegardes.")
+    parser.add_argument("command", choices=["compact", "retention"],
+                        help="compact : réencoder l'historique en deltas ; retention : appliquer la politique de rétention")
+    parser.add_argument("--storage", choices=["file", "sqlite"], default=None, help="stockage (défaut : REPORT_STORAGE ou file)")
+    parser.add_argument("--path", default=None, help="dossier ou base de données (défaut : REPORT_STORAGE_PATH)")
+    parser.add_argument("--company", default=None, help="limiter à une entreprise")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage, args.path)
+    if args.command == "retention":
+        print(f"{storage.apply_retention(args.company)} révision(s) supprimée(s)")
+        return 0
+    sizes = storage.compact(args.company)
+    if sizes is None:
+        print("Ce stockage ne se compacte pas.")
+    else:
+        print(f"Taille : {sizes[0]} -> {sizes[1]} octets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
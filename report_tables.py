@@ -0,0 +1,69 @@
+"""
+Conversion des tableaux du rapport.
+
+Les anciennes sauvegardes enregistrent les tableaux au format enregistrements (liste
+de dictionnaires, celui de st.data_editor) ; le modèle du rapport (report_model) les
+garde au format colonnes (dictionnaire de listes). records_to_columns() fait cette
+conversion sans modifier les enregistrements reçus.
+"""
+
+# Clés des tables du rapport
+TABLES_TO_CONVERT = [
+    'marche_cibles_table',
+    'marche_swot_table',
+    'marche_marketing_table',
+    'marche_concurrents_table',
+    'marche_comparison_table',
+    'marche_matrice_table',
+    'competitors_comparison_table',
+    'competitor_list',
+    'competitor_criteria',
+    'competitor_cells',
+    'modele_partenaires',
+    'modele_activites',
+    'modele_proposition',
+    'modele_relations',
+    'modele_segments',
+    'modele_ressources',
+    'modele_couts',
+    'modele_canaux',
+    'modele_revenus',
+    'projections_table',
+    'tech_images'
+]
+
+
+def records_to_columns(records, missing=""):
+    """
+    Convertit une liste d'enregistrements en dictionnaire de colonnes, en un seul
+    passage. Les colonnes suivent l'ordre de première apparition des clés ; une
+    valeur absente d'un enregistrement est remplacée par `missing`.
+    """
+    if not records:
+        return {}
+
+    # Cas courant : tous les enregistrements ont les mêmes clés (tableau issu de st.data_editor)
+    keys = list(records[0])
+    try:
+        columns = {key: [record[key] for record in records] for key in keys}
+    except KeyError:
+        columns = None
+    if columns is not None and all(len(record) == len(keys) for record in records):
+        return columns
+
+    # Enregistrements hétérogènes : compléter chaque colonne au fil de la lecture
+    columns = {}
+    for row, record in enumerate(records):
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [missing] * row
+            elif len(column) < row:
+                column.extend([missing] * (row - len(column)))
+            column.append(value)
+    total = len(records)
+    for column in columns.values():
+        if len(column) < total:
+            column.extend([missing] * (total - len(column)))
+    return columns
+
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from report_model import (
+    COMPETITOR_CELLS_KEY, COMPETITOR_CRITERIA_KEY, COMPETITOR_LIST_KEY,
+    ReportStore, cells_from_json, cells_to_json, id_list_to_json
+)
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "p6.py")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Pas de brouillon enregistré sur disque pendant les tests
+    monkeypatch.setenv("AUTOSAVE_DELAY", "0")
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    return at
+
+
+def show_page(at, page):
+    at.sidebar.selectbox[0].set_value(page).run()
+
+
+def test_table_edit_survives_page_switch(app):
+    show_page(app, "Analyse de Marché")
+    app.session_state["marche_cibles_table"] = {
+        "edited_rows": {0: {"Segment": "PME"}}, "added_rows": [], "deleted_rows": []
+    }
+    app.run()
+    assert app.session_state.report_store.get("marche_cibles_table")["Segment"][0] == "PME"
+
+    show_page(app, "Présentation du Projet")
+    show_page(app, "Analyse de Marché")
+    assert app.session_state.report_store.get("marche_cibles_table")["Segment"][0] == "PME"
+
+    # Nouvelle modification après le retour : la précédente est conservée
+    app.session_state["marche_cibles_table"] = {
+        "edited_rows": {1: {"Segment": "ETI"}}, "added_rows": [], "deleted_rows": []
+    }
+    app.run()
+    assert app.session_state.report_store.get("marche_cibles_table")["Segment"][:2] == ["PME", "ETI"]
+
+
+def edit_matrix(at, edited_rows):
+    generation = at.session_state["table_editors"][COMPETITOR_CELLS_KEY]["generation"]
+    at.session_state[f"{COMPETITOR_CELLS_KEY}_{generation}"] = {
+        "edited_rows": edited_rows, "added_rows": [], "deleted_rows": []
+    }
+    at.run()
+
+
+def stored_cells(at):
+    return cells_from_json(at.session_state.report_store.get(COMPETITOR_CELLS_KEY))
+
+
+def test_matrix_edit_survives_page_switch(app):
+    show_page(app, "Analyse de Marché")
+    edit_matrix(app, {0: {"c1": "+"}})
+    assert stored_cells(app) == {(1, 1): "+"}
+
+    show_page(app, "Présentation du Projet")
+    show_page(app, "Analyse de Marché")
+    edit_matrix(app, {1: {"c2": "-"}})
+    assert stored_cells(app) == {(1, 1): "+", (2, 2): "-"}
+
+
+def test_deleted_competitor_cells_stay_deleted(monkeypatch):
+    monkeypatch.setenv("AUTOSAVE_DELAY", "0")
+    at = AppTest.from_file(APP, default_timeout=60)
+    # Douze concurrents : le dernier n'est pas sur la page affichée de la matrice
+    at.session_state["report_store"] = ReportStore({
+        COMPETITOR_LIST_KEY: id_list_to_json([(i, f"C{i}") for i in range(1, 13)], "Concurrent"),
+        COMPETITOR_CRITERIA_KEY: id_list_to_json([(1, "Prix"), (2, "Qualité")], "Critère"),
+        COMPETITOR_CELLS_KEY: cells_to_json({(1, 1): "+", (1, 12): "T"}),
+    })
+    at.run()
+    show_page(at, "Analyse de Marché")
+
+    at.session_state[COMPETITOR_LIST_KEY] = {"edited_rows": {}, "added_rows": [], "deleted_rows": [11]}
+    at.run()
+    assert stored_cells(at) == {(1, 1): "+"}
+
+    edit_matrix(at, {1: {"c2": "-"}})
+    assert stored_cells(at) == {(1, 1): "+", (2, 2): "-"}
+    assert len(at.session_state.report_store.get(COMPETITOR_LIST_KEY)["Concurrent"]) == 11
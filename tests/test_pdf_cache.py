@@ -0,0 +1,68 @@
+import io
+import os
+
+from pdf_cache import PdfCache, report_hash
+
+
+def test_report_hash_ignores_key_order():
+    assert report_hash({"a": 1, "b": [1, 2]}) == report_hash({"b": [1, 2], "a": 1})
+    assert report_hash({"a": 1}) != report_hash({"a": 1}, {"version": 2})
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PdfCache(max_entries=2)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") == b"A"
+    cache.put("c", b"C")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"A" and cache.get("c") == b"C"
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_eviction_by_size():
+    cache = PdfCache(max_entries=10, max_bytes=10)
+    cache.put("a", b"x" * 4)
+    cache.put("b", b"x" * 4)
+    cache.put("c", b"x" * 4)
+    assert len(cache) == 2 and cache.get("a") is None
+    # Plus gros que tout le cache : jamais gardé en mémoire
+    cache.put("d", b"x" * 11)
+    assert cache.get("d") is None and len(cache) == 2
+
+
+def test_disk_tier(tmp_path):
+    cache = PdfCache(max_bytes=10, cache_dir=str(tmp_path))
+    cache.put("a", b"small")
+    cache.put("big", b"x" * 20)
+    cache.clear()
+    assert cache.get("a") == b"small"
+    # Trop gros pour la mémoire : get() ne le lit pas, open() le fournit en fichier
+    assert cache.get("big") is None
+    with cache.open("big") as f:
+        assert f.read() == b"x" * 20
+    assert cache.open("missing") is None
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_put_file_large_pdf_stays_on_disk(tmp_path):
+    cache = PdfCache(max_bytes=10, cache_dir=str(tmp_path))
+    cache.put_file("big", io.BytesIO(b"x" * 20))
+    assert len(cache) == 0
+    with open(tmp_path / "big.pdf", "rb") as f:
+        assert f.read() == b"x" * 20
+
+
+def test_disk_pruned_to_90_percent(tmp_path):
+    cache = PdfCache(cache_dir=str(tmp_path), max_disk_bytes=100)
+    for position, key in enumerate("abcde"):
+        cache.put(key, b"x" * 20)
+        # Dates d'accès croissantes : "a" est le moins récemment utilisé
+        os.utime(tmp_path / f"{key}.pdf", (1000 + position, 1000 + position))
+    assert len(os.listdir(tmp_path)) == 5
+    cache.put("f", b"x" * 20)
+    # 120 octets > 100 : suppression des plus anciens jusqu'à 90 octets au plus
+    assert sorted(os.listdir(tmp_path)) == ["c.pdf", "d.pdf", "e.pdf", "f.pdf"]
+    assert cache._disk_size == 80
+    # Taille relue au démarrage
+    assert PdfCache(cache_dir=str(tmp_path), max_disk_bytes=100)._disk_size == 80
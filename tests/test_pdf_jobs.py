@@ -0,0 +1,122 @@
+import os
+import queue
+import threading
+import time
+
+import pytest
+
+from pdf_jobs import ERREUR, TERMINE, PdfJob, PdfJobManager
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.01)
+
+
+def render_file(data, on_section, on_page, path):
+    # Rendu factice : une section, une page, le PDF écrit dans le fichier du spool
+    if data.get("gate"):
+        data["gate"].wait(5)
+    if data.get("fail"):
+        raise ValueError("rendu impossible")
+    on_section("titre")
+    on_page(1)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-factice")
+    return os.path.getsize(path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PdfJobManager(max_workers=1, spool_dir=str(tmp_path))
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+
+def test_spooled_job_is_read_from_its_file(manager, tmp_path):
+    done = []
+    job_id = manager.submit(render_file, {}, sections_total=1, on_done=done.append)
+    wait_for(lambda: manager.get(job_id).finished)
+    job = manager.get(job_id)
+    assert job.status == TERMINE and job.available and job.result is None
+    assert (job.sections_done, job.pages, job.fraction) == (1, 1, 1.0)
+    assert done == [job.path] and os.path.dirname(job.path) == str(tmp_path)
+    with job.open() as f:
+        assert f.read() == b"%PDF-factice"
+
+    manager.discard(job_id)
+    assert manager.get(job_id) is None and not os.path.exists(job.path)
+
+
+def test_discard_during_render_removes_file_when_done(manager, tmp_path):
+    gate = threading.Event()
+    job_id = manager.submit(render_file, {"gate": gate}, sections_total=1)
+    job = manager.get(job_id)
+    manager.discard(job_id)
+    gate.set()
+    # Le fichier est supprimé juste après le changement d'état
+    wait_for(lambda: job.finished and not os.listdir(tmp_path))
+    assert job.status == TERMINE
+
+
+def test_failed_render(manager):
+    job_id = manager.submit(render_file, {"fail": True}, sections_total=1)
+    wait_for(lambda: manager.get(job_id).finished)
+    job = manager.get(job_id)
+    assert job.status == ERREUR and job.error == "rendu impossible" and not job.available
+
+
+def test_unvisited_jobs_are_purged(manager):
+    first = manager.submit(render_file, {}, sections_total=1)
+    wait_for(lambda: manager.get(first).finished)
+    path = manager.get(first).path
+    # Consultée récemment : conservée
+    manager.add_finished(b"%PDF", sections_total=1)
+    assert manager.get(first) is not None
+
+    manager.get(first).last_access -= manager.keep_seconds + 1
+    manager.add_finished(b"%PDF", sections_total=1)
+    assert manager.get(first) is None and not os.path.exists(path)
+
+
+def test_old_spool_files_are_removed_at_start(tmp_path):
+    old = tmp_path / "ancien.pdf"
+    old.write_bytes(b"%PDF")
+    os.utime(old, (0, 0))
+    recent = tmp_path / "recent.zip"
+    recent.write_bytes(b"PK")
+    PdfJobManager(spool_dir=str(tmp_path))._executor.shutdown()
+    assert os.listdir(tmp_path) == ["recent.zip"]
+
+
+class SlowQueue(queue.Queue):
+    # File d'un Manager : chaque lecture passe par un échange avec un autre processus
+    def get_nowait(self):
+        time.sleep(0.0005)
+        return super().get_nowait()
+
+
+def test_events_drained_by_script_and_collector():
+    events = SlowQueue()
+    for position in range(200):
+        events.put(("section", position))
+        events.put(("page", position + 1))
+    job = PdfJob("job", sections_total=200, events=events)
+    errors = []
+
+    def drain(close):
+        try:
+            job.drain_events(close=close)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=drain, args=(close,)) for close in (False, True, False)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert (job.sections_done, job.pages, job.events) == (200, 200, None)
+    # File abandonnée : les consultations suivantes n'y lisent plus
+    job.drain_events()
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+import pytest
+
+import report_autosave
+from report_autosave import Autosaver
+
+
+@pytest.fixture
+def autosaver(tmp_path):
+    # Délais longs : seuls flush() et stop() écrivent pendant le test
+    autosaver = Autosaver(directory=str(tmp_path), delay=60, max_delay=60)
+    yield autosaver
+    autosaver.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.01)
+
+
+def read_draft(autosaver, draft_id):
+    with open(os.path.join(autosaver.directory, f"{draft_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_changes_after_write_are_merged_into_the_file(autosaver):
+    autosaver.mark("a", "titre", "Projet")
+    autosaver.flush("a")
+    # Contenu écrit : plus gardé en mémoire, mark() ne relit pas le fichier
+    assert autosaver._drafts["a"].data is None
+    autosaver.mark("a", "resume", "Résumé")
+    assert autosaver._drafts["a"].data is None
+    autosaver.flush("a")
+    assert read_draft(autosaver, "a") == {"titre": "Projet", "resume": "Résumé"}
+
+
+def test_unreadable_draft_is_not_overwritten(autosaver):
+    autosaver.mark("a", "titre", "Projet")
+    autosaver.flush("a")
+    path = os.path.join(autosaver.directory, "a.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"titre": "Proj')
+    autosaver.mark("a", "resume", "Résumé")
+    autosaver.flush("a")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == '{"titre": "Proj'
+    stats = autosaver.stats("a")
+    assert stats["error"] and stats["pending"] == 1
+
+
+def test_info_only_for_known_draft_ids(autosaver):
+    autosaver.mark("a", "titre", "Projet")
+    autosaver.flush("a")
+    assert autosaver.info("a").id == "a"
+    assert autosaver.info("b") is None
+    assert autosaver.info("../a") is None
+    assert autosaver.info(None) is None
+
+
+def test_burst_of_marks_is_written_once_after_a_pause(tmp_path):
+    autosaver = Autosaver(directory=str(tmp_path), delay=0.2, max_delay=60)
+    try:
+        for length in range(1, 11):
+            autosaver.mark("a", "titre", "Projet"[:length])
+            autosaver.mark("a", "resume", str(length))
+        # Saisie en cours : rien n'est écrit avant `delay` secondes sans modification
+        assert autosaver.stats("a")["writes"] == 0
+        wait_for(lambda: autosaver.stats("a")["writes"] == 1)
+        time.sleep(0.3)
+        stats = autosaver.stats("a")
+        assert (stats["marks"], stats["writes"], stats["avoided"], stats["pending"]) == (20, 1, 19, 0)
+        assert read_draft(autosaver, "a") == {"titre": "Projet", "resume": "10"}
+    finally:
+        autosaver.stop()
+
+
+def test_continuous_typing_is_written_after_max_delay(tmp_path):
+    autosaver = Autosaver(directory=str(tmp_path), delay=0.2, max_delay=0.5)
+    try:
+        start = time.monotonic()
+        while autosaver.stats("a")["writes"] == 0:
+            assert time.monotonic() - start < 5
+            autosaver.mark("a", "titre", str(time.monotonic()))
+            time.sleep(0.05)
+        assert time.monotonic() - start >= 0.5
+    finally:
+        autosaver.stop()
+
+
+def test_stop_writes_pending_drafts(tmp_path):
+    autosaver = Autosaver(directory=str(tmp_path), delay=60, max_delay=60)
+    autosaver.replace("a", {"titre": "Projet"})
+    autosaver.mark("b", "titre", "Autre")
+    autosaver.stop()
+    assert read_draft(autosaver, "a") == {"titre": "Projet"}
+    assert read_draft(autosaver, "b") == {"titre": "Autre"}
+
+
+def test_failed_write_keeps_previous_file(autosaver, monkeypatch):
+    autosaver.mark("a", "titre", "Projet")
+    autosaver.flush("a")
+
+    def fail(src, dst):
+        raise OSError("disque plein")
+    monkeypatch.setattr(report_autosave.os, "replace", fail)
+    autosaver.mark("a", "titre", "Projet modifié")
+    autosaver.flush("a")
+    monkeypatch.undo()
+
+    # Écriture atomique : l'ancien brouillon est intact et le fichier temporaire supprimé
+    assert read_draft(autosaver, "a") == {"titre": "Projet"}
+    assert os.listdir(autosaver.directory) == ["a.json"]
+    assert autosaver.stats("a")["error"] == "disque plein"
+    # Le contenu est resté en mémoire : l'écriture suivante le reprend entièrement
+    autosaver.mark("a", "resume", "Résumé")
+    autosaver.flush("a")
+    assert read_draft(autosaver, "a") == {"titre": "Projet modifié", "resume": "Résumé"}
+    assert autosaver.stats("a")["error"] is None
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from report_html import build_html, html_section_matrice
+from report_model import normalize_report
+
+
+def test_matrice_with_only_criteria_column():
+    data = normalize_report({"marche_matrice_table": {"Critère": ["Prix", "Qualité"]}})
+    html = html_section_matrice(data)
+    assert "Prix" in html and "Qualité" in html
+
+
+def test_build_html_with_only_criteria_column():
+    data = normalize_report({"marche_matrice_table": [{"Critère": "Prix"}]})
+    assert "Matrice de Comparaison" in build_html(data)
+
+
+def test_preview_does_not_load_reportlab():
+    # Interpréteur neuf : les autres tests ont pu charger ReportLab dans celui-ci
+    code = (
+        "import sys, report_html\n"
+        "report_html.build_html({'projet_titre': 'Projet'})\n"
+        "print(sorted(name for name in ('reportlab', 'PIL', 'report_pdf') if name in sys.modules))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
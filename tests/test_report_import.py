@@ -0,0 +1,83 @@
+import io
+import json
+
+import pytest
+
+import report_import
+from report_import import ReportImportError, iter_report_items, load_report
+
+
+def as_file(data):
+    return io.BytesIO(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def test_load_report_round_trip():
+    data = {
+        "projet_titre": "Projet",
+        "marche_cibles_table": {"Segment": ["PME", "ETI"], "Bénéfices": ["Prix", ""]},
+        "projections_table": [{"Année": 2025, "Visiteurs": 10, "Ventes": 1.5}],
+    }
+    assert load_report(as_file(data)) == data
+
+
+def test_values_split_across_chunks(monkeypatch):
+    # Morceaux minuscules : chaque valeur est coupée en plusieurs lectures
+    monkeypatch.setattr(report_import, "CHUNK_SIZE", 7)
+    data = {"projet_titre": "Électronique embarquée " * 20, "vis1": "12345678901234567890"}
+    assert dict(iter_report_items(as_file(data))) == data
+
+
+def test_oversized_file_rejected():
+    with pytest.raises(ReportImportError, match="trop volumineuse"):
+        load_report(as_file({"projet_titre": "x" * 4096}), max_bytes=1024)
+
+
+def test_oversized_value_rejected(monkeypatch):
+    monkeypatch.setattr(report_import, "CHUNK_SIZE", 64)
+    with pytest.raises(ReportImportError, match="Une valeur"):
+        load_report(as_file({"projet_titre": "x" * 4096}), max_value_bytes=1024)
+
+
+def test_unknown_key_rejected():
+    with pytest.raises(ReportImportError, match="Clé inconnue"):
+        load_report(as_file({"projet_titre": "Projet", "__proto__": "x"}))
+
+
+def test_unknown_column_rejected():
+    with pytest.raises(ReportImportError, match="Colonne inconnue"):
+        load_report(as_file({"marche_cibles_table": [{"Segment": "PME", "Prix": 3}]}))
+    with pytest.raises(ReportImportError, match="Colonne inconnue"):
+        load_report(as_file({"marche_cibles_table": {"Segment": ["PME"], "Prix": [3]}}))
+
+
+@pytest.mark.parametrize("value", [
+    {"Segment": "PME"},
+    [["PME"]],
+    {"Segment": [["PME"]]},
+    "PME",
+])
+def test_malformed_table_rejected(value):
+    with pytest.raises(ReportImportError):
+        load_report(as_file({"marche_cibles_table": value}))
+
+
+def test_too_many_rows_rejected():
+    rows = {"Segment": [""] * (report_import.MAX_TABLE_ROWS + 1)}
+    with pytest.raises(ReportImportError, match="dépasse"):
+        load_report(as_file({"marche_cibles_table": rows}))
+
+
+def test_text_field_must_be_text():
+    with pytest.raises(ReportImportError, match="doit être un texte"):
+        load_report(as_file({"projet_titre": 3}))
+
+
+@pytest.mark.parametrize("content", [
+    b'{"projet_titre": "x"',
+    b'{"projet_titre": "x"} {}',
+    b"[]",
+    b'{"projet_titre": "\xff"}',
+])
+def test_invalid_json_rejected(content):
+    with pytest.raises(ReportImportError):
+        load_report(io.BytesIO(content))
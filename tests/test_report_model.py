@@ -0,0 +1,97 @@
+from report_model import Report, ReportStore, Table, normalize_report
+
+
+def test_table_from_records():
+    table = Table.from_value([{"Segment": "PME", "Bénéfices": "Prix"}, {"Segment": "ETI", "Bénéfices": ""}])
+    assert table.to_json() == {"Segment": ["PME", "ETI"], "Bénéfices": ["Prix", ""]}
+    assert len(table) == 2 and table.names == ["Segment", "Bénéfices"]
+
+
+def test_table_from_heterogeneous_records():
+    table = Table.from_value([{"A": 1}, {"B": 2}, {"A": 3, "C": 4}])
+    assert table.to_json() == {"A": [1, "", 3], "B": ["", 2, ""], "C": ["", "", 4]}
+
+
+def test_table_from_uneven_columns():
+    table = Table.from_value({"A": [1, 2, 3], "B": [4], "C": "pas une liste"})
+    assert table.to_json() == {"A": [1, 2, 3], "B": [4, "", ""], "C": ["", "", ""]}
+
+
+def test_table_from_invalid_value():
+    assert Table.from_value(None) == Table()
+    assert Table.from_value("texte").to_json() == {}
+    assert len(Table.from_value([])) == 0
+
+
+def test_table_round_trip():
+    columns = {"Année": [2025, 2026], "Ventes": [1.5, 2.0]}
+    table = Table.from_value(columns)
+    assert Table.from_value(table.to_records()) == table
+    assert Table.from_value(table.to_json()).to_json() == columns
+
+
+def test_table_copy_and_take_do_not_share_columns():
+    table = Table.from_value({"A": [1, 2, 3]})
+    copy = table.copy()
+    copy.set_row(0, {"A": 9})
+    taken = table.take([2, 0])
+    taken.append_row({})
+    assert table.to_json() == {"A": [1, 2, 3]}
+    assert taken.to_json() == {"A": [3, 1, ""]}
+
+
+def test_normalize_report_leaves_input_untouched():
+    data = {"projet_titre": "Projet", "marche_cibles_table": [{"Segment": "PME"}]}
+    normalized = normalize_report(data)
+    assert normalized == {"projet_titre": "Projet", "marche_cibles_table": {"Segment": ["PME"]}}
+    assert data["marche_cibles_table"] == [{"Segment": "PME"}]
+    # Une table déjà au format colonnes n'est pas recopiée
+    again = normalize_report(normalized)
+    assert again["marche_cibles_table"]["Segment"] is normalized["marche_cibles_table"]["Segment"]
+
+
+def test_report_separates_fields_and_tables():
+    report = Report.from_json({"projet_titre": "Projet", "projections_table": [{"Année": 2025}]})
+    assert report.get("projet_titre") == "Projet"
+    assert report.table("projections_table").column("Année") == [2025]
+    assert len(report.table("marche_swot_table")) == 0
+
+
+def test_snapshot_is_not_changed_by_later_writes():
+    store = ReportStore({"projet_titre": "v1"})
+    snapshot = store.snapshot()
+    store.set("projet_titre", "v2")
+    store.update({"pres_prob": "Problème"})
+    assert snapshot == {"projet_titre": "v1"}
+    assert store.get("projet_titre") == "v2" and len(store) == 2
+
+
+def test_snapshot_is_copied_only_on_first_write():
+    store = ReportStore({"projet_titre": "v1"})
+    snapshot = store.snapshot()
+    # Sans écriture, deux instantanés successifs sont le même dictionnaire
+    assert store.snapshot() is snapshot
+    store.set("projet_titre", "v2")
+    written = store.snapshot()
+    assert written is not snapshot
+    store.set("pres_prob", "a")
+    store.set("pres_prob", "b")
+    assert written == {"projet_titre": "v2"}
+
+
+def test_set_same_value_is_not_a_write():
+    value = {"Segment": ["PME"]}
+    store = ReportStore({"marche_cibles_table": value})
+    snapshot = store.snapshot()
+    assert store.set("marche_cibles_table", value) is False
+    assert store.version == 0 and store.snapshot() is snapshot
+    assert store.set("marche_cibles_table", {"Segment": ["PME"]}) is True
+    assert store.version == 1
+
+
+def test_clear_does_not_touch_snapshot():
+    store = ReportStore({"projet_titre": "v1"})
+    snapshot = store.snapshot()
+    store.clear()
+    assert len(store) == 0 and "projet_titre" not in store
+    assert snapshot == {"projet_titre": "v1"}
@@ -0,0 +1,27 @@
+import pytest
+
+from report_sections import (
+    FRAME_SECTIONS, PDF_PARTS, PDF_SECTION_CHOICES, SECTION_KEYS, section_label, select_sections,
+)
+
+
+def test_every_section_can_be_chosen():
+    sections = [name for name, keys in SECTION_KEYS]
+    chosen = {name for choice in PDF_SECTION_CHOICES for name in PDF_PARTS.get(choice, [choice])}
+    assert chosen == set(sections) - set(FRAME_SECTIONS)
+    assert len(PDF_SECTION_CHOICES) == len(set(PDF_SECTION_CHOICES))
+    assert all(section_label(choice) for choice in PDF_SECTION_CHOICES)
+
+
+def test_choices_list_each_part_before_its_sections():
+    for part, names in PDF_PARTS.items():
+        position = PDF_SECTION_CHOICES.index(part)
+        assert all(PDF_SECTION_CHOICES.index(name) > position for name in names if name != part)
+
+
+def test_select_sections():
+    assert select_sections(None) is None
+    assert select_sections(["swot", "strategie"]) == ["titre", "swot", "strategie", "pied"]
+    assert select_sections(["presentation"]) == ["titre"] + PDF_PARTS["presentation"] + ["pied"]
+    with pytest.raises(ValueError):
+        select_sections(["inconnue"])
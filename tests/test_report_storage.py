@@ -0,0 +1,107 @@
+import json
+import os
+
+from report_storage import FileStorage, RetentionPolicy, SQLiteStorage, apply_delta, diff_report
+
+
+def report(company, **fields):
+    return dict({"ident_rs": company}, **fields)
+
+
+# Révisions successives : champs ajoutés, modifiés et retirés, colonnes de tableau
+# modifiées, ajoutées, retirées et réordonnées
+HISTORY = [
+    report("Acme", projet_titre="v0", marche_cibles_table={"Segment": ["PME"], "Bénéfices": ["Prix"]}),
+    report("Acme", projet_titre="v1", marche_cibles_table={"Segment": ["PME", "ETI"], "Bénéfices": ["Prix", ""]}),
+    report("Acme", projet_titre="v2", pres_prob="Problème", marche_cibles_table={"Segment": ["PME", "ETI"]}),
+    report("Acme", pres_prob="Problème", marche_cibles_table={"Bénéfices": ["", "Délais"], "Segment": ["PME", "ETI"]}),
+    report("Acme", pres_prob="Problème revu", marche_cibles_table=[{"Segment": "GE"}]),
+    report("Acme", marche_cibles_table={"Segment": ["GE"]}, pres_prob="Problème revu"),
+    report("Acme", projet_titre="v6", pres_prob="Problème revu", marche_cibles_table={"Segment": ["GE"]}),
+]
+
+
+def kinds(storage):
+    return [kind for (kind,) in storage._conn.execute("SELECT kind FROM revisions ORDER BY id")]
+
+
+def test_diff_report_round_trip():
+    for previous, current in zip(HISTORY, HISTORY[1:]):
+        rebuilt = apply_delta(json.loads(json.dumps(previous)), diff_report(previous, current))
+        assert rebuilt == current and list(rebuilt) == list(current)
+
+
+def test_sqlite_delta_revisions_round_trip(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "reports.db"), snapshot_every=3)
+    ids = [storage.save(data).id for data in HISTORY]
+    assert kinds(storage) == ["full", "delta", "delta"] * 2 + ["full"]
+    for revision_id, data in zip(ids, HISTORY):
+        loaded = storage.load(revision_id)
+        assert loaded == data and list(loaded) == list(data)
+
+    # Nouvelle connexion : la tête de chaîne est relue depuis la base
+    reopened = SQLiteStorage(str(tmp_path / "reports.db"), snapshot_every=3)
+    reopened.save(HISTORY[0])
+    assert kinds(reopened)[-1] == "delta"
+    assert reopened.latest("Acme")[1] == HISTORY[0]
+
+
+def test_retention_rebases_first_kept_delta(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "reports.db"), snapshot_every=10)
+    for data in HISTORY[:5]:
+        storage.save(data)
+    storage.retention = RetentionPolicy(keep_last=2)
+    assert storage.apply_retention() == 3
+    assert kinds(storage) == ["full", "delta"]
+    assert [storage.load(revision.id) for revision in storage.revisions("Acme")] == [HISTORY[4], HISTORY[3]]
+    # La révision suivante se rattache à la nouvelle révision complète, elle-même reconstruite
+    # à son tour quand la rétention retire la précédente
+    storage.save(HISTORY[5])
+    assert kinds(storage) == ["full", "delta"]
+    assert [storage.load(revision.id) for revision in storage.revisions("Acme")] == [HISTORY[5], HISTORY[4]]
+
+
+def test_compact_turns_full_revisions_into_deltas(tmp_path):
+    path = str(tmp_path / "reports.db")
+    storage = SQLiteStorage(path, snapshot_every=1)
+    ids = [storage.save(data).id for data in HISTORY]
+    assert set(kinds(storage)) == {"full"}
+    storage.close()
+
+    storage = SQLiteStorage(path, snapshot_every=4)
+    before, after = storage.compact()
+    assert after <= before
+    assert kinds(storage) == ["full", "delta", "delta", "delta", "full", "delta", "delta"]
+    assert [storage.load(revision_id) for revision_id in ids] == HISTORY
+
+
+def test_sqlite_keeps_last_revisions(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "reports.db"), RetentionPolicy(keep_last=2))
+    for version in range(5):
+        storage.save(report("Acme", projet_titre=f"v{version}"))
+    storage.save(report("Autre", projet_titre="seule"))
+    revisions = storage.revisions("Acme")
+    assert [storage.load(revision.id)["projet_titre"] for revision in revisions] == ["v4", "v3"]
+    assert storage.latest("Autre")[1]["projet_titre"] == "seule"
+    assert storage.companies() == ["Acme", "Autre"]
+
+
+def test_sqlite_keeps_latest_revision_when_all_too_old(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "reports.db"))
+    for version in range(3):
+        storage.save(report("Acme", projet_titre=f"v{version}"))
+    storage._conn.execute("UPDATE revisions SET created_at = created_at - 30 * 86400")
+    storage.retention = RetentionPolicy(keep_days=7)
+    assert storage.apply_retention() == 2
+    assert storage.latest("Acme")[1]["projet_titre"] == "v2"
+
+
+def test_file_storage_retention(tmp_path):
+    for stamp in ("20250101_000000", "20250102_000000", "20250103_000000"):
+        with open(tmp_path / f"Acme_SA_{stamp}.json", "w", encoding="utf-8") as f:
+            json.dump(report("Acme SA", projet_titre=stamp), f)
+    storage = FileStorage(str(tmp_path), RetentionPolicy(keep_last=2))
+    assert storage.companies() == ["Acme_SA"]
+    assert storage.apply_retention() == 1
+    assert sorted(os.listdir(tmp_path)) == ["Acme_SA_20250102_000000.json", "Acme_SA_20250103_000000.json"]
+    assert storage.latest("Acme_SA")[1]["projet_titre"] == "20250103_000000"